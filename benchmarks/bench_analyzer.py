@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+分析器吞吐基准：统计分词+过滤的 tokens/sec
+
+tokens/sec按jieba切出的原始词数计算；"过滤阶段"一栏使用预先切好的词，
+只比较分词之后的规范化和过滤开销；cjk_bigram一栏按相同文本的耗时折算，
+便于和jieba直接比较
+
+用法:
+    python benchmarks/bench_analyzer.py [--dump data/crawler/crawled_data_xxx.json] [--limit 500]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.bulk_loader import iter_dump_records
+from utils.jieba_dict import get_tokenizer
+from utils.text_processor import TextProcessor, get_analyzer
+
+
+def _legacy_filter(raw_tokens):
+    """旧实现：每个词都重建一次停用词集合"""
+    tokens = []
+    for token in raw_tokens:
+        token = token.strip()
+        stopwords = {
+            '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个',
+            '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好',
+            '自己', '这', '那', '他', '她', '它', '们', '我们', '你们', '他们', '她们', '它们',
+            '这个', '那个', '这些', '那些', '什么', '怎么', '为什么', '哪里', '何时', '如何',
+            '可以', '应该', '必须', '需要', '想要', '希望', '觉得', '认为', '知道', '看到',
+            '听到', '感到'
+        }
+        if len(token) > 1 and token not in stopwords:
+            tokens.append(token)
+    return tokens
+
+
+def _load_texts(dump_path, limit):
+    texts = []
+    for record in iter_dump_records(dump_path):
+        texts.append(f"{record.get('title', '')} {record.get('content', '')}")
+        if len(texts) >= limit:
+            break
+    return texts
+
+
+def _run(name, func, inputs, raw_count):
+    start = time.perf_counter()
+    for item in inputs:
+        func(item)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f}s  {raw_count / elapsed:12.0f} tokens/sec")
+    return raw_count / elapsed
+
+
+def main():
+    dumps = sorted(glob.glob('data/crawler/crawled_data_*.json'))
+    parser = argparse.ArgumentParser(description='分析器吞吐基准')
+    parser.add_argument('--dump', default=dumps[-1] if dumps else None, help='爬虫导出的JSON/JSONL文件')
+    parser.add_argument('--limit', type=int, default=500, help='最多使用的文档数')
+    args = parser.parse_args()
+
+    if not args.dump:
+        print("❌ 没有找到爬虫导出文件，请用--dump指定")
+        return
+
+    texts = _load_texts(args.dump, args.limit)
+    processor = TextProcessor()
+    # 预热jieba词典，避免把加载时间计入结果
+    processor.warmup()
+    tokenizer = get_tokenizer()
+
+    raw_tokens = [tokenizer.lcut(text) for text in texts]
+    raw_count = sum(len(tokens) for tokens in raw_tokens)
+    print(f"文档数: {len(texts)}, 字符数: {sum(len(t) for t in texts)}, 原始词数: {raw_count}")
+
+    legacy = _run('过滤阶段 legacy', _legacy_filter, raw_tokens, raw_count)
+    current = _run('过滤阶段 analyzer', processor.analyzer.filter, raw_tokens, raw_count)
+    print(f"过滤阶段加速比: {current / legacy:.2f}x")
+
+    _run('完整流程 legacy', lambda text: _legacy_filter(tokenizer.lcut(text)), texts, raw_count)
+    jieba_speed = _run('完整流程 analyzer', processor.tokenize, texts, raw_count)
+    bigram_speed = _run('完整流程 cjk_bigram', get_analyzer('cjk_bigram').analyze, texts, raw_count)
+    print(f"cjk_bigram相对jieba加速比: {bigram_speed / jieba_speed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
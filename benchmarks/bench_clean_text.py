@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+文本清理吞吐基准：统计clean_text每秒处理的输入字节数（MB/s，单核）
+
+优先使用HTTP缓存（record/normal模式爬取时写入）中的原始HTML页面；
+没有HTTP缓存时使用爬虫导出文件中的标题和正文。
+legacy为旧实现（三次re.sub），结果与当前实现在空白折叠后一致
+
+用法:
+    python benchmarks/bench_clean_text.py [--cache data/crawler/http_cache.db]
+                                          [--dump data/crawler/crawled_data_xxx.json]
+                                          [--limit 500] [--max-length 2000]
+"""
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.bulk_loader import iter_dump_records
+from utils.text_processor import TextProcessor
+
+
+def _legacy_clean_text(text):
+    """旧实现：标签、空白、字符白名单各一次re.sub"""
+    if not text:
+        return ""
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^一-龥a-zA-Z0-9\s.,!?;:()\[\]{}"\'-]', '', text)
+    return text.strip()
+
+
+def _load_cached_pages(cache_path, limit):
+    conn = sqlite3.connect(cache_path)
+    try:
+        rows = conn.execute(
+            "SELECT body, encoding FROM http_cache WHERE status = 200 AND body IS NOT NULL LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [zlib.decompress(body).decode(encoding or 'utf-8', errors='replace') for body, encoding in rows if body]
+
+
+def _load_dump_texts(dump_path, limit):
+    texts = []
+    for record in iter_dump_records(dump_path):
+        texts.append(f"{record.get('title', '')} {record.get('content', '')}")
+        if len(texts) >= limit:
+            break
+    return texts
+
+
+def _run(name, func, texts, total_bytes):
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    elapsed = time.perf_counter() - start
+    speed = total_bytes / elapsed / 1e6
+    print(f"{name:<28} {elapsed:8.3f}s  {speed:10.2f} MB/s")
+    return speed
+
+
+def main():
+    dumps = sorted(glob.glob('data/crawler/crawled_data_*.json'))
+    parser = argparse.ArgumentParser(description='文本清理吞吐基准')
+    parser.add_argument('--cache', default='data/crawler/http_cache.db', help='HTTP缓存数据库')
+    parser.add_argument('--dump', default=dumps[-1] if dumps else None, help='爬虫导出的JSON/JSONL文件')
+    parser.add_argument('--limit', type=int, default=500, help='最多使用的页面数')
+    parser.add_argument('--max-length', type=int, default=2000, help='截断测试使用的最大长度')
+    args = parser.parse_args()
+
+    if os.path.exists(args.cache):
+        texts = _load_cached_pages(args.cache, args.limit)
+        source = f"HTTP缓存 {args.cache}"
+    elif args.dump:
+        texts = _load_dump_texts(args.dump, args.limit)
+        source = f"导出文件 {args.dump}"
+    else:
+        print("❌ 没有找到HTTP缓存或爬虫导出文件，请用--cache或--dump指定")
+        return
+
+    processor = TextProcessor()
+    total_bytes = sum(len(text.encode('utf-8')) for text in texts)
+    print(f"数据来源: {source}")
+    print(f"页面数: {len(texts)}, 输入大小: {total_bytes / 1e6:.2f} MB")
+
+    mismatches = sum(
+        ' '.join(_legacy_clean_text(text).split()) != processor.clean_text(text) for text in texts
+    )
+    print(f"与旧实现不一致的页面: {mismatches}")
+
+    legacy = _run('legacy (3x re.sub)', _legacy_clean_text, texts, total_bytes)
+    current = _run('clean_text', processor.clean_text, texts, total_bytes)
+    truncated = _run(f'clean_text max_length={args.max_length}',
+                     lambda text: processor.clean_text(text, max_length=args.max_length), texts, total_bytes)
+    print(f"加速比: {current / legacy:.2f}x (截断: {truncated / legacy:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+冷启动基准：在新进程中测量从启动到第一个查询完成分词的耗时
+
+- legacy:   旧流程，4个TextProcessor实例各自对jieba全局词典add_word，首次分词时加载jieba缓存
+- analyzer: 共享分析器，加载预编译的pickle词典
+- engine:   API服务器/CLI的完整启动（warmup + SearchEngine初始化 + 第一次搜索）
+
+用法:
+    python benchmarks/bench_startup.py [--runs 3] [--skip-engine]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERY = "美联储加息对股票市场的影响"
+
+SCRIPTS = {
+    'legacy': f"""
+import jieba
+from config.indexer_config import FINANCIAL_TERMS
+for _ in range(4):
+    for term in FINANCIAL_TERMS:
+        jieba.add_word(term)
+jieba.lcut({QUERY!r})
+""",
+    'analyzer': f"""
+from utils.text_processor import TextProcessor, warmup
+processors = [TextProcessor() for _ in range(4)]
+warmup()
+processors[0].tokenize({QUERY!r})
+""",
+    'engine': f"""
+from utils.text_processor import warmup
+from engine.search_engine import SearchEngine
+warmup()
+SearchEngine().search({QUERY!r})
+""",
+}
+
+
+def _measure(script: str, runs: int) -> float:
+    """运行多次，返回耗时中位数"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动基准')
+    parser.add_argument('--runs', type=int, default=3, help='每项运行次数')
+    parser.add_argument('--skip-engine', action='store_true', help='跳过完整的搜索引擎启动')
+    args = parser.parse_args()
+
+    # 先各运行一次，生成jieba缓存和预编译词典，排除首次构建缓存的时间
+    for name in ('legacy', 'analyzer'):
+        _measure(SCRIPTS[name], 1)
+
+    for name, script in SCRIPTS.items():
+        if name == 'engine' and args.skip_engine:
+            continue
+        print(f"{name:<10} {_measure(script, args.runs):8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -25,9 +25,11 @@ INDEXER_CONFIG = {
     'search_timeout': 30,  # 搜索超时时间（秒）
     
     # 文本处理配置
+    'analyzer': 'jieba',  # 构建索引使用的分析器：jieba（词典分词）或cjk_bigram（汉字二元组）
     'min_term_length': 2,  # 最小词长度
     'max_term_length': 20,  # 最大词长度
     'enable_stopwords': True,  # 是否启用停用词过滤
+    'dict_cache_dir': 'data/jieba',  # 预编译jieba词典（合并金融词汇）的缓存目录
     
     # 数据库配置
     'db_connection_timeout': 30,  # 数据库连接超时
@@ -103,10 +105,11 @@ SEARCH_WEIGHTS = {
 
 # 索引优化配置
 INDEX_OPTIMIZATION = {
-    'enable_compression': True,        # 启用压缩
+    'enable_compression': True,        # 启用压缩（倒排列表差分+位打包，见indexer/codec.py）
     'compression_level': 6,           # 压缩级别
     'enable_caching': True,           # 启用缓存
     'cache_size': 1000,              # 缓存大小
     'enable_background_merge': True,  # 启用后台合并
     'merge_thread_count': 2,          # 合并线程数
+    'merge_factor': 8,                # 分片同一层的段数达到该值时合并为上一层的一个段
 }
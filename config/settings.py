@@ -14,7 +14,15 @@ CRAWLER_CONFIG = {
     'request_delay': 1,    # 请求间隔(秒)
     'timeout': 30,         # 请求超时时间
     'max_retries': 3,      # 最大重试次数
-    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'http_cache_mode': os.getenv('HTTP_CACHE_MODE', 'off'),  # HTTP缓存模式: off/normal/record/replay
+    'http_cache_path': 'data/crawler/http_cache.db',         # HTTP缓存数据库路径
+    'http_cache_ttl': 86400,                                  # normal模式下缓存有效期(秒)
+    'link_graph_dir': 'data/crawler/graph',                   # 链接图存储目录
+    'max_links_per_page': 50,                                 # 每个页面最多加入队列的新链接数
+    'frontier_backend': os.getenv('FRONTIER_BACKEND', 'sqlite'),  # URL前沿后端: sqlite/redis
+    'frontier_name': os.getenv('FRONTIER_NAME', 'url_frontier'),  # Redis前沿名称，同名爬虫共享队列
+    'keyword_idf_path': 'data/indexer',                       # 关键词提取使用的IDF表所在索引目录（不存在时按词频）
 }
 
 # 金融网站种子URL
@@ -150,7 +158,8 @@ FINANCIAL_SEED_URLS = [
 INDEXER_CONFIG = {
     'batch_size': 1000,    # 批处理大小
     'flush_interval': 300, # 刷新间隔(秒)
-    'max_memory_mb': 512   # 最大内存使用量(MB)
+    'max_memory_mb': 512,  # 最大内存使用量(MB)
+    'tokenize_workers': int(os.getenv('TOKENIZE_WORKERS', 1)),  # 构建索引时的分词进程数，0表示使用全部CPU
 }
 
 # 搜索引擎配置
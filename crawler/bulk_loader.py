@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+爬取数据批量导入/导出工具
+
+将 crawled_data_*.json（JSON数组）或 JSONL 格式的爬取结果流式导入到 crawler.db 的
+pages 表，或者反向导出。导入时先批量写入无索引的暂存表，再用一条 INSERT ... SELECT
+按URL去重（同一URL保留最后一条）写入pages表，最后补建索引。
+
+示例用法:
+  python -m crawler.bulk_loader import data/crawler/crawled_data_1754581490.json
+  python -m crawler.bulk_loader export data/crawler/pages.jsonl
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+from urllib.parse import urlparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PAGE_COLUMNS = ('url', 'title', 'content', 'keywords', 'domain', 'crawl_time')
+
+
+def _iter_json_array(f: TextIO, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """逐个解析顶层JSON数组中的元素，内存占用只与单个元素大小相关"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # 跳过空白、逗号以及数组起始符
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        if pos >= len(buf):
+            return
+        if not started:
+            if buf[pos] != '[':
+                raise ValueError("JSON dump must be a top-level array")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == ']':
+            return
+
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+            if end == len(buf) and not eof:
+                raise json.JSONDecodeError("Incomplete element", buf, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        yield obj
+        pos = end
+        if pos >= chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+def iter_dump_records(path: str) -> Iterator[Dict]:
+    """
+    流式读取爬取结果文件
+
+    Args:
+        path: JSON数组或JSONL文件路径，根据首个非空白字符自动识别
+
+    Yields:
+        页面记录字典
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        first = ''
+        while True:
+            ch = f.read(1)
+            if not ch or not ch.isspace():
+                first = ch
+                break
+        f.seek(0)
+
+        if first == '[':
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _record_to_row(record: Dict) -> tuple:
+    """将页面记录转换为pages表的一行"""
+    url = record['url']
+    keywords = record.get('keywords') or []
+    if isinstance(keywords, list):
+        keywords = ','.join(keywords)
+    return (
+        url,
+        record.get('title'),
+        record.get('content'),
+        keywords,
+        record.get('domain') or urlparse(url).netloc,
+        record.get('crawl_time')
+    )
+
+
+class BulkLoader:
+    """pages表批量导入导出器"""
+
+    def __init__(self, db_path: str = "data/crawler/crawler.db", batch_size: int = 5000):
+        """
+        初始化批量导入器
+
+        Args:
+            db_path: 爬虫数据库路径
+            batch_size: 每次executemany写入的行数
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建适合批量写入的数据库连接"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('PRAGMA cache_size=-262144')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        """创建pages表（与BatchCrawler一致，唯一约束改为导入后建立的唯一索引）"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                title TEXT,
+                content TEXT,
+                keywords TEXT,
+                domain TEXT,
+                crawl_time REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('DROP TABLE IF EXISTS pages_import')
+        conn.execute('''
+            CREATE TABLE pages_import (
+                url TEXT, title TEXT, content TEXT, keywords TEXT, domain TEXT, crawl_time REAL
+            )
+        ''')
+
+    def _build_indexes(self, conn: sqlite3.Connection):
+        """导入完成后建立索引"""
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_pages_url ON pages(url)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_crawl_time ON pages(crawl_time)')
+
+    def import_dumps(self, paths: List[str]) -> Dict[str, Any]:
+        """
+        导入一个或多个爬取结果文件
+
+        Args:
+            paths: 文件路径列表
+
+        Returns:
+            导入统计信息
+        """
+        start_time = time.time()
+        stats = {'records_read': 0, 'records_skipped': 0, 'pages_written': 0}
+
+        conn = self._connect()
+        try:
+            self._ensure_schema(conn)
+            pages_before = conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+            # 第一步：所有记录批量写入无索引的暂存表
+            conn.execute('BEGIN')
+            batch = []
+            for path in paths:
+                logger.info(f"Importing {path}")
+                for record in iter_dump_records(path):
+                    stats['records_read'] += 1
+                    if not isinstance(record, dict) or not record.get('url'):
+                        stats['records_skipped'] += 1
+                        continue
+                    batch.append(_record_to_row(record))
+                    if len(batch) >= self.batch_size:
+                        conn.executemany('INSERT INTO pages_import VALUES (?, ?, ?, ?, ?, ?)', batch)
+                        batch.clear()
+            if batch:
+                conn.executemany('INSERT INTO pages_import VALUES (?, ?, ?, ?, ?, ?)', batch)
+
+            # 第二步：按URL去重（保留最后一条）后写入pages表，已存在的URL被替换
+            conn.execute('''
+                INSERT OR REPLACE INTO pages (url, title, content, keywords, domain, crawl_time)
+                SELECT url, title, content, keywords, domain, crawl_time
+                FROM pages_import
+                WHERE rowid IN (SELECT MAX(rowid) FROM pages_import GROUP BY url)
+                ORDER BY rowid
+            ''')
+            stats['pages_written'] = conn.execute('SELECT changes()').fetchone()[0]
+            conn.execute('DROP TABLE pages_import')
+            conn.commit()
+
+            # 第三步：建立索引
+            self._build_indexes(conn)
+            conn.commit()
+
+            stats['pages_total'] = conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+            stats['pages_added'] = stats['pages_total'] - pages_before
+        finally:
+            conn.close()
+
+        stats['processing_time'] = time.time() - start_time
+        logger.info(f"Import finished: {stats}")
+        return stats
+
+    def export_dump(self, path: str, min_crawl_time: Optional[float] = None) -> int:
+        """
+        将pages表流式导出为JSON数组（.json）或JSONL（其他扩展名）
+
+        Args:
+            path: 输出文件路径
+            min_crawl_time: 只导出该时间之后爬取的页面
+
+        Returns:
+            导出的页面数量
+        """
+        as_array = path.endswith('.json')
+        query = f"SELECT {', '.join(PAGE_COLUMNS)} FROM pages"
+        params: tuple = ()
+        if min_crawl_time is not None:
+            query += " WHERE crawl_time > ?"
+            params = (min_crawl_time,)
+        query += " ORDER BY id"
+
+        count = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(query, params)
+            with open(path, 'w', encoding='utf-8') as f:
+                if as_array:
+                    f.write('[\n')
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    lines = []
+                    for url, title, content, keywords, domain, crawl_time in rows:
+                        lines.append(json.dumps({
+                            'url': url,
+                            'title': title,
+                            'content': content,
+                            'keywords': keywords.split(',') if keywords else [],
+                            'crawl_time': crawl_time,
+                            'domain': domain
+                        }, ensure_ascii=False))
+                    if as_array:
+                        f.write((',\n' if count else '') + ',\n'.join(lines))
+                    else:
+                        f.write('\n'.join(lines) + '\n')
+                    count += len(rows)
+                if as_array:
+                    f.write('\n]\n')
+        finally:
+            conn.close()
+
+        logger.info(f"Exported {count} pages to {path}")
+        return count
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='爬取数据批量导入/导出工具')
+    parser.add_argument('--db', default='data/crawler/crawler.db', help='爬虫数据库路径')
+    parser.add_argument('--batch-size', type=int, default=5000, help='每批写入行数')
+    subparsers = parser.add_subparsers(dest='command', help='可用命令')
+
+    import_parser = subparsers.add_parser('import', help='导入JSON/JSONL文件（支持通配符）')
+    import_parser.add_argument('paths', nargs='+', help='文件路径')
+
+    export_parser = subparsers.add_parser('export', help='导出为JSON（.json）或JSONL文件')
+    export_parser.add_argument('path', help='输出文件路径')
+    export_parser.add_argument('--since', type=float, help='只导出该时间戳之后爬取的页面')
+
+    args = parser.parse_args()
+    loader = BulkLoader(db_path=args.db, batch_size=args.batch_size)
+
+    if args.command == 'import':
+        paths = sorted(p for pattern in args.paths for p in (glob.glob(pattern) or [pattern]))
+        stats = loader.import_dumps(paths)
+        print(f"导入完成: 读取 {stats['records_read']} 条, 新增 {stats['pages_added']} 页, "
+              f"共 {stats['pages_total']} 页 (耗时: {stats['processing_time']:.2f}秒)")
+    elif args.command == 'export':
+        count = loader.export_dump(args.path, min_crawl_time=args.since)
+        print(f"导出完成: {count} 页 -> {args.path}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
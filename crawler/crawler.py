@@ -4,15 +4,19 @@ import time
 import logging
 import sqlite3
 import threading
-from typing import List, Dict, Set, Optional, Tuple, Any, Generic, TypeVar
+from typing import List, Dict, Set, Optional, Tuple, Any, Generic, TypeVar, Union
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 import os
 from collections import deque
 import json
 
-from config.settings import CRAWLER_CONFIG, FINANCIAL_SEED_URLS
+from config.settings import CRAWLER_CONFIG, FINANCIAL_SEED_URLS, REDIS_URI
 from utils.text_processor import TextProcessor
+from utils.content_extractor import HtmlDocument
+from utils.link_graph import LinkGraphWriter
+from indexer.idf import IdfTable
+from .http_cache import HttpCache
+from .frontier import FrontierBackend, SQLiteFrontierBackend, create_frontier_backend
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,52 +25,39 @@ T = TypeVar('T')
 
 class SmartQueue(Generic[T]):
     """
-    智能队列类，可以将数据自动卸载到数据库，需要时再读取出来
+    智能队列类，可以将数据自动卸载到存储后端，需要时再读取出来
     内存中的队列元素适中保持在合适数量，不至于内存溢出
     使用先进先出（FIFO）顺序
+
+    存储后端默认为本地SQLite；使用共享后端（如Redis）时，入队直接写入后端，
+    内存中只缓存从后端预取（租约中）的元素，多台机器可以共享同一个队列。
     """
     
-    def __init__(self, max_memory_size: int = 300, db_path: str = "data/crawler/smart_queue.db"):
+    def __init__(self, max_memory_size: int = 300, db_path: str = "data/crawler/smart_queue.db",
+                 backend: Optional[FrontierBackend] = None):
         """
         初始化智能队列
         
         Args:
             max_memory_size: 内存中最大元素数量
-            db_path: 数据库文件路径
+            db_path: 数据库文件路径（未指定backend时使用）
+            backend: 存储后端，默认为SQLiteFrontierBackend(db_path)
         """
         self.max_memory_size = max_memory_size
         self.db_path = db_path
         self.memory_queue: deque = deque()
-        self.offload_size = max_memory_size // 2
+        self.offload_size = max(max_memory_size // 2, 1)
         self.offload_queue: deque = deque()
         self.lock = threading.Lock()
         
-        # 创建数据目录和数据库
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self._init_database()
+        if backend is None:
+            # 创建数据目录和数据库
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            backend = SQLiteFrontierBackend(db_path)
+        self.backend = backend
         
-        logger.info(f"SmartQueue initialized with max_memory_size={max_memory_size}")
-    
-    def _init_database(self):
-        """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 创建队列数据表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS smart_queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # 初始化时清空数据库
-        cursor.execute('DELETE FROM smart_queue')
-        
-        conn.commit()
-        conn.close()
-        logger.info("SmartQueue database initialized")
+        logger.info(f"SmartQueue initialized with max_memory_size={max_memory_size}, "
+                    f"backend={type(backend).__name__}")
     
     def put(self, item: T) -> None:
         """
@@ -75,44 +66,86 @@ class SmartQueue(Generic[T]):
         Args:
             item: 要添加的元素
         """
+        self.put_many([item])
+    
+    def put_many(self, items: List[T]) -> None:
+        """
+        批量将元素添加到队列
+        
+        Args:
+            items: 要添加的元素列表
+        """
+        now = time.time()
         with self.lock:
-            # 如果内存队列已满，将数据存入offload_queue
-            if len(self.memory_queue) >= self.max_memory_size:
-                # 如果offload_queue未满，将数据存入offload_queue
-                if len(self.offload_queue) > self.offload_size:
-                    self._move_to_database()
-                    print('offload to database')
-                self.offload_queue.append((item, time.time()))
-                logger.debug(f"Added item to offload queue, current size: {len(self.offload_queue)}")
-            else:
-                # 将新元素添加到内存队列
-                self.memory_queue.append((item, time.time()))
-                logger.debug(f"Added item to memory queue, current size: {len(self.memory_queue)}")
+            if self.backend.shared:
+                # 共享后端：直接写入，其他机器可以立即取到
+                self.backend.push([(item, now) for item in items])
+                return
+            
+            for item in items:
+                # 如果内存队列已满，将数据存入offload_queue
+                if len(self.memory_queue) >= self.max_memory_size:
+                    # 如果offload_queue已满，将数据卸载到后端
+                    if len(self.offload_queue) > self.offload_size:
+                        self._move_to_backend()
+                    self.offload_queue.append((item, now))
+                    logger.debug(f"Added item to offload queue, current size: {len(self.offload_queue)}")
+                else:
+                    # 将新元素添加到内存队列
+                    self.memory_queue.append((item, now))
+                    logger.debug(f"Added item to memory queue, current size: {len(self.memory_queue)}")
     
     def get(self) -> Optional[T]:
         """
         从队列中获取元素（先进先出）
         
         Returns:
-            队列中的元素，如果队列为空则返回None
+            队列中的元素，如果队列为空则返回None；共享后端中的主机都还在调度间隔内时
+            也返回None，此时size()仍大于0
+
+        共享后端取出的元素带租约，处理完成（或确定失败）后调用ack()，
+        未确认的元素在租约超时后重新入队
         """
         with self.lock:
-            # 首先从内存队列中获取（FIFO）
-            if self.memory_queue:
-                item, timestamp = self.memory_queue.popleft()
-                logger.debug(f"Retrieved item from memory queue, remaining: {len(self.memory_queue)}")
-                return item
+            if not self.memory_queue:
+                self._refill_memory_queue()
             
-            # 如果内存队列为空，从数据库加载
-            items = self._load_from_database()
-            logger.info('loaded {} items from database'.format(len(items)))
-            if items:
-                logger.debug("Retrieved items from database")
-                self.memory_queue.extend(items)
-                logger.info('after extend, memory queue size: {}'.format(len(self.memory_queue)))
-                item, timestamp = self.memory_queue.popleft()
-                return item
-            return None
+            if not self.memory_queue:
+                return None
+            
+            item, timestamp = self.memory_queue.popleft()
+            logger.debug(f"Retrieved item from memory queue, remaining: {len(self.memory_queue)}")
+            return item
+    
+    def ack(self, item: T) -> None:
+        """
+        确认get()取出的元素已处理完成，释放其租约
+        
+        Args:
+            item: 已处理的元素
+        """
+        self.ack_many([item])
+    
+    def ack_many(self, items: List[T]) -> None:
+        """
+        批量确认元素已处理完成
+        
+        Args:
+            items: 已处理的元素列表
+        """
+        if items:
+            self.backend.ack(items)
+    
+    def _refill_memory_queue(self) -> None:
+        """内存队列为空时，先从后端加载（更早入队），后端为空再取offload_queue中的元素"""
+        items = self.backend.pop(self.offload_size)
+        if items:
+            logger.debug(f"Loaded {len(items)} items from backend")
+            self.memory_queue.extend(items)
+            return
+        
+        while self.offload_queue and len(self.memory_queue) < self.max_memory_size:
+            self.memory_queue.append(self.offload_queue.popleft())
     
     def peek(self) -> Optional[T]:
         """
@@ -127,20 +160,21 @@ class SmartQueue(Generic[T]):
                 item, timestamp = self.memory_queue[0]
                 return item
             
-            # 如果内存队列为空，从数据库查看
-            return self._peek_from_database()
+            # 然后查看后端
+            item = self.backend.peek()
+            if item is None and self.offload_queue:
+                item, timestamp = self.offload_queue[0]
+            return item
     
     def size(self) -> int:
         """
-        获取队列总大小（内存 + 数据库）
+        获取队列总大小（内存 + 后端）
         
         Returns:
             队列中的总元素数量
         """
         with self.lock:
-            memory_size = len(self.memory_queue)
-            db_size = self._get_database_size()
-            return memory_size + db_size
+            return len(self.memory_queue) + len(self.offload_queue) + self.backend.size()
     
     def memory_size(self) -> int:
         """
@@ -153,144 +187,23 @@ class SmartQueue(Generic[T]):
             return len(self.memory_queue)
     
     def clear(self) -> None:
-        """清空队列（内存和数据库）"""
+        """清空队列（内存和后端）"""
         with self.lock:
             self.memory_queue.clear()
-            self._clear_database()
+            self.offload_queue.clear()
+            self.backend.clear()
             logger.info("SmartQueue cleared")
     
-    def _move_to_database(self) -> None:
-        """将内存队列中最旧的数据移动到数据库"""
+    def _move_to_backend(self) -> None:
+        """将offload_queue中的数据卸载到后端"""
         if not self.offload_queue:
             return
         
-        # 将offload_queue中的数据移动到内存队列
-        to_offload = []
-        while self.offload_queue:
-            oldest_item, timestamp = self.offload_queue.popleft()
-            to_offload.append((oldest_item, timestamp))
+        to_offload = list(self.offload_queue)
+        self.offload_queue.clear()
         
-        # 保存到数据库
-        self._save_to_database(to_offload)
-        logger.info("Moved {} items from memory to database".format(len(to_offload)))    
-    
-    def _save_to_database(self, items: List[Tuple[T, float]]) -> None:
-        """将元素保存到数据库"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            data_jsons = []
-            # 将对象序列化为JSON字符串
-            for item, timestamp in items:
-                if isinstance(item, (dict, list, str, int, float, bool)):
-                    data_json = json.dumps(item, ensure_ascii=False)
-                    data_jsons.append((data_json, timestamp))
-
-            #批量插入
-            cursor.executemany('''
-                INSERT INTO smart_queue (data, created_at)
-                VALUES (?, ?)
-            ''', [(data_json, timestamp) for data_json, timestamp in data_jsons])
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            logger.error(f"Error saving item to database: {e}")
-    
-    #批量加载数据库中的元素
-    def _load_from_database(self) -> Optional[List[Tuple[T, float]]]:
-        """从数据库加载元素（FIFO）"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 按创建时间排序获取最早的元素
-            cursor.execute('''
-                SELECT data, id FROM smart_queue 
-                ORDER BY created_at ASC 
-                LIMIT ?
-            ''', (self.offload_size,))
-            
-            results = cursor.fetchall()
-            if results:
-                res_with_timestamp = [(result[0], result[1]) for result in results]
-                
-                # 删除已读取的元素
-                cursor.executemany('DELETE FROM smart_queue WHERE id = ?', [(result[1],) for result in results])
-                conn.commit()
-                
-                # 反序列化数据
-                try:
-                    items = [(json.loads(data_json), timestamp) for data_json, timestamp in res_with_timestamp]
-                    conn.close()
-                    return items
-                except json.JSONDecodeError:
-                    logger.error(f"Error deserializing items from database: {res_with_timestamp}")
-                    conn.close()
-                    return None
-            
-            conn.close()
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error loading item from database: {e}")
-            return None
-    
-    def _peek_from_database(self) -> Optional[T]:
-        """从数据库查看元素但不删除（FIFO）"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT data FROM smart_queue 
-                ORDER BY created_at ASC 
-                LIMIT 1
-            ''')
-            
-            result = cursor.fetchone()
-            if result:
-                data_json = result[0]
-                try:
-                    item = json.loads(data_json)
-                    conn.close()
-                    return item
-                except json.JSONDecodeError:
-                    logger.error(f"Error deserializing item from database: {data_json}")
-                    conn.close()
-                    return None
-            
-            conn.close()
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error peeking item from database: {e}")
-            return None
-    
-    def _get_database_size(self) -> int:
-        """获取数据库中的元素数量"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM smart_queue')
-            count = cursor.fetchone()[0]
-            conn.close()
-            return count
-        except Exception as e:
-            logger.error(f"Error getting database size: {e}")
-            return 0
-    
-    def _clear_database(self) -> None:
-        """清空数据库"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM smart_queue')
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error clearing database: {e}")
+        self.backend.push(to_offload)
+        logger.info("Moved {} items from memory to backend".format(len(to_offload)))
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -300,15 +213,15 @@ class SmartQueue(Generic[T]):
             包含队列统计信息的字典
         """
         with self.lock:
-            memory_size = len(self.memory_queue)
-            db_size = self._get_database_size()
+            memory_size = len(self.memory_queue) + len(self.offload_queue)
+            db_size = self.backend.size()
             
             return {
                 'memory_size': memory_size,
                 'database_size': db_size,
                 'total_size': memory_size + db_size,
                 'max_memory_size': self.max_memory_size,
-                'memory_usage_percent': (memory_size / self.max_memory_size) * 100 if self.max_memory_size > 0 else 0
+                'memory_usage_percent': (len(self.memory_queue) / self.max_memory_size) * 100 if self.max_memory_size > 0 else 0
             }
     
     def __len__(self) -> int:
@@ -323,19 +236,41 @@ class SmartQueue(Generic[T]):
 class BatchCrawler:
     """批量处理爬虫"""
     
-    def __init__(self, batch_size: int = 8):
+    def __init__(self, batch_size: int = 8, cache_mode: Optional[str] = None):
         self.config = CRAWLER_CONFIG
         self.text_processor = TextProcessor()
+        # 已有索引时按语料IDF提取关键词，过滤高频常用词
+        self.keyword_idf = IdfTable.load(self.config.get('keyword_idf_path', 'data/indexer'))
         self.batch_size = batch_size
+        # HTTP响应缓存，cache_mode为None时使用配置中的模式
+        self.http_cache = HttpCache(
+            db_path=self.config['http_cache_path'],
+            mode=cache_mode or self.config['http_cache_mode'],
+            ttl=self.config['http_cache_ttl']
+        )
+        # 链接图采集器，记录每个页面的全部出链
+        self.link_graph = LinkGraphWriter(self.config['link_graph_dir'])
         self.visited_urls: Set[str] = set()
         # 使用SmartQueue替代原来的asyncio.Queue
-        self.url_queue: SmartQueue[str] = SmartQueue(max_memory_size=300, db_path="data/crawler/url_queue.db")
+        self.url_queue: SmartQueue[str] = SmartQueue(max_memory_size=300, backend=self._create_frontier_backend())
         self.db_path = "data/crawler/crawler.db"
         
         # 创建数据目录和数据库
         os.makedirs('data/crawler', exist_ok=True)
         self._init_database()
     
+    def _create_frontier_backend(self) -> FrontierBackend:
+        """根据配置创建URL前沿后端"""
+        if self.config['frontier_backend'] == 'redis':
+            return create_frontier_backend(
+                'redis',
+                redis_uri=REDIS_URI,
+                name=self.config['frontier_name'],
+                host_delay=self.config['request_delay']
+            )
+        os.makedirs('data/crawler', exist_ok=True)
+        return create_frontier_backend('sqlite', db_path="data/crawler/url_queue.db")
+    
     def _init_database(self):
         """初始化SQLite数据库"""
         conn = sqlite3.connect(self.db_path)
@@ -384,8 +319,7 @@ class BatchCrawler:
         logger.info(f"Starting batch crawler with batch_size={self.batch_size}")
         
         # 初始化URL队列
-        for url in FINANCIAL_SEED_URLS:
-            self.url_queue.put(url)
+        self.url_queue.put_many(FINANCIAL_SEED_URLS)
         
         # 加载已访问的URL
         self._load_visited_urls()
@@ -397,6 +331,11 @@ class BatchCrawler:
             batch_urls = await self._get_batch_urls()
             logger.info('get batch urls: {}'.format(batch_urls))
             if not batch_urls:
+                if self.url_queue.size() > 0:
+                    # 共享前沿中还有URL，但所属主机都还在调度间隔内，等待后重试
+                    logger.info("All queued hosts are waiting for their crawl delay, retrying")
+                    await asyncio.sleep(self.config['request_delay'])
+                    continue
                 logger.info("No more URLs to process")
                 break
             
@@ -406,13 +345,20 @@ class BatchCrawler:
             # 串行处理结果
             await self._process_batch_results(batch_results)
             
+            # 处理完成（包括确定失败的URL）后才确认，中途崩溃的URL在租约超时后重新抓取
+            self.url_queue.ack_many(batch_urls)
+            
             processed_pages += len([r for r in batch_results if r is not None])
             logger.info(f"Processed {processed_pages}/{max_pages} pages")
             
-            # 添加延迟
-            await asyncio.sleep(self.config['request_delay'])
+            # 添加延迟（replay模式不访问网络，无需限速）
+            if self.http_cache.mode != 'replay':
+                await asyncio.sleep(self.config['request_delay'])
         
+        self.link_graph.close()
         logger.info(f"Crawler finished. Processed {processed_pages} pages.")
+        if self.http_cache.mode != 'off':
+            logger.info(f"HTTP cache stats: {self.http_cache.get_stats()}")
     
     def _load_visited_urls(self):
         """从数据库加载已访问的URL"""
@@ -433,6 +379,8 @@ class BatchCrawler:
                 break
             if url not in self.visited_urls:
                 urls.append(url)
+            else:
+                self.url_queue.ack(url)
         return urls
     
     async def _crawl_batch(self, urls: List[str]) -> List[Optional[Dict]]:
@@ -478,23 +426,33 @@ class BatchCrawler:
         try:
             # logger.info(f"Crawling: {url}")
             
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.warning(f"Failed to crawl {url}: status {response.status}")
-                    self._record_failed_url(url)
-                    return None
-                
-                content = await response.text()
-                
-                # 解析页面
-                page_data = await self._parse_page(url, content)
-                
-                if page_data:
-                    # 提取新链接
-                    new_urls = self._extract_links(content, url)
-                    page_data['new_urls'] = new_urls
-                
-                return page_data
+            response = await self.http_cache.fetch(session, url)
+            if response is None:
+                # replay模式下缓存未命中
+                return None
+            
+            if response.status != 200:
+                logger.warning(f"Failed to crawl {url}: status {response.status}")
+                self._record_failed_url(url)
+                return None
+            
+            content = response.text()
+            
+            # 只解析一次HTML，标题、正文和链接都基于同一棵文档树提取
+            doc = self.text_processor.parse_html(content)
+            if doc is None:
+                return None
+            
+            # 解析页面
+            page_data = await self._parse_page(url, doc)
+            
+            if page_data:
+                # 提取新链接，全部出链用于链接图，只有前若干个加入队列
+                outlinks = self._extract_links(doc, url)
+                page_data['outlinks'] = outlinks
+                page_data['new_urls'] = outlinks[:self.config['max_links_per_page']]
+            
+            return page_data
                 
         except Exception as e:
             logger.error(f"Error crawling {url}: {e}")
@@ -512,15 +470,18 @@ class BatchCrawler:
             # 更新已访问URL集合
             self.visited_urls.add(result['url'])
             
+            # 记录链接图
+            self.link_graph.add_page(result['url'], result.get('outlinks', []))
+            
             # 添加新URL到队列
             new_urls = result.get('new_urls', [])
-            for new_url in new_urls:
-                if new_url not in self.visited_urls:
-                    self.url_queue.put(new_url)
+            self.url_queue.put_many([new_url for new_url in new_urls if new_url not in self.visited_urls])
             
             # 打印队列统计信息
             stats = self.url_queue.get_stats()
             logger.error(f"Queue stats: memory={stats['memory_size']}, db={stats['database_size']}, total={stats['total_size']}")
+        
+        self.link_graph.flush()
     
     def _save_to_database(self, page_data: Dict):
         """保存页面数据到数据库"""
@@ -550,7 +511,7 @@ class BatchCrawler:
         except Exception as e:
             logger.error(f"Error saving to database: {e}")
     
-    async def _parse_page(self, url: str, html_content: str) -> Optional[Dict]:
+    async def _parse_page(self, url: str, html_content: Union[str, HtmlDocument]) -> Optional[Dict]:
         """解析页面内容"""
         try:
             # 提取标题和内容
@@ -562,7 +523,7 @@ class BatchCrawler:
                 return None
             
             # 提取关键词
-            keywords = self.text_processor.extract_keywords(content, top_k=10)
+            keywords = self.text_processor.extract_keywords(content, top_k=10, idf=self.keyword_idf)
             
             # 构建页面数据
             page_data = {
@@ -650,21 +611,21 @@ class BatchCrawler:
         text = (title + ' ' + content).lower()
         return any(keyword.lower() in text for keyword in financial_keywords)
     
-    def _extract_links(self, html_content: str, base_url: str) -> List[str]:
-        """提取页面中的链接"""
+    def _extract_links(self, doc: Optional[HtmlDocument], base_url: str) -> List[str]:
+        """提取页面中的全部有效链接（按出现顺序去重）"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
             links = []
+            seen = set()
             
-            for link in soup.find_all('a', href=True):
-                href = link['href']
+            for href in self.text_processor.content_extractor.extract_links(doc):
                 full_url = urljoin(base_url, href)
                 
                 # 过滤链接
-                if self._is_valid_url(full_url):
+                if self._is_valid_url(full_url) and full_url not in seen:
+                    seen.add(full_url)
                     links.append(full_url)
 
-            return links[:50]  # 限制链接数量
+            return links
             
         except Exception as e:
             logger.error(f"Error extracting links: {e}")
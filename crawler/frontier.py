@@ -0,0 +1,412 @@
+"""
+爬虫URL前沿（frontier）存储后端
+
+SmartQueue 负责内存中的队列，超出内存的部分交给后端存储:
+- SQLiteFrontierBackend: 单进程使用的本地SQLite表（默认）
+- RedisFrontierBackend: 多台爬虫机器共享的Redis前沿，无需中心协调进程
+
+Redis后端的数据结构（均以 frontier:<name> 为前缀）:
+- :hosts        有序集合，有待抓取URL的主机 -> 下次可调度时间，按主机轮转取URL
+- :next         哈希，队列已取空的主机 -> 下次可调度时间，该主机再次入队时从这个时间开始调度
+- :q:<host>     有序集合，该主机的待抓取元素 -> 入队序号（FIFO）
+- :seen         位图实现的Bloom过滤器，跨机器去重
+- :leases       有序集合，已取出未确认的元素 -> 租约到期时间，到期后自动放回队列
+- :seq / :size  入队序号计数器 / 队列元素总数
+入队、出队（取出并加租约）都通过Lua脚本原子完成。出队只调度下次可调度时间已到的主机，
+同一主机两次取出之间至少间隔host_delay，所有主机都未到时间时返回空列表。
+出队脚本访问的主机队列键没有在KEYS中声明（取哪些主机在脚本执行时才确定），
+不能用于Redis Cluster，需要使用单个Redis实例（或主从）。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+def _serialize(item: Any) -> Optional[str]:
+    """将元素序列化为JSON字符串，不支持的类型返回None"""
+    if isinstance(item, (dict, list, str, int, float, bool)):
+        return json.dumps(item, ensure_ascii=False)
+    return None
+
+
+class FrontierBackend(ABC, Generic[T]):
+    """前沿存储后端接口"""
+
+    # 是否为多进程/多机器共享的后端；共享后端的入队会直接写入后端
+    shared = False
+
+    @abstractmethod
+    def push(self, items: List[Tuple[T, float]]) -> int:
+        """批量写入(元素, 入队时间)，返回实际写入的数量"""
+
+    @abstractmethod
+    def pop(self, count: int) -> List[Tuple[T, float]]:
+        """按FIFO取出最多count个元素"""
+
+    @abstractmethod
+    def peek(self) -> Optional[T]:
+        """查看下一个元素但不取出"""
+
+    @abstractmethod
+    def size(self) -> int:
+        """后端中的元素数量"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空后端"""
+
+    def ack(self, items: List[T]) -> None:
+        """确认元素已被消费（有租约的后端据此释放租约）"""
+
+    def close(self) -> None:
+        """释放后端资源"""
+
+
+class SQLiteFrontierBackend(FrontierBackend[T]):
+    """基于本地SQLite表的前沿后端"""
+
+    def __init__(self, db_path: str = "data/crawler/smart_queue.db"):
+        self.db_path = db_path
+        self._init_database()
+
+    def _init_database(self):
+        """初始化数据库表"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        # 创建队列数据表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS smart_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 初始化时清空数据库
+        cursor.execute('DELETE FROM smart_queue')
+
+        conn.commit()
+        conn.close()
+        logger.info("SmartQueue database initialized")
+
+    def push(self, items: List[Tuple[T, float]]) -> int:
+        """将元素批量保存到数据库"""
+        try:
+            data_jsons = []
+            for item, timestamp in items:
+                data_json = _serialize(item)
+                if data_json is not None:
+                    data_jsons.append((data_json, timestamp))
+
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO smart_queue (data, created_at)
+                VALUES (?, ?)
+            ''', data_jsons)
+            conn.commit()
+            conn.close()
+            return len(data_jsons)
+
+        except Exception as e:
+            logger.error(f"Error saving item to database: {e}")
+            return 0
+
+    def pop(self, count: int) -> List[Tuple[T, float]]:
+        """从数据库批量取出元素（FIFO）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            # 按入队顺序获取最早的元素
+            cursor.execute('''
+                SELECT data, created_at, id FROM smart_queue
+                ORDER BY id ASC
+                LIMIT ?
+            ''', (count,))
+            results = cursor.fetchall()
+
+            items = []
+            if results:
+                # 删除已读取的元素
+                cursor.executemany('DELETE FROM smart_queue WHERE id = ?', [(row[2],) for row in results])
+                conn.commit()
+                try:
+                    items = [(json.loads(data_json), created_at) for data_json, created_at, _ in results]
+                except json.JSONDecodeError:
+                    logger.error(f"Error deserializing items from database: {results}")
+                    items = []
+
+            conn.close()
+            return items
+
+        except Exception as e:
+            logger.error(f"Error loading item from database: {e}")
+            return []
+
+    def peek(self) -> Optional[T]:
+        """从数据库查看元素但不删除（FIFO）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT data FROM smart_queue ORDER BY id ASC LIMIT 1')
+            result = cursor.fetchone()
+            conn.close()
+            return json.loads(result[0]) if result else None
+
+        except Exception as e:
+            logger.error(f"Error peeking item from database: {e}")
+            return None
+
+    def size(self) -> int:
+        """获取数据库中的元素数量"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM smart_queue')
+            count = cursor.fetchone()[0]
+            conn.close()
+            return count
+        except Exception as e:
+            logger.error(f"Error getting database size: {e}")
+            return 0
+
+    def clear(self) -> None:
+        """清空数据库"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM smart_queue')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error clearing database: {e}")
+
+
+# 入队: 检查Bloom位，未见过则置位并加入主机队列，
+# 主机不在调度集合中时按max(now, 记录的下次可调度时间)加入
+# KEYS: seen, hosts, host_queue, seq, size, next
+# ARGV: member, host, now, dedupe(0/1), bit offsets...
+_PUSH_SCRIPT = """
+if ARGV[4] == '1' then
+    local seen = 1
+    for i = 5, #ARGV do
+        if redis.call('GETBIT', KEYS[1], ARGV[i]) == 0 then
+            seen = 0
+            break
+        end
+    end
+    if seen == 1 then
+        return 0
+    end
+    for i = 5, #ARGV do
+        redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+    end
+end
+local seq = redis.call('INCR', KEYS[4])
+redis.call('ZADD', KEYS[3], seq, ARGV[1])
+if not redis.call('ZSCORE', KEYS[2], ARGV[2]) then
+    local due = tonumber(ARGV[3])
+    local next_time = tonumber(redis.call('HGET', KEYS[6], ARGV[2]))
+    if next_time and next_time > due then
+        due = next_time
+    end
+    redis.call('ZADD', KEYS[2], due, ARGV[2])
+    redis.call('HDEL', KEYS[6], ARGV[2])
+end
+redis.call('INCR', KEYS[5])
+return 1
+"""
+
+# 出队: 先把过期租约放回队列，再按主机轮转从已到调度时间的主机取出元素并加租约，
+# 每取一个元素该主机的下次可调度时间推后host_delay，没有可调度的主机时提前结束；
+# 主机队列取空时把下次可调度时间记入next哈希，供再次入队时使用
+# KEYS: hosts, leases, size, next
+# ARGV: now, count, host_delay, lease_timeout, queue key prefix
+# 主机队列键（prefix .. host）在脚本中拼出，没有在KEYS中声明，因此不支持Redis Cluster
+_LEASE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local count = tonumber(ARGV[2])
+local delay = tonumber(ARGV[3])
+local expires = now + tonumber(ARGV[4])
+local prefix = ARGV[5]
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, 1000)
+for _, lease in ipairs(expired) do
+    local sep = string.find(lease, '\\t', 1, true)
+    local host = string.sub(lease, 1, sep - 1)
+    redis.call('ZADD', prefix .. host, 0, string.sub(lease, sep + 1))
+    if not redis.call('ZSCORE', KEYS[1], host) then
+        local due = tonumber(redis.call('HGET', KEYS[4], host)) or now
+        redis.call('ZADD', KEYS[1], math.max(due, now), host)
+        redis.call('HDEL', KEYS[4], host)
+    end
+    redis.call('ZREM', KEYS[2], lease)
+    redis.call('INCR', KEYS[3])
+end
+
+local result = {}
+while #result < count do
+    local head = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, 1)
+    if #head == 0 then
+        break
+    end
+    local host = head[1]
+    local queue = prefix .. host
+    local popped = redis.call('ZPOPMIN', queue)
+    if #popped > 0 then
+        table.insert(result, popped[1])
+        redis.call('ZADD', KEYS[2], expires, host .. '\\t' .. popped[1])
+        redis.call('DECR', KEYS[3])
+    end
+    if redis.call('ZCARD', queue) == 0 then
+        redis.call('ZREM', KEYS[1], host)
+        redis.call('HSET', KEYS[4], host, now + delay)
+    else
+        redis.call('ZADD', KEYS[1], now + delay, host)
+    end
+end
+return result
+"""
+
+
+class RedisFrontierBackend(FrontierBackend[T]):
+    """基于Redis的共享前沿后端"""
+
+    shared = True
+
+    def __init__(self, redis_uri: str = "redis://localhost:6379/0", name: str = "url_frontier",
+                 client: Any = None, dedupe: bool = True, bloom_bits: int = 1 << 27,
+                 bloom_hashes: int = 7, host_delay: float = 1.0, lease_timeout: float = 600):
+        """
+        初始化Redis前沿后端
+
+        Args:
+            redis_uri: Redis连接地址
+            name: 前沿名称，多台机器使用同一名称即共享同一前沿
+            client: 已创建的Redis客户端（测试时可传入fakeredis）
+            dedupe: 是否用Bloom过滤器对入队元素去重
+            bloom_bits: Bloom过滤器位数
+            bloom_hashes: Bloom过滤器哈希函数个数
+            host_delay: 同一主机两次调度之间的间隔（秒）
+            lease_timeout: 租约超时时间（秒），超时未确认的元素重新入队
+        """
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(redis_uri)
+
+        self.redis = client
+        self.prefix = f"frontier:{name}"
+        self.dedupe = dedupe
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self.host_delay = host_delay
+        self.lease_timeout = lease_timeout
+
+        self.keys = {
+            'hosts': f"{self.prefix}:hosts",
+            'next': f"{self.prefix}:next",
+            'leases': f"{self.prefix}:leases",
+            'seen': f"{self.prefix}:seen",
+            'seq': f"{self.prefix}:seq",
+            'size': f"{self.prefix}:size",
+        }
+        self.queue_prefix = f"{self.prefix}:q:"
+        self._push_script = self.redis.register_script(_PUSH_SCRIPT)
+        self._lease_script = self.redis.register_script(_LEASE_SCRIPT)
+
+        logger.info(f"RedisFrontierBackend initialized with name={name}")
+
+    def _bloom_offsets(self, member: str) -> List[int]:
+        """双重哈希计算Bloom过滤器的位偏移"""
+        digest = hashlib.blake2b(member.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bloom_bits for i in range(self.bloom_hashes)]
+
+    @staticmethod
+    def _host_of(item: Any) -> str:
+        """元素所属主机，非URL元素归入同一个空主机"""
+        if isinstance(item, str):
+            return urlparse(item).netloc.lower()
+        return ''
+
+    def push(self, items: List[Tuple[T, float]]) -> int:
+        """批量入队，已见过的元素被跳过"""
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        for item, _ in items:
+            member = _serialize(item)
+            if member is None:
+                continue
+            host = self._host_of(item)
+            self._push_script(
+                keys=[self.keys['seen'], self.keys['hosts'], self.queue_prefix + host,
+                      self.keys['seq'], self.keys['size'], self.keys['next']],
+                args=[member, host, now, '1' if self.dedupe else '0', *self._bloom_offsets(member)],
+                client=pipe
+            )
+        return sum(int(added) for added in pipe.execute())
+
+    def pop(self, count: int) -> List[Tuple[T, float]]:
+        """按主机轮转取出元素，取出的元素带租约，直到ack或超时"""
+        now = time.time()
+        members = self._lease_script(
+            keys=[self.keys['hosts'], self.keys['leases'], self.keys['size'], self.keys['next']],
+            args=[now, count, self.host_delay, self.lease_timeout, self.queue_prefix]
+        )
+        return [(json.loads(member), now) for member in members]
+
+    def ack(self, items: List[T]) -> None:
+        """确认元素已被消费，释放租约"""
+        leases = [f"{self._host_of(item)}\t{_serialize(item)}" for item in items]
+        if leases:
+            self.redis.zrem(self.keys['leases'], *leases)
+
+    def peek(self) -> Optional[T]:
+        """查看下一个将被调度的元素"""
+        head = self.redis.zrange(self.keys['hosts'], 0, 0)
+        if not head:
+            return None
+        host = head[0].decode('utf-8') if isinstance(head[0], bytes) else head[0]
+        members = self.redis.zrange(self.queue_prefix + host, 0, 0)
+        return json.loads(members[0]) if members else None
+
+    def size(self) -> int:
+        """队列中（不含租约中）的元素数量"""
+        return int(self.redis.get(self.keys['size']) or 0)
+
+    def clear(self) -> None:
+        """清空前沿（包括去重状态和租约）"""
+        keys = list(self.redis.scan_iter(match=f"{self.queue_prefix}*"))
+        keys.extend(self.keys.values())
+        self.redis.delete(*keys)
+
+    def close(self) -> None:
+        self.redis.close()
+
+
+def create_frontier_backend(kind: str = "sqlite", **kwargs) -> FrontierBackend:
+    """
+    根据名称创建前沿后端
+
+    Args:
+        kind: 'sqlite' 或 'redis'
+        kwargs: 传给对应后端构造函数的参数
+    """
+    if kind == 'sqlite':
+        return SQLiteFrontierBackend(**kwargs)
+    if kind == 'redis':
+        return RedisFrontierBackend(**kwargs)
+    raise ValueError(f"Unknown frontier backend: {kind}")
@@ -0,0 +1,237 @@
+"""
+爬虫HTTP响应缓存
+
+将HTTP响应（状态码、响应头、压缩后的响应体）按规范化URL保存到本地SQLite，
+用于离线、可复现地重跑解析和索引流程。
+
+缓存模式:
+- off: 不使用缓存，直接访问网络
+- normal: 缓存未过期（TTL内）时直接返回缓存，否则访问网络并写入缓存（只缓存成功的响应，
+  4xx/5xx不写入，临时错误不会在整个TTL内被重放）
+- record: 总是访问网络，并用最新响应覆盖缓存
+- replay: 只从缓存读取，不访问网络，未命中时返回None
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ('off', 'normal', 'record', 'replay')
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化URL，作为缓存键
+
+    小写scheme和host、去掉默认端口和fragment、对查询参数排序，
+    使同一资源的不同写法映射到同一个缓存条目。
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    netloc = host if port is None or _DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    path = parsed.path or '/'
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, path, parsed.params, query, ''))
+
+
+def is_cacheable_status(status: int) -> bool:
+    """normal模式下是否缓存该状态码的响应：2xx和3xx（重定向）缓存，4xx/5xx不缓存"""
+    return 200 <= status < 400
+
+
+@dataclass
+class CachedResponse:
+    """HTTP响应快照，网络响应和缓存响应使用同一结构"""
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b''
+    encoding: Optional[str] = None
+    fetched_at: float = 0.0
+    from_cache: bool = False
+
+    def text(self) -> str:
+        """按响应编码解码响应体"""
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class HttpCache:
+    """基于SQLite的HTTP响应缓存"""
+
+    def __init__(self, db_path: str = "data/crawler/http_cache.db", mode: str = 'normal',
+                 ttl: float = 86400, compression_level: int = 6):
+        """
+        初始化HTTP缓存
+
+        Args:
+            db_path: 缓存数据库路径
+            mode: 缓存模式，取值见CACHE_MODES
+            ttl: normal模式下缓存的有效期（秒）
+            compression_level: 响应体zlib压缩级别
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}, expected one of {CACHE_MODES}")
+
+        self.db_path = db_path
+        self.mode = mode
+        self.ttl = ttl
+        self.compression_level = compression_level
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'network_fetches': 0}
+
+        self.conn: Optional[sqlite3.Connection] = None
+        if mode != 'off':
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            self._init_database()
+
+        logger.info(f"HttpCache initialized with mode={mode}, ttl={ttl}")
+
+    def _init_database(self):
+        """初始化缓存表"""
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT,
+                encoding TEXT,
+                body BLOB,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """
+        查找缓存条目
+
+        normal模式下过期条目视为未命中，replay模式忽略TTL。
+
+        Returns:
+            缓存的响应，未命中时返回None
+        """
+        if self.conn is None:
+            return None
+
+        with self.lock:
+            row = self.conn.execute('''
+                SELECT url, status, headers, encoding, body, fetched_at
+                FROM http_cache WHERE url_key = ?
+            ''', (canonicalize_url(url),)).fetchone()
+
+        if row is None:
+            return None
+
+        cached_url, status, headers_json, encoding, body, fetched_at = row
+        if self.mode == 'normal' and time.time() - fetched_at > self.ttl:
+            return None
+
+        return CachedResponse(
+            url=cached_url,
+            status=status,
+            headers=json.loads(headers_json) if headers_json else {},
+            body=zlib.decompress(body) if body else b'',
+            encoding=encoding,
+            fetched_at=fetched_at,
+            from_cache=True
+        )
+
+    def store(self, response: CachedResponse) -> None:
+        """写入（或覆盖）缓存条目"""
+        if self.conn is None:
+            return
+
+        body = zlib.compress(response.body, self.compression_level) if response.body else b''
+        with self.lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO http_cache
+                (url_key, url, status, headers, encoding, body, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                canonicalize_url(response.url),
+                response.url,
+                response.status,
+                json.dumps(response.headers, ensure_ascii=False),
+                response.encoding,
+                body,
+                response.fetched_at
+            ))
+            self.conn.commit()
+        self.stats['stores'] += 1
+
+    async def fetch(self, session: Optional[aiohttp.ClientSession], url: str) -> Optional[CachedResponse]:
+        """
+        按缓存模式获取URL
+
+        Args:
+            session: aiohttp会话，replay模式下可以为None
+            url: 要获取的URL
+
+        Returns:
+            响应快照，replay模式未命中时返回None；网络异常向上抛出
+        """
+        if self.mode in ('normal', 'replay'):
+            cached = self.lookup(url)
+            if cached is not None:
+                self.stats['hits'] += 1
+                return cached
+            self.stats['misses'] += 1
+            if self.mode == 'replay':
+                logger.debug(f"Replay cache miss: {url}")
+                return None
+
+        response = await self._fetch_from_network(session, url)
+        if self.mode == 'record' or (self.mode == 'normal' and is_cacheable_status(response.status)):
+            self.store(response)
+        return response
+
+    async def _fetch_from_network(self, session: aiohttp.ClientSession, url: str) -> CachedResponse:
+        """访问网络并生成响应快照"""
+        self.stats['network_fetches'] += 1
+        async with session.get(url) as response:
+            body = await response.read()
+            try:
+                encoding = response.get_encoding()
+            except Exception:
+                encoding = 'utf-8'
+            return CachedResponse(
+                url=url,
+                status=response.status,
+                headers={key: value for key, value in response.headers.items()},
+                body=body,
+                encoding=encoding,
+                fetched_at=time.time()
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        entries = 0
+        if self.conn is not None:
+            with self.lock:
+                entries = self.conn.execute('SELECT COUNT(*) FROM http_cache').fetchone()[0]
+        return {'mode': self.mode, 'entries': entries, **self.stats}
+
+    def close(self) -> None:
+        """关闭缓存数据库连接"""
+        if self.conn is not None:
+            with self.lock:
+                self.conn.close()
+                self.conn = None
@@ -14,11 +14,13 @@ async def main():
                        help='Maximum number of pages to crawl')
     parser.add_argument('--batch-size', type=int, default=8,
                        help='Batch size for concurrent crawling')
+    parser.add_argument('--cache-mode', choices=['off', 'normal', 'record', 'replay'],
+                       help='HTTP cache mode (defaults to CRAWLER_CONFIG http_cache_mode)')
     
     args = parser.parse_args()
     
     # 创建批量爬虫实例
-    crawler = BatchCrawler(batch_size=args.batch_size)
+    crawler = BatchCrawler(batch_size=args.batch_size, cache_mode=args.cache_mode)
     
     try:
         # 启动爬虫
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+BulkLoader测试文件
+验证JSON/JSONL流式导入、按URL去重以及导出
+"""
+
+import io
+import json
+import os
+import sqlite3
+import tempfile
+
+from crawler.bulk_loader import BulkLoader, iter_dump_records, _iter_json_array
+
+
+def _make_records(n, prefix="https://a.com/"):
+    return [{
+        "url": f"{prefix}{i}",
+        "title": f"标题{i}",
+        "content": f"股票 投资 内容{i}",
+        "keywords": ["股票", "投资"],
+        "crawl_time": 1754581490.0 + i,
+        "domain": "a.com"
+    } for i in range(n)]
+
+
+def test_stream_json_array():
+    """测试小块读取时的流式数组解析"""
+    print("=== 测试流式JSON数组解析 ===")
+    records = _make_records(20)
+    text = json.dumps(records, ensure_ascii=False, indent=2)
+    parsed = list(_iter_json_array(io.StringIO(text), chunk_size=7))
+    assert parsed == records
+    assert list(_iter_json_array(io.StringIO("[]"))) == []
+
+
+def test_import_dedupe_and_export():
+    """测试导入去重与导出往返"""
+    print("\n=== 测试导入与导出 ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "crawled_data_1.json")
+        jsonl_path = os.path.join(tmp_dir, "crawled_data_2.jsonl")
+        db_path = os.path.join(tmp_dir, "crawler.db")
+
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(_make_records(10), f, ensure_ascii=False, indent=2)
+
+        # 第二个文件与第一个文件有5个URL重复，且内容更新
+        updated = _make_records(10)[5:]
+        for record in updated:
+            record["title"] += "(更新)"
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for record in updated + _make_records(3, prefix="https://b.com/"):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        loader = BulkLoader(db_path=db_path, batch_size=4)
+        stats = loader.import_dumps([json_path, jsonl_path])
+        print(f"导入统计: {stats}")
+        assert stats["records_read"] == 18
+        assert stats["pages_total"] == 13
+
+        conn = sqlite3.connect(db_path)
+        title = conn.execute("SELECT title FROM pages WHERE url = ?", ("https://a.com/7",)).fetchone()[0]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(pages)")}
+        conn.close()
+        assert title.endswith("(更新)")
+        assert "idx_pages_url" in indexes
+
+        # 再次导入同一文件不会产生重复页面
+        assert loader.import_dumps([json_path])["pages_total"] == 13
+
+        export_path = os.path.join(tmp_dir, "export.jsonl")
+        assert loader.export_dump(export_path) == 13
+        exported = list(iter_dump_records(export_path))
+        assert {r["url"] for r in exported} == {r["url"] for r in _make_records(10) + _make_records(3, "https://b.com/")}
+        assert exported[0]["keywords"] == ["股票", "投资"]
+
+
+if __name__ == "__main__":
+    test_stream_json_array()
+    test_import_dedupe_and_export()
+
+    print("\n=== 所有测试完成 ===")
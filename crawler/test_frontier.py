@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+前沿后端测试文件
+验证SQLite/Redis后端下SmartQueue的行为，Redis后端使用本地redis-server或fakeredis
+"""
+
+import os
+import tempfile
+import time
+
+from crawler import SmartQueue
+from crawler.frontier import RedisFrontierBackend, SQLiteFrontierBackend
+from config.settings import REDIS_URI
+
+
+def _get_redis_client():
+    """优先使用fakeredis，否则尝试连接本地Redis，都不可用时返回None"""
+    try:
+        import fakeredis
+        return fakeredis.FakeRedis()
+    except ImportError:
+        pass
+    try:
+        import redis
+        client = redis.Redis.from_url(REDIS_URI)
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+def _redis_backend(client, **kwargs):
+    backend = RedisFrontierBackend(client=client, name=f"test_{time.time_ns()}", host_delay=0, **kwargs)
+    backend.clear()
+    return backend
+
+
+def test_sqlite_backend_fifo():
+    """测试SQLite后端在内存、offload和数据库之间保持FIFO"""
+    print("=== 测试SQLite后端FIFO ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        queue = SmartQueue(max_memory_size=4, backend=SQLiteFrontierBackend(os.path.join(tmp_dir, "q.db")))
+        queue.put_many(list(range(20)))
+        assert len(queue) == 20
+        assert [queue.get() for _ in range(20)] == list(range(20))
+        assert queue.get() is None
+
+
+def test_redis_backend_dedupe_and_hosts():
+    """测试Redis后端的Bloom去重和按主机轮转调度"""
+    print("\n=== 测试Redis后端去重与主机调度 ===")
+    client = _get_redis_client()
+    if client is None:
+        print("⚠️  没有可用的Redis，跳过")
+        return
+
+    backend = _redis_backend(client)
+    urls = ["https://a.com/1", "https://a.com/2", "https://a.com/3", "https://b.com/1", "https://b.com/2"]
+    assert backend.push([(url, 0) for url in urls]) == 5
+    assert backend.push([("https://a.com/1", 0), ("https://c.com/1", 0)]) == 1
+    assert backend.size() == 6
+
+    popped = [item for item, _ in backend.pop(6)]
+    print(f"出队顺序: {popped}")
+    assert sorted(popped) == sorted(urls + ["https://c.com/1"])
+    # 同一主机内FIFO，不同主机轮转
+    assert [u for u in popped if "a.com" in u] == ["https://a.com/1", "https://a.com/2", "https://a.com/3"]
+    assert popped[:3] == ["https://a.com/1", "https://b.com/1", "https://c.com/1"]
+    assert backend.size() == 0 and backend.pop(1) == []
+    backend.clear()
+
+
+def test_redis_backend_lease_expiry():
+    """测试未确认的租约超时后重新入队"""
+    print("\n=== 测试Redis后端租约 ===")
+    client = _get_redis_client()
+    if client is None:
+        print("⚠️  没有可用的Redis，跳过")
+        return
+
+    backend = _redis_backend(client, lease_timeout=0)
+    backend.push([("https://a.com/1", 0), ("https://a.com/2", 0)])
+    first = backend.pop(1)
+    backend.ack([first[0][0]])
+    second = backend.pop(1)
+    assert [first[0][0], second[0][0]] == ["https://a.com/1", "https://a.com/2"]
+
+    # 第二个元素没有确认，租约过期后可以再次取到
+    time.sleep(0.01)
+    assert [item for item, _ in backend.pop(5)] == ["https://a.com/2"]
+    backend.clear()
+
+
+def test_redis_backend_host_delay():
+    """测试同一主机在host_delay内不会被再次调度"""
+    print("\n=== 测试Redis后端主机调度间隔 ===")
+    client = _get_redis_client()
+    if client is None:
+        print("⚠️  没有可用的Redis，跳过")
+        return
+
+    backend = _redis_backend(client)
+    backend.host_delay = 60
+    backend.push([(f"https://a.com/{i}", 0) for i in range(5)] + [("https://b.com/1", 0)])
+    # 一次取多个时每个主机只取一个
+    assert [item for item, _ in backend.pop(10)] == ["https://a.com/0", "https://b.com/1"]
+    # 间隔内再次出队没有可调度的主机
+    assert backend.pop(10) == [] and backend.size() == 4
+
+    # 主机队列取空后再入队（如刚抓取页面的同站出链），仍要等到host_delay之后
+    backend.push([("https://c.com/1", 0)])
+    assert [item for item, _ in backend.pop(10)] == ["https://c.com/1"]
+    backend.push([("https://c.com/2", 0)])
+    assert backend.pop(10) == [] and backend.size() == 5
+    backend.clear()
+
+
+def test_shared_smart_queue():
+    """测试两个SmartQueue共享同一个Redis前沿"""
+    print("\n=== 测试共享SmartQueue ===")
+    client = _get_redis_client()
+    if client is None:
+        print("⚠️  没有可用的Redis，跳过")
+        return
+
+    name = f"shared_{time.time_ns()}"
+    worker_a = SmartQueue(max_memory_size=4, backend=RedisFrontierBackend(client=client, name=name, host_delay=0))
+    worker_b = SmartQueue(max_memory_size=4, backend=RedisFrontierBackend(client=client, name=name, host_delay=0))
+
+    worker_a.put_many([f"https://a.com/{i}" for i in range(10)])
+    worker_b.put_many([f"https://a.com/{i}" for i in range(5, 15)])
+
+    crawled = []
+    while True:
+        items = [worker.get() for worker in (worker_a, worker_b)]
+        if items == [None, None]:
+            break
+        crawled.extend(item for item in items if item is not None)
+
+    assert sorted(crawled) == sorted(f"https://a.com/{i}" for i in range(15))
+    worker_a.clear()
+
+
+def test_smart_queue_ack_after_processing():
+    """测试SmartQueue取出的元素在ack之前不会丢失"""
+    print("\n=== 测试SmartQueue确认 ===")
+    client = _get_redis_client()
+    if client is None:
+        print("⚠️  没有可用的Redis，跳过")
+        return
+
+    name = f"ack_{time.time_ns()}"
+    crashed = SmartQueue(max_memory_size=2, backend=RedisFrontierBackend(client=client, name=name, host_delay=0,
+                                                                          lease_timeout=0))
+    crashed.put_many(["https://a.com/1", "https://b.com/1"])
+    assert crashed.get() == "https://a.com/1"
+    crashed.ack("https://a.com/1")
+    # 取出后没有确认就崩溃
+    assert crashed.get() == "https://b.com/1"
+
+    time.sleep(0.01)
+    worker = SmartQueue(max_memory_size=2, backend=RedisFrontierBackend(client=client, name=name, host_delay=0))
+    assert worker.get() == "https://b.com/1"
+    worker.ack("https://b.com/1")
+    assert worker.get() is None and worker.size() == 0
+    worker.clear()
+
+
+if __name__ == "__main__":
+    test_sqlite_backend_fifo()
+    test_redis_backend_dedupe_and_hosts()
+    test_redis_backend_lease_expiry()
+    test_redis_backend_host_delay()
+    test_shared_smart_queue()
+    test_smart_queue_ack_after_processing()
+
+    print("\n=== 所有测试完成 ===")
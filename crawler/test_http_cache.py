@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+HttpCache测试文件
+验证URL规范化、TTL过期以及record/replay模式
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from crawler.http_cache import HttpCache, CachedResponse, canonicalize_url
+
+
+class _FakeResponse:
+    """模拟aiohttp响应"""
+
+    def __init__(self, url: str, status: int = 200):
+        self.status = status
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        self.body = f"<html><title>{url}</title></html>".encode('utf-8')
+
+    async def read(self):
+        return self.body
+
+    def get_encoding(self):
+        return 'utf-8'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class _FakeSession:
+    """模拟aiohttp会话，记录网络请求次数"""
+
+    def __init__(self, status: int = 200):
+        self.requests = 0
+        self.status = status
+
+    def get(self, url):
+        self.requests += 1
+        return _FakeResponse(url, self.status)
+
+
+def test_canonicalize_url():
+    """测试URL规范化"""
+    print("=== 测试URL规范化 ===")
+    assert canonicalize_url("HTTPS://WWW.Sina.com.cn:443/news?b=2&a=1#top") == \
+        "https://www.sina.com.cn/news?a=1&b=2"
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/x") == "http://example.com:8080/x"
+
+
+def test_store_and_ttl():
+    """测试写入、读取和TTL过期"""
+    print("\n=== 测试缓存TTL ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = HttpCache(db_path=os.path.join(tmp_dir, "cache.db"), mode='normal', ttl=60)
+        cache.store(CachedResponse(url="https://a.com/", status=200, body=b"hello",
+                                   encoding='utf-8', fetched_at=time.time()))
+        cached = cache.lookup("https://A.com")
+        assert cached is not None and cached.from_cache
+        assert cached.text() == "hello"
+
+        cache.store(CachedResponse(url="https://b.com/", status=404, body=b"",
+                                   fetched_at=time.time() - 120))
+        assert cache.lookup("https://b.com/") is None
+        print(f"缓存统计: {cache.get_stats()}")
+        cache.close()
+
+
+def test_error_response_not_cached():
+    """测试normal模式不缓存错误响应，下次fetch重新访问网络；record模式照常记录"""
+    print("\n=== 测试错误响应不缓存 ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = HttpCache(db_path=os.path.join(tmp_dir, "cache.db"), mode='normal')
+        session = _FakeSession(status=500)
+        assert asyncio.run(cache.fetch(session, "https://a.com/")).status == 500
+        assert cache.lookup("https://a.com/") is None
+
+        # 服务恢复后下一次fetch访问网络并缓存成功的响应
+        session.status = 200
+        response = asyncio.run(cache.fetch(session, "https://a.com/"))
+        assert response.status == 200 and not response.from_cache and session.requests == 2
+        assert asyncio.run(cache.fetch(session, "https://a.com/")).from_cache and session.requests == 2
+        cache.close()
+
+        recorder = HttpCache(db_path=os.path.join(tmp_dir, "record.db"), mode='record')
+        asyncio.run(recorder.fetch(_FakeSession(status=503), "https://b.com/"))
+        assert recorder.lookup("https://b.com/").status == 503
+        recorder.close()
+
+
+def test_record_then_replay():
+    """测试record模式写入后replay模式离线读取"""
+    print("\n=== 测试record/replay ===")
+    urls = ["https://a.com/1", "https://a.com/2"]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "cache.db")
+
+        async def run(mode, session):
+            cache = HttpCache(db_path=db_path, mode=mode)
+            responses = [await cache.fetch(session, url) for url in urls + ["https://a.com/3"]]
+            cache.close()
+            return responses
+
+        session = _FakeSession()
+        recorded = asyncio.run(run('record', session))
+        assert session.requests == 3
+
+        replayed = asyncio.run(run('replay', None))
+        assert [r.body for r in replayed[:2]] == [r.body for r in recorded[:2]]
+        assert all(r.from_cache for r in replayed[:2])
+
+        # 清除第3条后replay未命中，且不会访问网络
+        cache = HttpCache(db_path=db_path, mode='replay')
+        cache.conn.execute("DELETE FROM http_cache WHERE url = ?", ("https://a.com/3",))
+        cache.conn.commit()
+        assert asyncio.run(cache.fetch(None, "https://a.com/3")) is None
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_canonicalize_url()
+    test_store_and_ttl()
+    test_error_response_not_cached()
+    test_record_then_replay()
+
+    print("\n=== 所有测试完成 ===")
@@ -3,16 +3,21 @@
 检查term应该在哪一个shard中
 """
 
-import hashlib
+from indexer.vocabulary import Vocabulary
 
-def get_shard_id(term: str, num_shards: int = 64) -> int:
-    """计算term应该在哪一个shard中"""
-    hash_value = hashlib.md5(term.encode('utf-8')).hexdigest()
-    return int(hash_value, 16) % num_shards
+def get_shard_id(term: str, num_shards: int = 64, index_path: str = "data/indexer"):
+    """计算term应该在哪一个shard中（term不在词表中时返回None）"""
+    term_id = Vocabulary(index_path).get_id(term)
+    if term_id is None:
+        return None
+    return term_id % num_shards
 
 def check_term_shard(term: str, num_shards: int = 64):
     """检查term的shard分布"""
     shard_id = get_shard_id(term, num_shards)
+    if shard_id is None:
+        print(f"term '{term}' 不在词表中")
+        return
     print(f"term '{term}' 应该在 shard_{shard_id} 中")
     
     # 检查所有shard文件
@@ -2,7 +2,6 @@
 
 import os
 import json
-import pickle
 from typing import Dict, List
 
 index_path = "data/indexer"
@@ -16,16 +15,18 @@ print(json.dumps(index_stats, indent=2, ensure_ascii=False))
 
 # 打印指定shard的所有term
 shard_id = 60  # 可以修改这个值来查看不同的shard
-shard_file = os.path.join(index_path, f"shard_{shard_id}.pkl")
 
-# 打印shard_id的term
-with open(shard_file, "rb") as f:
-    shard = pickle.load(f)
+from indexer.inverted_index import InvertedIndexShard
+from indexer.vocabulary import Vocabulary
 
-# print(shard.keys())
+# 分片由多个段组成，通过分片对象读取（不清空磁盘）
+shard = InvertedIndexShard(shard_id, index_path, clear_disk=False)
+print(f"shard_{shard_id} 段列表: {[segment['name'] for segment in shard.metadata['segments']]}")
 
-# 打印一个具体的term
-print(shard.get("iPad"))
+# 打印一个具体的term（分片按term ID存储）
+vocabulary = Vocabulary(index_path)
+term_id = vocabulary.get_id("iPad")
+print(shard.get_postings(term_id) if term_id is not None else None)
 
 
 
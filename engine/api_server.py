@@ -14,6 +14,7 @@ import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from engine.search_engine import SearchEngine
+from utils.text_processor import warmup
 from config.settings import FRONTEND_CONFIG
 
 # 配置日志
@@ -34,6 +35,11 @@ def init_search_engine():
     """初始化搜索引擎"""
     global search_engine
     try:
+        # 先加载分词词典，第一个查询不再承担加载开销
+        start_time = time.time()
+        warmup()
+        logger.info(f"Analyzer warmed up in {time.time() - start_time:.2f}s")
+        
         search_engine = SearchEngine()
         logger.info("Search engine initialized successfully")
     except Exception as e:
@@ -161,16 +167,11 @@ def suggest():
         suggestions = set()
         
         # 从文档统计中提取建议
+        vocabulary = search_engine.vocabulary
         for doc_info in search_engine.doc_stats.values():
-            # 从标题中提取建议
-            title_tokens = search_engine.tokenize_query(doc_info['title'])
-            for token in title_tokens:
-                if token.startswith(query) and len(token) > len(query):
-                    suggestions.add(token)
-            
-            # 从内容中提取建议
-            content_tokens = doc_info['tokens']
-            for token in content_tokens:
+            # 从标题和内容的词项中提取建议（词项以全局词表ID保存）
+            for term_id in set(doc_info['tokens']):
+                token = vocabulary.get_term(term_id)
                 if token.startswith(query) and len(token) > len(query):
                     suggestions.add(token)
             
@@ -13,6 +13,7 @@ from typing import List, Dict
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from engine.search_engine import SearchEngine
+from utils.text_processor import warmup
 
 # 配置日志
 logging.basicConfig(
@@ -32,6 +33,7 @@ class SearchCLI:
         """初始化搜索引擎"""
         try:
             print("正在初始化搜索引擎...")
+            warmup()
             self.search_engine = SearchEngine()
             print("搜索引擎初始化完成！")
             
@@ -1,17 +1,48 @@
 import sqlite3
 import hashlib
+import html
 import logging
+import os
 from typing import List, Dict, Set, Optional, Tuple
 from collections import defaultdict
 import math
 from rank_bm25 import BM25Okapi
 
 from indexer.inverted_index import InvertedIndexReader, Posting
-from utils.text_processor import TextProcessor
+from indexer.static_rank import StaticRank
+from indexer.token_store import TokenStore, document_text
+from utils.text_processor import TextProcessor, get_index_analyzer
 from config.settings import SEARCH_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# 高亮摘要的长度，以及第一个命中词之前保留的字符数
+SNIPPET_LENGTH = 200
+SNIPPET_LEADING = 40
+
+
+def _highlight(text: str, spans: List[Tuple[int, int]]) -> str:
+    """按字符区间给文本加<mark>标签，重叠或相邻的区间合并后只标记一次"""
+    parts = []
+    cursor = 0
+    for start, end in _merge_spans(spans):
+        parts.append(html.escape(text[cursor:start], quote=False))
+        parts.append(f"<mark>{html.escape(text[start:end], quote=False)}</mark>")
+        cursor = end
+    parts.append(html.escape(text[cursor:], quote=False))
+    return ''.join(parts)
+
+
+def _merge_spans(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
 class SearchEngine:
     """搜索引擎引擎类"""
     
@@ -24,8 +55,14 @@ class SearchEngine:
             db_path: 文档数据库路径
         """
         self.index_reader = InvertedIndexReader(index_path)
-        self.text_processor = TextProcessor()
+        self.static_rank = StaticRank(index_path)
+        # 使用与索引构建时相同的分析器
+        self.text_processor = TextProcessor(get_index_analyzer(os.path.join(index_path, "index_stats.json")))
         self.db_path = db_path
+        # 构建索引时写入的分词缓存（只读），文档的词项以全局词表ID表示
+        self.vocabulary = self.index_reader.vocabulary
+        self.token_store = TokenStore(index_path, vocabulary=self.vocabulary,
+                                      text_processor=self.text_processor, read_only=True)
         
         # BM25参数
         self.bm25_k1 = SEARCH_CONFIG.get('bm25_k1', 1.5)
@@ -48,19 +85,26 @@ class SearchEngine:
                 SELECT id, title, content FROM pages
             ''')
             
-            for row in cursor.fetchall():
-                doc_id, title, content = row
-                # 计算文档长度（词数）
-                tokens = self.text_processor.tokenize(content or "")
-                doc_stats[doc_id] = {
-                    'title': title,
-                    'content': content,
-                    'length': len(tokens),
-                    'tokens': tokens
-                }
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                # 从分词缓存读取词项ID序列，缓存中没有的文档才重新分词
+                batch_tokens = self.token_store.get_many(
+                    [(doc_id, document_text(title, content)) for doc_id, title, content in rows]
+                )
+                for (doc_id, title, content), (term_ids, _) in zip(rows, batch_tokens):
+                    # 文档长度（词数）与索引一致，按标题和内容计算
+                    doc_stats[doc_id] = {
+                        'title': title,
+                        'content': content,
+                        'length': len(term_ids),
+                        'tokens': term_ids
+                    }
             
             conn.close()
-            logger.info(f"Loaded {len(doc_stats)} document stats")
+            logger.info(f"Loaded {len(doc_stats)} document stats "
+                        f"({self.token_store.stats['misses']} tokenized)")
             
         except Exception as e:
             logger.error(f"Error loading document stats: {e}")
@@ -144,15 +188,20 @@ class SearchEngine:
         score = 0.0
         
         for term in query_terms:
+            # 文档的词项以全局词表ID保存
+            term_id = self.vocabulary.get_id(term)
+            if term_id is None:
+                continue
+            
             # 获取该term在文档中的词频
-            term_freq = doc_info['tokens'].count(term)
+            term_freq = doc_info['tokens'].count(term_id)
             if term_freq == 0:
                 continue
             
             # 获取该term的文档频率
             doc_freq = 0
             for doc in self.doc_stats.values():
-                if term in doc['tokens']:
+                if term_id in doc['tokens']:
                     doc_freq += 1
             
             if doc_freq == 0:
@@ -179,32 +228,39 @@ class SearchEngine:
         Returns:
             搜索结果列表，每个结果包含doc_id、title、content、score
         """
+        results, _ = self._search(query)
+        return results
+    
+    def _search(self, query: str) -> Tuple[List[Dict], Dict[str, List[Posting]]]:
+        """执行搜索，同时返回各查询词的倒排列表（用于高亮）"""
         # 1. 对查询进行分词
         query_terms = self.tokenize_query(query)
         logger.info(f"Query terms: {query_terms}")
         
         if not query_terms:
-            return []
+            return [], {}
         
         # 2. 获取每个分词的倒排列表
         postings_list = []
+        postings_by_term = {}
         for term in query_terms:
             postings = self.get_postings(term)
             if postings:
                 postings_list.append(postings)
+                postings_by_term[term] = postings
                 logger.info(f"Term '{term}' has {len(postings)} postings")
             else:
                 logger.info(f"Term '{term}' has no postings")
         
         if not postings_list:
-            return []
+            return [], postings_by_term
         
         # 3. 对倒排列表进行求交
         intersection_docs = self.intersect_postings(postings_list)
         logger.info(f"Intersection result: {len(intersection_docs)} documents")
         
         if not intersection_docs:
-            return []
+            return [], postings_by_term
         
         # 4. 使用BM25计算相关性分数
         doc_scores = []
@@ -213,8 +269,8 @@ class SearchEngine:
             if score > 0:
                 doc_scores.append((doc_id, score))
         
-        # 5. 按分数排序
-        doc_scores.sort(key=lambda x: x[1], reverse=True)
+        # 5. 按分数排序，同分时按文档静态权重排序
+        doc_scores.sort(key=lambda x: (x[1], self.static_rank.get(x[0])), reverse=True)
         
         # 6. 构建搜索结果
         results = []
@@ -230,42 +286,91 @@ class SearchEngine:
                 })
         
         logger.info(f"Search completed, returned {len(results)} results")
-        return results
+        return results, postings_by_term
     
     def search_with_highlight(self, query: str) -> List[Dict]:
         """
         执行搜索并高亮显示匹配的词
         
+        高亮位置直接取自倒排列表中保存的字符偏移，不需要重新分词；
+        内容摘要截取第一个命中词附近的文本
+        
         Args:
             query: 查询字符串
             
         Returns:
             搜索结果列表，包含高亮信息
         """
-        results = self.search(query)
-        query_terms = self.tokenize_query(query)
+        results, postings_by_term = self._search(query)
+        
+        # term -> {doc_id: posting}，只为返回的结果建立
+        result_ids = {result['doc_id'] for result in results}
+        doc_postings = {
+            term: {posting.doc_id: posting for posting in postings if posting.doc_id in result_ids}
+            for term, postings in postings_by_term.items()
+        }
         
         for result in results:
-            # 在标题和内容中高亮查询词
-            highlighted_title = result['title']
-            highlighted_content = result['content']
-            
-            for term in query_terms:
-                # 高亮标题
-                highlighted_title = highlighted_title.replace(
-                    term, f"<mark>{term}</mark>"
-                )
-                
-                # 高亮内容
-                highlighted_content = highlighted_content.replace(
-                    term, f"<mark>{term}</mark>"
-                )
+            doc_info = self.doc_stats[result['doc_id']]
+            title = doc_info['title'] or ''
+            content = doc_info['content'] or ''
             
-            result['highlighted_title'] = highlighted_title
-            result['highlighted_content'] = highlighted_content
+            # 索引文本为f"{title} {content}"，内容部分的偏移需要减去标题长度+1
+            content_base = len(f"{doc_info['title']}") + 1
+            title_spans, content_spans = self._match_spans(
+                result['doc_id'], doc_postings, title, content, content_base
+            )
+            result['highlighted_title'] = _highlight(title, title_spans)
+            result['highlighted_content'] = self._highlight_snippet(content, content_spans)
         
         return results
     
+    def _match_spans(self, doc_id: int, doc_postings: Dict[str, Dict[int, Posting]], title: str,
+                     content: str, content_base: int) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """返回查询词在标题和内容中的字符区间"""
+        title_spans = []
+        content_spans = []
+        
+        for term, postings in doc_postings.items():
+            posting = postings.get(doc_id)
+            if posting is None:
+                continue
+            if posting.offsets is None:
+                # 旧格式的索引没有保存偏移，退化为对文档重新分词
+                return self._match_spans_by_tokenizing(set(doc_postings), title, content)
+            for start in posting.offsets:
+                end = start + len(term)
+                if end <= len(title):
+                    title_spans.append((start, end))
+                elif start >= content_base:
+                    content_spans.append((start - content_base, end - content_base))
+        
+        return title_spans, content_spans
+    
+    def _match_spans_by_tokenizing(self, terms: Set[str], title: str,
+                                   content: str) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        spans = []
+        for text in (title, content):
+            stream = self.text_processor.tokenize_with_offsets(text)
+            spans.append([(start, end) for term, _, start, end in stream if term in terms])
+        return spans[0], spans[1]
+    
+    @staticmethod
+    def _highlight_snippet(content: str, spans: List[Tuple[int, int]]) -> str:
+        """截取第一个命中词附近的摘要并高亮"""
+        start = 0
+        if spans:
+            start = max(0, min(s for s, _ in spans) - SNIPPET_LEADING)
+        end = min(len(content), start + SNIPPET_LENGTH)
+        
+        snippet_spans = [(s - start, min(e, end) - start) for s, e in spans if s >= start and s < end]
+        snippet = _highlight(content[start:end], snippet_spans)
+        if start > 0:
+            snippet = '...' + snippet
+        if end < len(content):
+            snippet += '...'
+        return snippet
+    
     def get_search_stats(self) -> Dict:
         """获取搜索统计信息"""
         return {
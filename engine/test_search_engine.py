@@ -6,11 +6,14 @@
 import logging
 import sys
 import os
+import tempfile
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from engine.search_engine import SearchEngine
+from indexer.inverted_index import InvertedIndexBuilder
+from indexer.testing import create_pages_db
 
 # 配置日志
 logging.basicConfig(
@@ -129,6 +132,66 @@ def test_posting_intersection():
         import traceback
         traceback.print_exc()
 
+def test_highlight_with_offsets():
+    """测试按倒排列表中的字符偏移高亮（大小写、全角字符和CJK词边界）"""
+    print("\n=== 偏移高亮测试 ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        index_path = os.path.join(tmp_dir, "indexer")
+        
+        create_pages_db(db_path, [
+            (1, "https://a.com/1", "ＩＰＯ新规发布", "证监会发布IPO新规，多家公司暂停IPO。" + "市场观望情绪浓厚。" * 40 + "<b>股票</b>市场IPO", ""),
+            (2, "https://a.com/2", "债券市场周报", "国债收益率小幅下行", ""),
+            (3, "https://a.com/3", "黄金价格走强", "避险需求推动金价上涨", ""),
+        ])
+        
+        InvertedIndexBuilder(db_path=db_path, index_path=index_path, num_shards=64).build_index()
+        search_engine = SearchEngine(index_path=index_path, db_path=db_path)
+        
+        results = search_engine.search_with_highlight("ipo")
+        assert [result['doc_id'] for result in results] == [1]
+        print(f"高亮标题: {results[0]['highlighted_title']}")
+        print(f"高亮内容: {results[0]['highlighted_content']}")
+        assert results[0]['highlighted_title'] == "<mark>ＩＰＯ</mark>新规发布"
+        assert results[0]['highlighted_content'].startswith("证监会发布<mark>IPO</mark>新规，多家公司暂停<mark>IPO</mark>。")
+        assert results[0]['highlighted_content'].endswith("...")
+        
+        # 没有偏移的旧索引退化为重新分词，结果一致
+        results_by_tokenizing = search_engine._match_spans_by_tokenizing({"ipo"}, "ＩＰＯ新规发布", "证监会发布IPO")
+        assert results_by_tokenizing == ([(0, 3)], [(5, 8)])
+
+
+def test_bigram_index_oov_recall():
+    """测试二元组索引对未登录词的召回，查询端自动使用相同的分析器"""
+    print("\n=== 二元组索引测试 ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        
+        create_pages_db(db_path, [
+            (1, "https://a.com/1", "新势力车企财报", "蔚小理三季度交付量均创新高", ""),
+            (2, "https://a.com/2", "债券市场周报", "国债收益率小幅下行", ""),
+            (3, "https://a.com/3", "黄金价格走强", "避险需求推动金价上涨", ""),
+        ])
+        
+        recalled = {}
+        for analyzer in ("jieba", "cjk_bigram"):
+            index_path = os.path.join(tmp_dir, analyzer)
+            InvertedIndexBuilder(db_path=db_path, index_path=index_path, num_shards=64,
+                                 analyzer=analyzer).build_index()
+            search_engine = SearchEngine(index_path=index_path, db_path=db_path)
+            assert search_engine.text_processor.analyzer.name == analyzer
+            results = search_engine.search_with_highlight("小理")
+            recalled[analyzer] = [result['doc_id'] for result in results]
+            if results:
+                print(f"{analyzer} 高亮内容: {results[0]['highlighted_content']}")
+        
+        print(f"召回结果: {recalled}")
+        assert recalled["cjk_bigram"] == [1]
+        assert recalled["jieba"] == []
+
+
 if __name__ == "__main__":
     test_search_engine()
     test_posting_intersection()
+    test_highlight_with_offsets()
+    test_bigram_index_oov_recall()
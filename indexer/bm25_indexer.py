@@ -1,36 +1,50 @@
 import sqlite3
-import pickle
-import hashlib
 import os
 import logging
 import time
 import math
-from typing import Dict, List, Set, Tuple, Optional, Any
-from collections import defaultdict, deque
+from array import array
+from typing import Dict, List, Sequence, Set, Tuple, Optional, Any
+from collections import Counter, defaultdict, deque
 import threading
 from dataclasses import dataclass
 import json
 
-from utils.text_processor import TextProcessor
+import numpy as np
+
+from utils.text_processor import TextProcessor, get_analyzer
+from .static_rank import StaticRank
+from .vocabulary import Vocabulary
+from .token_store import TokenStore, document_text
+from .doc_source import DocumentSource
+from .idf import save_idf
+from .norms import NORMS_FILE, DocNorms, bm25_length_factor
+from .live_docs import BM25_LIVE_DOCS_FILE, LiveDocs
+from .parallel_build import build_parallel
+from .codec import BlockIndex, PostingBuffer, PostingCodec
+from .segment import SegmentedShard
+from .top_k import PostingCursor, block_max_top_k
 from config.settings import INDEXER_CONFIG, SEARCH_CONFIG
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 进程内共享的IDF缓存：(索引目录, 索引代数) -> {term ID: IDF}；每次构建完成后代数加1，旧的缓存随之失效
+_idf_cache: Dict[Tuple[str, int], Dict[int, float]] = {}
+_idf_cache_lock = threading.Lock()
+
 @dataclass
 class BM25Posting:
     """BM25倒排索引中的倒排列表项"""
     doc_id: int
     positions: List[int]  # 词在文档中的位置
-    tf: int  # 词频
-    doc_length: int  # 文档长度
+    tf: int  # 词频（文档长度保存在DocNorms中，不随每个倒排列表项重复保存）
     
     def to_dict(self) -> Dict:
         return {
             'doc_id': self.doc_id,
             'positions': self.positions,
-            'tf': self.tf,
-            'doc_length': self.doc_length
+            'tf': self.tf
         }
     
     @classmethod
@@ -38,148 +52,48 @@ class BM25Posting:
         return cls(
             doc_id=data['doc_id'],
             positions=data['positions'],
-            tf=data['tf'],
-            doc_length=data['doc_length']
+            tf=data['tf']
         )
 
-class BM25IndexShard:
-    """BM25倒排索引分片"""
-    
-    def __init__(self, shard_id: int, base_path: str, max_memory_size: int = 10000):
-        self.shard_id = shard_id
-        self.base_path = base_path
-        self.max_memory_size = max_memory_size
-        
-        # 内存中的倒排索引
-        self.memory_index: Dict[str, List[BM25Posting]] = {}
-        self.memory_size = 0
-        
-        # 磁盘文件路径
-        self.disk_file = os.path.join(base_path, f"bm25_shard_{shard_id}.pkl")
-        self.metadata_file = os.path.join(base_path, f"bm25_shard_{shard_id}_metadata.json")
-        
-        # 锁用于线程安全
-        self.lock = threading.Lock()
-        
-        # 加载元数据
-        self._load_metadata()
-        
-        logger.info(f"Initialized BM25 shard {shard_id} with max_memory_size={max_memory_size}")
+class BM25IndexShard(SegmentedShard):
+    """
+    BM25倒排索引分片，内存中的倒排列表刷新为不可变的磁盘段（见segment.py）
+
+    倒排列表项不保存文档长度，跳表中每块的(tf, 文档长度)竞争性取值对在编码时从文档长度数组读取
+    """
     
-    def _load_metadata(self):
-        """加载分片元数据"""
-        if os.path.exists(self.metadata_file):
-            try:
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    self.metadata = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading metadata for BM25 shard {self.shard_id}: {e}")
-                self.metadata = {'term_count': 0, 'doc_count': 0, 'total_tf': 0}
-        else:
-            self.metadata = {'term_count': 0, 'doc_count': 0, 'total_tf': 0}
+    file_prefix = "bm25_shard"
+    label = "BM25 shard"
+    codec = PostingCodec(BM25Posting, ('doc_id', 'tf'), 'positions', impact_fields=('tf', 'doc_length'))
     
-    def _save_metadata(self):
-        """保存分片元数据"""
-        try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving metadata for BM25 shard {self.shard_id}: {e}")
-    
-    def add_posting(self, term: str, posting: BM25Posting):
-        """添加倒排列表项"""
-        with self.lock:
-            if term not in self.memory_index:
-                self.memory_index[term] = []
-                self.memory_size += 1
-            
-            self.memory_index[term].append(posting)
-            self.memory_size += 1
-            
-            # 检查是否需要刷新到磁盘
-            if self.memory_size >= self.max_memory_size:
-                self._flush_to_disk()
+    def __init__(self, shard_id: int, base_path: str, max_memory_size: int = 10000,
+                 norms: Optional[DocNorms] = None, norms_path: Optional[str] = None, **kwargs):
+        """
+        Args:
+            norms: 文档长度（与构建器共享）
+            norms_path: 未给出norms时从该目录以内存映射加载文档长度（并行构建的归并进程使用）
+        """
+        if norms is None:
+            norms = DocNorms.load(norms_path) if norms_path else DocNorms()
+        self.norms = norms
+        super().__init__(shard_id, base_path, max_memory_size=max_memory_size, **kwargs)
     
-    def _flush_to_disk(self):
-        """将内存中的索引刷新到磁盘"""
-        if not self.memory_index:
-            return
-        
-        try:
-            # 读取现有的磁盘索引
-            existing_index = self._load_from_disk()
-            
-            # 合并内存和磁盘索引
-            for term, postings in self.memory_index.items():
-                if term in existing_index:
-                    # 合并倒排列表
-                    existing_index[term].extend(postings)
-                    # 按doc_id排序
-                    existing_index[term].sort(key=lambda x: x.doc_id)
-                else:
-                    existing_index[term] = postings
-            
-            # 保存到磁盘
-            with open(self.disk_file, 'wb') as f:
-                pickle.dump(existing_index, f)
-            
-            # 更新元数据
-            self.metadata['term_count'] = len(existing_index)
-            self.metadata['doc_count'] = sum(len(postings) for postings in existing_index.values())
-            self.metadata['total_tf'] = sum(sum(p.tf for p in postings) for postings in existing_index.values())
-            self._save_metadata()
-            
-            # 清空内存
-            self.memory_index.clear()
-            self.memory_size = 0
-            
-            logger.info(f"Flushed BM25 shard {self.shard_id} to disk, terms: {self.metadata['term_count']}")
-            
-        except Exception as e:
-            logger.error(f"Error flushing BM25 shard {self.shard_id} to disk: {e}")
+    def _norm_values(self) -> np.ndarray:
+        return self.norms.values
     
-    def _load_from_disk(self) -> Dict[str, List[BM25Posting]]:
-        """从磁盘加载索引"""
-        if not os.path.exists(self.disk_file):
-            return {}
-        
-        try:
-            with open(self.disk_file, 'rb') as f:
-                return pickle.load(f)
-        except Exception as e:
-            logger.error(f"Error loading BM25 shard {self.shard_id} from disk: {e}")
-            return {}
-    
-    def get_postings(self, term: str) -> List[BM25Posting]:
-        """获取指定term的倒排列表"""
-        with self.lock:
-            # 首先检查内存
-            if term in self.memory_index:
-                return self.memory_index[term].copy()
-            
-            # 检查磁盘
-            disk_index = self._load_from_disk()
-            if term in disk_index:
-                return disk_index[term].copy()
-            
-            return []
+    def merge_options(self, tmp_dir: str) -> Dict[str, Any]:
+        # 文档长度保存到临时目录，由归并进程内存映射读取，不随每个任务pickle
+        if not os.path.exists(os.path.join(tmp_dir, NORMS_FILE)):
+            self.norms.save(tmp_dir)
+        return {**super().merge_options(tmp_dir), 'norms_path': tmp_dir}
     
-    def get_all_terms(self) -> Set[str]:
-        """获取所有term"""
-        with self.lock:
-            terms = set(self.memory_index.keys())
-            
-            # 添加磁盘中的term
-            disk_index = self._load_from_disk()
-            terms.update(disk_index.keys())
-            
-            return terms
+    def _empty_metadata(self) -> Dict[str, Any]:
+        return {'term_count': 0, 'doc_count': 0, 'total_tf': 0}
     
-    def finalize(self):
-        """最终化分片，确保所有数据都写入磁盘"""
-        with self.lock:
-            self._flush_to_disk()
-            logger.info(f"Finalized BM25 shard {self.shard_id}")
+    def _update_stats(self, index: Dict[int, PostingBuffer]):
+        # 只读tf列，不复制位置等列表字段
+        self.metadata['total_tf'] += sum(int(self.codec.int_column(postings, 'tf').sum(dtype=np.uint64))
+                                         for postings in index.values())
 
 class BM25IndexBuilder:
     """基于BM25算法的倒排索引构建器"""
@@ -188,7 +102,10 @@ class BM25IndexBuilder:
                  index_path: str = "data/indexer", 
                  num_shards: int = 16,
                  batch_size: int = 1000,
-                 max_memory_size: int = 10000):
+                 max_memory_size: int = 10000,
+                 tokenize_workers: Optional[int] = None,
+                 analyzer: Optional[str] = None,
+                 shard_path: Optional[str] = None):
         """
         初始化BM25倒排索引构建器
         
@@ -198,36 +115,66 @@ class BM25IndexBuilder:
             num_shards: 分片数量
             batch_size: 批处理大小
             max_memory_size: 每个分片的最大内存大小
+            tokenize_workers: 分词进程数，None时使用配置，0表示使用全部CPU
+            analyzer: 分析器名称（jieba/cjk_bigram），None时使用配置；记录在统计信息中供查询端使用
+            shard_path: 分片文件目录，None时与index_path相同（并行构建的工作进程写到各自的临时目录）
         """
         self.db_path = db_path
         self.index_path = index_path
+        self.shard_path = shard_path or index_path
         self.num_shards = num_shards
         self.batch_size = batch_size
         self.max_memory_size = max_memory_size
+        if tokenize_workers is None:
+            tokenize_workers = INDEXER_CONFIG.get('tokenize_workers', 1)
+        self.tokenize_workers = tokenize_workers
         
         # 文本处理器
-        self.text_processor = TextProcessor()
+        self.text_processor = TextProcessor(get_analyzer(analyzer))
         
         # BM25参数
         self.k1 = SEARCH_CONFIG['bm25_k1']
         self.b = SEARCH_CONFIG['bm25_b']
         
+        # 全局词表（同一索引目录下的索引共享，词项ID在多次构建之间保持不变）
+        self.vocabulary = Vocabulary(index_path)
+        
+        # 分词缓存（文档未变化且分析器相同时直接读取词项ID序列）
+        self.token_store = TokenStore(index_path, vocabulary=self.vocabulary,
+                                      text_processor=self.text_processor,
+                                      tokenize_workers=tokenize_workers)
+        
+        # 文档长度（按doc_id索引），构建时随文档记录，与分片共享
+        self.norms = DocNorms.load(index_path)
+        
+        # 已索引文档和删除位图（增量构建删除被替换的文档，检索时跳过）
+        self.live_docs = LiveDocs.load(index_path, BM25_LIVE_DOCS_FILE)
+        self.index_analyzer: Optional[str] = None  # 已有索引使用的分析器
+        
         # 分片管理器
         self.shards: Dict[int, BM25IndexShard] = {}
         self._init_shards()
         
+        # 本次构建中每个词项的文档频率，构建完成后写成IDF表
+        self.doc_freqs: Counter = Counter()
+        
+        # 文档静态权重（链接分析得到的先验），用于同分排序
+        self.static_rank = StaticRank(index_path)
+        
         # 文档统计信息
         self.doc_stats = {
             'total_docs': 0,
             'total_terms': 0,
             'total_postings': 0,
-            'avg_doc_length': 0,
-            'doc_lengths': {},  # doc_id -> length
-            'processing_time': 0
+            'avg_doc_length': 0,  # 文档长度保存在bm25_norms.npy中
+            'processing_time': 0,
+            'analyzer': self.text_processor.analyzer.name,
+            'generation': 0  # 索引代数，每次构建完成后加1
         }
         
         # 创建索引目录
         os.makedirs(index_path, exist_ok=True)
+        self._load_stats()
         
         logger.info(f"Initialized BM25IndexBuilder with {num_shards} shards")
     
@@ -236,64 +183,81 @@ class BM25IndexBuilder:
         for i in range(self.num_shards):
             self.shards[i] = BM25IndexShard(
                 shard_id=i,
-                base_path=self.index_path,
-                max_memory_size=self.max_memory_size
+                base_path=self.shard_path,
+                max_memory_size=self.max_memory_size,
+                norms=self.norms
             )
     
-    def _get_shard_id(self, term: str) -> int:
-        """根据term计算分片ID"""
-        # 使用哈希函数计算分片ID
-        hash_value = hashlib.md5(term.encode('utf-8')).hexdigest()
-        return int(hash_value, 16) % self.num_shards
+    def _get_shard_id(self, term_id: int) -> int:
+        """根据term ID计算分片ID"""
+        return term_id % self.num_shards
     
     def _process_document(self, doc_id: int, title: str, content: str) -> Tuple[Dict[str, List[int]], int]:
         """处理单个文档，返回term到位置的映射和文档长度"""
-        # 合并标题和内容
-        full_text = f"{title} {content}"
-        
-        # 分词
-        tokens = self.text_processor.tokenize(full_text)
-        doc_length = len(tokens)
-        
-        # 构建term到位置的映射
+        # 合并标题和内容并分词
+        tokens = self.text_processor.tokenize(f"{title} {content}")
+        return self._term_positions(tokens), len(tokens)
+    
+    @staticmethod
+    def _term_positions(tokens: Sequence) -> Dict[Any, List[int]]:
+        """构建term（或term ID）到位置的映射"""
         term_positions = defaultdict(list)
         for pos, token in enumerate(tokens):
             term_positions[token].append(pos)
         
-        return dict(term_positions), doc_length
+        return dict(term_positions)
     
-    def build_index(self):
-        """构建BM25倒排索引"""
+    def _tokenize_batch(self, batch_docs: List[Tuple]) -> List[array]:
+        """
+        按顺序返回一批文档的词项ID序列
+        
+        优先读取分词缓存，未命中的文档整批分词（tokenize_workers>1时在进程池中并行）
+        """
+        batch_tokens = self.token_store.get_many(
+            [(doc_id, document_text(title, content)) for doc_id, title, content in batch_docs]
+        )
+        return [term_ids for term_ids, _ in batch_tokens]
+    
+    def build_index(self, workers: int = 1):
+        """
+        构建BM25倒排索引
+
+        Args:
+            workers: 构建进程数，大于1时按doc_id范围多进程并行构建后归并（见parallel_build.py），0表示使用全部CPU
+        """
         start_time = time.time()
         logger.info("Starting BM25 inverted index construction...")
         
         try:
-            # 连接数据库
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # 按id流式读取文档（键集分页，后台预取下一批）
+            source = DocumentSource(self.db_path, ('id', 'title', 'content'), batch_size=self.batch_size)
             
             # 获取总文档数
-            cursor.execute("SELECT COUNT(*) FROM pages")
-            total_docs = cursor.fetchone()[0]
+            total_docs = source.count()
             logger.info(f"Total documents to process: {total_docs}")
             
             if total_docs == 0:
                 logger.warning("No documents found in database")
                 return
             
-            # 第一遍：计算文档长度和平均文档长度
-            logger.info("First pass: calculating document lengths...")
-            self._calculate_doc_lengths(cursor, total_docs)
+            self._reset_build()
             
-            # 第二遍：构建倒排索引
-            logger.info("Second pass: building inverted index...")
-            self._build_inverted_index(cursor, total_docs)
+            if workers != 1:
+                build_parallel(self, source, workers)
+            else:
+                # 单遍构建：分词的同时记录文档长度，平均文档长度在最终化时计算
+                logger.info("Building inverted index in a single pass...")
+                self._build_inverted_index(source, total_docs)
             
-            # 最终化所有分片
+            # 最终化所有分片和文档长度
             self._finalize_shards()
+            self._finalize_norms()
+            self.live_docs.save(self.index_path, BM25_LIVE_DOCS_FILE)
+            save_idf(self.index_path, self.doc_freqs, self.doc_stats['total_docs'], len(self.vocabulary))
             
             # 更新统计信息
             self.doc_stats['processing_time'] = time.time() - start_time
+            self.doc_stats['generation'] += 1
             
             # 保存统计信息
             self._save_stats()
@@ -304,100 +268,160 @@ class BM25IndexBuilder:
             logger.error(f"Error building BM25 index: {e}")
             raise
         finally:
-            conn.close()
+            self.token_store.close()
+            self.text_processor.close()
     
-    def _calculate_doc_lengths(self, cursor, total_docs):
-        """计算所有文档的长度"""
-        offset = 0
-        processed_docs = 0
-        
-        while offset < total_docs:
-            cursor.execute("""
-                SELECT id, title, content 
-                FROM pages 
-                ORDER BY id 
-                LIMIT ? OFFSET ?
-            """, (self.batch_size, offset))
-            
-            batch_docs = cursor.fetchall()
-            if not batch_docs:
-                break
-            
-            for doc_id, title, content in batch_docs:
-                try:
-                    # 处理文档
-                    term_positions, doc_length = self._process_document(doc_id, title, content)
-                    
-                    # 保存文档长度
-                    self.doc_stats['doc_lengths'][doc_id] = doc_length
-                    
-                    processed_docs += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing document {doc_id}: {e}")
-            
-            offset += self.batch_size
-            logger.info(f"Calculated lengths for {processed_docs}/{total_docs} documents")
-        
-        # 计算平均文档长度
-        if self.doc_stats['doc_lengths']:
-            total_length = sum(self.doc_stats['doc_lengths'].values())
-            self.doc_stats['avg_doc_length'] = total_length / len(self.doc_stats['doc_lengths'])
-            self.doc_stats['total_docs'] = len(self.doc_stats['doc_lengths'])
-        
-        logger.info(f"Average document length: {self.doc_stats['avg_doc_length']:.2f}")
+    def update_index(self, since: Optional[float] = None) -> Dict[str, int]:
+        """
+        增量构建BM25倒排索引
+
+        已不在数据库中的文档（内容变化后以新的id写入，或被删除）记入删除位图，
+        只索引crawl_time > since且尚未索引的文档，写入各分片的新段；
+        文档数、平均文档长度和文档频率在已有统计上增减，不重新读取已索引的文档。
+        没有已构建的索引或分析器不同时改为全量构建。
+
+        Args:
+            since: 上次构建的开始时间，None时检查全部文档
+
+        Returns:
+            {'added': 新索引的文档数, 'deleted': 删除的文档数}
+        """
+        if not self.live_docs.count and not self.live_docs.deleted_count:
+            logger.info("No existing BM25 index to update, running a full build")
+            self.build_index()
+            return {'added': self.doc_stats['total_docs'], 'deleted': 0}
+        if self.index_analyzer != self.text_processor.analyzer.name:
+            logger.info(f"Analyzer changed ({self.index_analyzer} -> {self.text_processor.analyzer.name}), "
+                        f"running a full build")
+            self.build_index()
+            return {'added': self.doc_stats['total_docs'], 'deleted': 0}
+
+        start_time = time.time()
+        logger.info(f"Starting incremental BM25 index update (crawl_time > {since})...")
+
+        try:
+            self.doc_freqs.clear()
+
+            removed = self.live_docs.missing_from(self.db_path)
+            self._delete_docs(removed)
+
+            source = DocumentSource(self.db_path, ('id', 'title', 'content'), batch_size=self.batch_size,
+                                    min_crawl_time=since)
+            added = 0
+            for batch_docs in source.batches():
+                # doc_id不会复用，已索引的文档内容没有变化
+                batch_docs = [row for row in batch_docs if not self.live_docs.is_indexed(row[0])]
+                if batch_docs:
+                    self._process_batch_for_index(batch_docs)
+                    added += len(batch_docs)
+
+            # 新文档刷新为各分片的新段
+            self._finalize_shards()
+            self._finalize_norms()
+            self.live_docs.save(self.index_path, BM25_LIVE_DOCS_FILE)
+            save_idf(self.index_path, self._live_doc_freqs(), self.doc_stats['total_docs'], len(self.vocabulary))
+
+            self.doc_stats['processing_time'] = time.time() - start_time
+            self.doc_stats['generation'] += 1
+            self._save_stats()
+
+            logger.info(f"BM25 index updated in {self.doc_stats['processing_time']:.2f} seconds: "
+                        f"{added} added, {len(removed)} deleted")
+            return {'added': added, 'deleted': len(removed)}
+
+        except Exception as e:
+            logger.error(f"Error updating BM25 index: {e}")
+            raise
+        finally:
+            self.token_store.close()
+            self.text_processor.close()
+
+    def _delete_docs(self, doc_ids: np.ndarray):
+        """删除文档：记入删除位图，从文档数和文档长度之和中减去，文档频率按分词缓存中的词项修正"""
+        if not len(doc_ids):
+            return
+        cached = self.token_store.cached_term_ids(doc_ids.tolist())
+        for doc_id in doc_ids.tolist():
+            self.live_docs.delete(doc_id, cached.get(doc_id))
+            self.norms.delete(doc_id)
+        if len(cached) < len(doc_ids):
+            logger.warning(f"{len(doc_ids) - len(cached)} deleted documents are not in the token store, "
+                           f"their document frequencies are not corrected")
+
+    def _live_doc_freqs(self) -> Dict[int, int]:
+        """现存文档的文档频率：各分片段词典中的文档频率减去已删除文档中的文档频率"""
+        doc_freqs = Counter()
+        for shard in self.shards.values():
+            doc_freqs.update(shard.get_doc_freqs())
+        doc_freqs.subtract(self.live_docs.deleted_doc_freqs)
+        return +doc_freqs
+
+    def _reset_build(self):
+        """清空已有的分片（分片在加载索引时也会创建，不能在构造时清空）和本次构建的统计，避免重复构建产生重复的倒排列表项"""
+        for shard in self.shards.values():
+            shard.clear()
+        self.doc_freqs.clear()
+        self.norms.clear()
+        self.live_docs.clear()
+        self.doc_stats['total_postings'] = 0
+    
+    def _build_part(self, start_id: Optional[int], end_id: Optional[int]) -> Dict[str, Any]:
+        """并行构建的工作进程中调用：把id范围内的文档构建到本构建器的分片中，返回本地统计"""
+        self._reset_build()
+        source = DocumentSource(self.db_path, ('id', 'title', 'content'), batch_size=self.batch_size,
+                                start_id=start_id, end_id=end_id)
+        self._build_inverted_index(source, source.count())
+        for shard in self.shards.values():
+            shard.finalize()
+        return {
+            'doc_freqs': self.doc_freqs,
+            'total_postings': self.doc_stats['total_postings'],
+            'norms': (self.norms.values[:self.norms.size], self.norms.count, self.norms.total),
+            'live_docs': self.live_docs.live_ids()
+        }
+    
+    def _merge_part_stats(self, parts: List[Dict[str, Any]]):
+        """并行构建的主进程中调用：合并各工作进程的统计（在归并分片之前，编码跳表需要全部文档长度）"""
+        for part in parts:
+            self.doc_freqs.update(part['doc_freqs'])
+            self.doc_stats['total_postings'] += part['total_postings']
+            self.norms.merge(*part['norms'])
+            self.live_docs.add_many(part['live_docs'])
     
-    def _build_inverted_index(self, cursor, total_docs):
+    def _build_inverted_index(self, source: DocumentSource, total_docs: int):
         """构建倒排索引"""
-        offset = 0
         processed_docs = 0
         
-        while offset < total_docs:
-            cursor.execute("""
-                SELECT id, title, content 
-                FROM pages 
-                ORDER BY id 
-                LIMIT ? OFFSET ?
-            """, (self.batch_size, offset))
-            
-            batch_docs = cursor.fetchall()
-            if not batch_docs:
-                break
-            
+        for batch_docs in source.batches():
             # 处理这批文档
             self._process_batch_for_index(batch_docs)
             
             processed_docs += len(batch_docs)
-            offset += self.batch_size
             
             logger.info(f"Built index for {processed_docs}/{total_docs} documents")
     
     def _process_batch_for_index(self, batch_docs: List[Tuple]):
         """处理一批文档构建索引"""
-        for doc_id, title, content in batch_docs:
+        for (doc_id, title, content), term_ids in zip(batch_docs, self._tokenize_batch(batch_docs)):
             try:
-                # 获取文档长度
-                doc_length = self.doc_stats['doc_lengths'].get(doc_id, 0)
+                # 记录文档长度（先于倒排列表项写入，分片刷新时编码跳表需要）
+                doc_length = len(term_ids)
+                self.norms.set(doc_id, doc_length)
+                self.live_docs.add(doc_id)
                 if doc_length == 0:
                     continue
                 
                 # 处理文档
-                term_positions, _ = self._process_document(doc_id, title, content)
+                term_positions = self._term_positions(term_ids)
                 
-                # 为每个term创建posting并添加到对应分片
-                for term, positions in term_positions.items():
-                    posting = BM25Posting(
-                        doc_id=doc_id,
-                        positions=positions,
-                        tf=len(positions),
-                        doc_length=doc_length
-                    )
-                    
-                    # 计算分片ID
-                    shard_id = self._get_shard_id(term)
+                # 为每个term添加倒排列表项（按列追加，不创建BM25Posting对象）
+                for term_id, positions in term_positions.items():
+                    # 根据全局词项ID计算分片ID
+                    shard_id = self._get_shard_id(term_id)
+                    self.doc_freqs[term_id] += 1
                     
                     # 添加到对应分片
-                    self.shards[shard_id].add_posting(term, posting)
+                    self.shards[shard_id].add(term_id, (doc_id, len(positions)), positions)
                     
                     # 更新统计信息
                     self.doc_stats['total_postings'] += 1
@@ -411,6 +435,8 @@ class BM25IndexBuilder:
         
         for shard in self.shards.values():
             shard.finalize()
+        # 保存词表并提交分词缓存
+        self.token_store.flush()
         
         # 计算总term数
         all_terms = set()
@@ -420,6 +446,28 @@ class BM25IndexBuilder:
         self.doc_stats['total_terms'] = len(all_terms)
         logger.info(f"Total unique terms: {self.doc_stats['total_terms']}")
     
+    def _finalize_norms(self):
+        """根据记录的文档长度计算文档数和平均文档长度，并保存文档长度数组"""
+        self.doc_stats['total_docs'] = self.norms.count
+        self.doc_stats['avg_doc_length'] = self.norms.average()
+        self.norms.save(self.index_path)
+        logger.info(f"Average document length: {self.doc_stats['avg_doc_length']:.2f}")
+    
+    def _load_stats(self):
+        """加载已有索引的统计信息（文档数、平均文档长度、索引代数等），供直接搜索已构建的索引"""
+        stats_file = os.path.join(self.index_path, "bm25_index_stats.json")
+        if not os.path.exists(stats_file):
+            return
+        try:
+            with open(stats_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            # 文档长度从bm25_norms.npy读取（旧版本统计文件中的doc_lengths忽略）；分析器以构造参数为准
+            self.doc_stats.update({key: value for key, value in saved.items()
+                                   if key not in ('doc_lengths', 'analyzer')})
+            self.index_analyzer = saved.get('analyzer')
+        except Exception as e:
+            logger.error(f"Error loading BM25 stats: {e}")
+    
     def _save_stats(self):
         """保存统计信息"""
         stats_file = os.path.join(self.index_path, "bm25_index_stats.json")
@@ -429,61 +477,143 @@ class BM25IndexBuilder:
         except Exception as e:
             logger.error(f"Error saving BM25 stats: {e}")
     
-    def search(self, query: str, max_results: int = 20) -> List[Dict]:
-        """BM25搜索功能"""
+    def search(self, query: str, max_results: int = 20, exhaustive: bool = False) -> List[Dict]:
+        """
+        BM25搜索功能
+
+        默认使用块最大分数剪枝（见top_k.py），只解码可能进入前max_results名的块；
+        exhaustive=True时对所有倒排列表项逐个计分，结果与剪枝检索完全相同
+        """
         # 分词
         query_terms = self.text_processor.tokenize(query)
         
         if not query_terms:
             return []
         
+        if exhaustive:
+            ranked = self._search_exhaustive(query_terms)[:max_results]
+        else:
+            ranked = block_max_top_k(self._posting_cursors(query_terms), max_results, self.static_rank.get)
+        
+        return [{'doc_id': doc_id, 'score': score} for doc_id, score in ranked]
+    
+    def _bm25_term_score(self, idf: float, tf, length_factor):
+        """
+        单个词项的BM25得分，length_factor为文档的长度归一化因子（见norms.py），
+        tf和length_factor可以是数值或NumPy数组（运算顺序与逐项计分相同）
+        """
+        numerator = tf * (self.k1 + 1)
+        denominator = tf + length_factor
+        return idf * (numerator / denominator)
+    
+    def _length_factors(self) -> np.ndarray:
+        """按doc_id索引的长度归一化因子（按当前的k1、b和平均文档长度缓存）"""
+        return self.norms.length_factors(self.k1, self.b, self.doc_stats['avg_doc_length'])
+    
+    def _posting_cursors(self, query_terms: List[str]) -> List[PostingCursor]:
+        """为每个查询词在每个段中的倒排列表创建游标（按查询词顺序，重复的查询词重复计分）"""
+        cursors_by_term: Dict[int, List[PostingCursor]] = {}
+        cursors = []
+        for term in query_terms:
+            term_id = self.vocabulary.get_id(term)
+            if term_id is None:
+                continue
+            if term_id not in cursors_by_term:
+                shard = self.shards[self._get_shard_id(term_id)]
+                encoded = shard.get_encoded_postings(term_id)
+                term_cursors = []
+                if encoded:
+                    idf = self._term_idf(term_id)
+                    term_cursors = [
+                        PostingCursor(shard.codec, block, self._block_scorer(idf), self._block_bound(idf),
+                                      self.norms.values, self._deleted_docs())
+                        for block in encoded
+                    ]
+                cursors_by_term[term_id] = term_cursors
+            cursors.extend(cursors_by_term[term_id])
+        return cursors
+    
+    def _deleted_docs(self) -> Optional[np.ndarray]:
+        """删除位图，没有已删除的文档时为None（检索时不过滤）"""
+        return self.live_docs.deleted if self.live_docs.deleted_count else None
+    
+    def _block_scorer(self, idf: float):
+        factors = self._length_factors()
+        return lambda columns: self._bm25_term_score(idf, columns['tf'], factors[columns['doc_id']])
+    
+    def _block_bound(self, idf: float):
+        """
+        块内最高分：得分随tf增大、随文档长度减小，IDF非负时为块内竞争性(tf, 文档长度)取值对（跳表中记录）的最高分；
+        IDF为负时得分恒为负，上界取0
+        """
+        def bound(index: BlockIndex) -> np.ndarray:
+            if idf < 0:
+                return np.zeros(len(index))
+            ends, tfs, lengths = index.impacts
+            # 与按doc_id预先计算的因子相同的运算，上界与文档得分一致
+            factors = bm25_length_factor(lengths, self.k1, self.b, self.doc_stats['avg_doc_length'] or 1)
+            scores = self._bm25_term_score(idf, tfs, factors)
+            # 每块至少有一个取值对
+            return np.maximum.reduceat(scores, np.concatenate(([0], ends[:-1])))
+        return bound
+    
+    def _search_exhaustive(self, query_terms: List[str]) -> List[Tuple[int, float]]:
+        """对所有倒排列表项逐个计分，返回全部文档的(doc_id, 得分)"""
         # 收集所有相关文档
         doc_scores = defaultdict(float)
         
         for term in query_terms:
-            shard_id = self._get_shard_id(term)
-            postings = self.shards[shard_id].get_postings(term)
+            term_id = self.vocabulary.get_id(term)
+            if term_id is None:
+                continue
+            # 按列读取倒排列表，不创建BM25Posting对象
+            columns = self.shards[self._get_shard_id(term_id)].get_columns(term_id)
             
-            if not postings:
+            if columns is None or not len(columns):
                 continue
             
             # 计算IDF
-            idf = self._calculate_idf(term)
+            idf = self._term_idf(term_id)
             
-            # 计算每个文档的BM25分数
-            for posting in postings:
-                doc_id = posting.doc_id
-                tf = posting.tf
-                doc_length = posting.doc_length
-                
-                # BM25公式
-                numerator = tf * (self.k1 + 1)
-                denominator = tf + self.k1 * (1 - self.b + self.b * doc_length / self.doc_stats['avg_doc_length'])
-                
-                bm25_score = idf * (numerator / denominator)
-                doc_scores[doc_id] += bm25_score
-        
-        # 排序并返回结果
-        sorted_docs = sorted(doc_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        results = []
-        for doc_id, score in sorted_docs[:max_results]:
-            results.append({
-                'doc_id': doc_id,
-                'score': score
-            })
-        
-        return results
+            # 整列计算BM25分数（跳过已删除的文档），再按倒排列表的顺序累加
+            doc_ids, tfs = columns.ints['doc_id'], columns.ints['tf']
+            deleted = self._deleted_docs()
+            if deleted is not None:
+                live = np.ones(len(doc_ids), dtype=bool)
+                in_range = doc_ids < len(deleted)
+                live[in_range] = ~deleted[doc_ids[in_range]]
+                doc_ids, tfs = doc_ids[live], tfs[live]
+            scores = self._bm25_term_score(idf, tfs, self._length_factors()[doc_ids])
+            for doc_id, score in zip(doc_ids.tolist(), scores.tolist()):
+                doc_scores[doc_id] += score
+        
+        # 排序，同分时按文档静态权重排序，再按doc_id
+        return sorted(doc_scores.items(), key=lambda x: (-x[1], -self.static_rank.get(x[0]), x[0]))
     
-    def _calculate_idf(self, term: str) -> float:
-        """计算逆文档频率(IDF)"""
-        doc_freq = 0
-        
-        # 统计包含该term的文档数
-        for shard in self.shards.values():
-            postings = shard.get_postings(term)
-            doc_freq += len(postings)
-        
+    def _term_idf(self, term_id: int) -> float:
+        """
+        词项的IDF
+
+        文档频率从段词典中读取（不解码倒排列表）并减去已删除文档中的文档频率，结果缓存在进程内，
+        以(索引目录, 索引代数)为键，重新构建索引后自动失效
+        """
+        key = (os.path.abspath(self.index_path), self.doc_stats['generation'])
+        with _idf_cache_lock:
+            cache = _idf_cache.get(key)
+            if cache is None:
+                # 同一索引目录只保留当前代的缓存
+                for stale in [cached for cached in _idf_cache if cached[0] == key[0]]:
+                    del _idf_cache[stale]
+                cache = _idf_cache[key] = {}
+            idf = cache.get(term_id)
+        if idf is None:
+            doc_freq = (self.shards[self._get_shard_id(term_id)].get_term_stats(term_id).doc_freq
+                        - self.live_docs.doc_freq_correction(term_id))
+            idf = cache[term_id] = self._calculate_idf(doc_freq)
+        return idf
+    
+    def _calculate_idf(self, doc_freq: int) -> float:
+        """根据文档频率（倒排列表长度）计算逆文档频率(IDF)"""
         if doc_freq == 0:
             return 0
         
@@ -0,0 +1,579 @@
+"""
+倒排列表编码
+
+一个倒排列表按BLOCK_SIZE个倒排列表项分块，编码为：
+
+    [flags: uint8] [n: varint] [跳表（多于一块时）] [块...]
+    块：[doc_id流] [其他整数字段流...] [列表长度流] [列表元素流] [可选列表元素流]
+
+- 跳表为uint32数组：每块的最后一个doc_id、结束位置，各整数字段（doc_id除外）在块内的最大值和最小值，
+  以及（可选）两个字段的竞争性取值对（如tf和文档长度，文档长度不保存在倒排列表中，编码时从norms数组读取），
+  查询时据此计算块内最高分，跳过整块或只解码需要的块（见top_k.py）；
+- 整数字段按列各自成流（doc_id、tf等）；
+- 列表字段（positions）按倒排列表项拼接成一个流，列表长度等于tf时省略长度流；
+- 可选列表字段（offsets）只在所有项都有值时写入。
+
+启用压缩（INDEX_OPTIMIZATION['enable_compression']）时，doc_id流（块的第一项相对上一块的最后一个doc_id）
+和列表元素流（在每一项内部）先做差分，每个流再按BLOCK_SIZE个值一组做位打包：每组一个字节的位宽，
+随后是按该位宽紧凑排列的值，打包和解包都是NumPy的整块运算；未启用压缩时每个值为4字节小端uint32。
+两种格式由flags区分，可以在同一个段中混合存在。
+
+内存中的倒排列表按列保存（PostingColumns/PostingBuffer）：各整数字段一列，列表字段按项拼接成一列，
+编码、解码和段合并都直接处理这些数组，倒排列表项对象只在需要时（如get_postings）按列生成。
+"""
+
+from array import array
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.indexer_config import INDEX_OPTIMIZATION
+
+BLOCK_SIZE = 128
+
+_FLAG_OPTIONAL = 1  # 写入了可选列表字段
+_FLAG_COMPRESSED = 2  # 差分+位打包
+_FLAG_LENGTHS_ARE_TF = 4  # 列表长度与tf相同，省略长度流
+
+_UINT32 = np.dtype('<u4')
+_SHIFTS = np.arange(32, dtype=np.uint32)
+_WEIGHTS = np.left_shift(np.uint64(1), np.arange(32, dtype=np.uint64))
+
+
+def pack_uints(values: np.ndarray) -> bytes:
+    """按BLOCK_SIZE个值一块做位打包（每块：1字节位宽 + 紧凑排列的值）"""
+    values = np.asarray(values, dtype=np.uint32)
+    out = bytearray()
+    for start in range(0, len(values), BLOCK_SIZE):
+        block = values[start:start + BLOCK_SIZE]
+        width = int(block.max()).bit_length()
+        out.append(width)
+        if width:
+            bits = ((block[:, None] >> _SHIFTS[:width]) & 1).astype(np.uint8)
+            out += np.packbits(bits, bitorder='little').tobytes()
+    return bytes(out)
+
+
+def unpack_uints(buffer: np.ndarray, pos: int, count: int) -> Tuple[np.ndarray, int]:
+    """从buffer（uint8数组）的pos处解包count个值，返回(值, 新位置)"""
+    values = np.zeros(count, dtype=np.uint32)
+    for start in range(0, count, BLOCK_SIZE):
+        size = min(BLOCK_SIZE, count - start)
+        width = int(buffer[pos])
+        pos += 1
+        if width:
+            num_bytes = (size * width + 7) // 8
+            bits = np.unpackbits(buffer[pos:pos + num_bytes], count=size * width, bitorder='little')
+            values[start:start + size] = bits.reshape(size, width) @ _WEIGHTS[:width]
+            pos += num_bytes
+    return values, pos
+
+
+def delta_encode(values: np.ndarray, starts: Optional[np.ndarray] = None, initial: int = 0) -> np.ndarray:
+    """差分编码，第一个值相对initial差分；给出starts时每一段（从starts中的位置开始）各自从0开始差分"""
+    previous = np.full(len(values), initial, dtype=np.uint32)
+    previous[1:] = values[:-1]
+    if starts is not None:
+        previous[starts[starts < len(values)]] = 0
+    # uint32减法按模2^32回绕，即使值不是递增的也能正确还原
+    return values - previous
+
+
+def delta_decode(deltas: np.ndarray, starts: Optional[np.ndarray] = None,
+                 lengths: Optional[np.ndarray] = None, initial: int = 0) -> np.ndarray:
+    """delta_encode的逆运算"""
+    values = np.cumsum(deltas, dtype=np.uint32)
+    if initial:
+        values += np.uint32(initial)
+    if starts is not None and len(values):
+        bases = np.zeros(len(starts), dtype=np.uint32)
+        bases[starts > 0] = values[starts[starts > 0] - 1]
+        values -= np.repeat(bases, lengths)
+    return values
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buffer: np.ndarray, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = int(buffer[pos])
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _pareto_frontier(higher: np.ndarray, lower: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(higher, lower)取值对中不被其他项占优（higher不更小且lower不更大）的取值对"""
+    order = np.lexsort((lower, -higher.astype(np.int64)))
+    higher, lower = higher[order], lower[order]
+    best_lower = np.minimum.accumulate(lower)
+    keep = np.ones(len(lower), dtype=bool)
+    keep[1:] = lower[1:] < best_lower[:-1]
+    return higher[keep], lower[keep]
+
+
+@dataclass
+class PostingColumns:
+    """
+    按列保存的倒排列表
+
+    各整数字段（int_fields）一列，列表字段按倒排列表项的顺序拼接为values，lengths为每项的列表长度；
+    可选列表字段只在所有项都有值时保存（与values等长），否则为None
+    """
+    ints: Dict[str, np.ndarray]
+    lengths: np.ndarray
+    values: np.ndarray
+    optional_values: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def take(self, order: np.ndarray) -> 'PostingColumns':
+        """按order重新排列倒排列表项（列表字段随之移动）"""
+        starts = np.cumsum(self.lengths, dtype=np.int64) - self.lengths
+        lengths = self.lengths[order]
+        new_starts = np.cumsum(lengths, dtype=np.int64) - lengths
+        index = np.repeat(starts[order] - new_starts, lengths) + np.arange(int(lengths.sum()), dtype=np.int64)
+        return PostingColumns(
+            {field: column[order] for field, column in self.ints.items()}, lengths, self.values[index],
+            self.optional_values[index] if self.optional_values is not None else None
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence['PostingColumns']) -> 'PostingColumns':
+        """依次拼接若干倒排列表，任一部分缺少可选列表字段时结果也不保存"""
+        if len(parts) == 1:
+            return parts[0]
+        optional = [part.optional_values for part in parts]
+        return cls(
+            {field: np.concatenate([part.ints[field] for part in parts]) for field in parts[0].ints},
+            np.concatenate([part.lengths for part in parts]),
+            np.concatenate([part.values for part in parts]),
+            np.concatenate(optional) if all(values is not None for values in optional) else None
+        )
+
+    @classmethod
+    def merge(cls, parts: Sequence['PostingColumns']) -> 'PostingColumns':
+        """拼接若干倒排列表并按doc_id（稳定）排序，各部分本身按doc_id有序"""
+        merged = cls.concat(parts)
+        if len(parts) > 1:
+            doc_ids = merged.ints['doc_id']
+            if len(doc_ids) > 1 and not np.all(doc_ids[1:] >= doc_ids[:-1]):
+                merged = merged.take(np.argsort(doc_ids, kind='stable'))
+        return merged
+
+
+class PostingBuffer:
+    """
+    构建时内存中的一个倒排列表，只追加
+
+    各列保存在array('I')中，每个倒排列表项只占几个uint32，不为每项创建对象和列表；
+    编码或读取时由columns()转换为PostingColumns
+    """
+
+    __slots__ = ('ints', 'lengths', 'values', 'optional_values')
+
+    def __init__(self, num_ints: int, optional: bool = False):
+        """
+        Args:
+            num_ints: 整数字段数（与PostingCodec的int_fields对应）
+            optional: 是否保存可选列表字段
+        """
+        self.ints = tuple(array('I') for _ in range(num_ints))
+        self.lengths = array('I')
+        self.values = array('I')
+        self.optional_values = array('I') if optional else None
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def int_column(self, index: int) -> np.ndarray:
+        """
+        第index个整数字段在array上的只读视图，不复制
+
+        视图存在期间array不能再追加（会抛出BufferError），只在持有分片锁时临时使用
+        """
+        return np.frombuffer(self.ints[index], dtype=np.uint32)
+
+    def append(self, row: Sequence[int], values: Sequence[int], optional_values: Optional[Sequence[int]] = None):
+        """
+        追加一个倒排列表项
+
+        Args:
+            row: 各整数字段的取值，按int_fields的顺序
+            values: 列表字段
+            optional_values: 可选列表字段，任一项缺少时整个倒排列表不再保存该字段
+        """
+        for column, value in zip(self.ints, row):
+            column.append(value)
+        self.lengths.append(len(values))
+        self.values.extend(values)
+        if self.optional_values is not None:
+            if optional_values is None:
+                self.optional_values = None
+            else:
+                self.optional_values.extend(optional_values)
+
+    def columns(self, int_fields: Sequence[str]) -> PostingColumns:
+        """复制为NumPy数组（array在被导出缓冲区时不能再追加）"""
+        def copy(values: array) -> np.ndarray:
+            return np.array(values, dtype=np.uint32)
+        return PostingColumns(
+            {field: copy(column) for field, column in zip(int_fields, self.ints)},
+            copy(self.lengths), copy(self.values),
+            copy(self.optional_values) if self.optional_values is not None else None
+        )
+
+
+@dataclass
+class BlockIndex:
+    """倒排列表的块索引：每BLOCK_SIZE个倒排列表项一块，记录每块的最后一个doc_id和各整数字段的最值"""
+    size: int  # 倒排列表项数
+    first_doc: int  # 第一个doc_id
+    last_doc: np.ndarray  # 每块最后一个doc_id
+    starts: np.ndarray  # 每块在编码数据中的起始位置
+    maxima: Dict[str, np.ndarray]  # 每块各整数字段（doc_id除外）的最大值
+    minima: Dict[str, np.ndarray]  # 每块各整数字段（doc_id除外）的最小值
+    # 每块的竞争性(impact_fields[0], impact_fields[1])取值对：impacts[0]为各块结束位置，其后为两个字段的取值
+    impacts: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.last_doc)
+
+
+class PostingCodec:
+    """倒排列表的编解码，字段布局由倒排列表项的类型决定"""
+
+    def __init__(self, posting_cls: type, int_fields: Sequence[str] = ('doc_id', 'tf'),
+                 list_field: str = 'positions', optional_list_field: Optional[str] = None,
+                 impact_fields: Optional[Tuple[str, str]] = None, compress: Optional[bool] = None):
+        """
+        Args:
+            posting_cls: 倒排列表项类型
+            int_fields: 整数字段，第一个必须是doc_id
+            list_field: 列表字段
+            optional_list_field: 可选的列表字段
+            impact_fields: (越大得分越高的字段, 越小得分越高的字段)，跳表中额外记录每块不被其他项同时
+                在两个字段上占优的取值对，对任何随前者增大、随后者减小的得分函数，块内最高分就是这些取值对的最高分；
+                不属于int_fields的字段是按doc_id索引的文档级取值（如文档长度），编码和读取块索引时由norms数组提供
+            compress: 是否差分+位打包，None时使用配置
+        """
+        self.posting_cls = posting_cls
+        self.int_fields = tuple(int_fields)
+        self.stat_fields = tuple(field for field in self.int_fields if field != 'doc_id')
+        self.list_field = list_field
+        self.optional_list_field = optional_list_field
+        self.impact_fields = tuple(impact_fields) if impact_fields else None
+        self._table_rows = 2 + 2 * len(self.stat_fields)
+        self.compress = INDEX_OPTIMIZATION.get('enable_compression', True) if compress is None else compress
+
+    @staticmethod
+    def _write_stream(out: bytearray, values: np.ndarray, compressed: bool):
+        if compressed:
+            out += pack_uints(values)
+        else:
+            out += values.astype(_UINT32, copy=False).tobytes()
+
+    @staticmethod
+    def _read_stream(buffer: np.ndarray, pos: int, count: int, compressed: bool) -> Tuple[np.ndarray, int]:
+        if compressed:
+            return unpack_uints(buffer, pos, count)
+        end = pos + 4 * count
+        return np.frombuffer(buffer[pos:end].tobytes(), dtype=_UINT32), end
+
+    # ---- 按列表示 ----
+
+    def new_buffer(self) -> PostingBuffer:
+        """创建一个空的内存倒排列表"""
+        return PostingBuffer(len(self.int_fields), self.optional_list_field is not None)
+
+    def append(self, buffer: PostingBuffer, posting: Any):
+        """把一个倒排列表项对象追加到内存倒排列表"""
+        optional = self.optional_list_field
+        buffer.append([getattr(posting, field) for field in self.int_fields], getattr(posting, self.list_field),
+                      getattr(posting, optional) if optional else None)
+
+    def columns(self, postings: Any) -> PostingColumns:
+        """把倒排列表（倒排列表项对象的列表、PostingBuffer或PostingColumns）转换为PostingColumns"""
+        if isinstance(postings, PostingColumns):
+            return postings
+        if isinstance(postings, PostingBuffer):
+            return postings.columns(self.int_fields)
+        n = len(postings)
+        list_field = self.list_field
+        optional = self.optional_list_field
+        ints = {
+            field: np.fromiter((getattr(p, field) for p in postings), dtype=np.uint32, count=n)
+            for field in self.int_fields
+        }
+        lengths = np.fromiter((len(getattr(p, list_field)) for p in postings), dtype=np.uint32, count=n)
+        values = np.fromiter(chain.from_iterable(getattr(p, list_field) for p in postings), dtype=np.uint32)
+        optional_values = None
+        if optional and all(getattr(p, optional) is not None for p in postings):
+            optional_values = np.fromiter(chain.from_iterable(getattr(p, optional) for p in postings),
+                                          dtype=np.uint32)
+        return PostingColumns(ints, lengths, values, optional_values)
+
+    def int_column(self, postings: Any, field: str) -> np.ndarray:
+        """
+        倒排列表（PostingBuffer或PostingColumns）的一个整数字段
+
+        PostingBuffer直接返回其数组上的视图，不复制其他字段（见PostingBuffer.int_column）
+        """
+        if isinstance(postings, PostingBuffer):
+            return postings.int_column(self.int_fields.index(field))
+        return self.columns(postings).ints[field]
+
+    def postings(self, columns: Any) -> List[Any]:
+        """按列生成倒排列表项对象（posting_cls）的列表"""
+        columns = self.columns(columns)
+        list_field = self.list_field
+        optional = self.optional_list_field
+        posting_cls = self.posting_cls
+        values = columns.values.tolist()
+        optional_values = columns.optional_values.tolist() if columns.optional_values is not None else None
+        rows = zip(*(columns.ints[field].tolist() for field in self.int_fields))
+        postings = []
+        offset = 0
+        for row, length in zip(rows, columns.lengths.tolist()):
+            kwargs = dict(zip(self.int_fields, row))
+            kwargs[list_field] = values[offset:offset + length]
+            if optional_values is not None:
+                kwargs[optional] = optional_values[offset:offset + length]
+            postings.append(posting_cls(**kwargs))
+            offset += length
+        return postings
+
+    # ---- 编码 ----
+
+    def encode(self, postings: Any, norms: Optional[np.ndarray] = None) -> bytes:
+        """
+        编码一个倒排列表（倒排列表项对象的列表、PostingBuffer或PostingColumns），
+        norms为impact_fields中文档级字段的取值（按doc_id索引）
+        """
+        posting_columns = self.columns(postings)
+        n = len(posting_columns)
+        compressed = self.compress
+        columns = posting_columns.ints
+        lengths = posting_columns.lengths
+        values = posting_columns.values
+        optional_values = posting_columns.optional_values if self.optional_list_field else None
+
+        flags = _FLAG_COMPRESSED if compressed else 0
+        if optional_values is not None:
+            flags |= _FLAG_OPTIONAL
+        if 'tf' in columns and np.array_equal(lengths, columns['tf']):
+            flags |= _FLAG_LENGTHS_ARE_TF
+
+        value_ends = np.cumsum(lengths, dtype=np.int64)
+        blocks = []
+        for start in range(0, n, BLOCK_SIZE):
+            end = min(start + BLOCK_SIZE, n)
+            value_start = int(value_ends[start - 1]) if start else 0
+            value_end = int(value_ends[end - 1]) if end else 0
+            previous_doc = int(columns['doc_id'][start - 1]) if start else 0
+            blocks.append(self._encode_block(
+                {field: column[start:end] for field, column in columns.items()},
+                lengths[start:end], values[value_start:value_end],
+                optional_values[value_start:value_end] if optional_values is not None else None,
+                previous_doc, flags
+            ))
+
+        out = bytearray([flags])
+        _write_varint(out, n)
+        if len(blocks) > 1:
+            # 跳表：每块的最后一个doc_id、结束位置，各统计字段的最大值和最小值，以及竞争性取值对
+            maxima, minima, impacts = self._block_stats(columns, n, norms)
+            table = [columns['doc_id'][np.minimum(np.arange(BLOCK_SIZE, n + BLOCK_SIZE, BLOCK_SIZE), n) - 1],
+                     np.cumsum([len(block) for block in blocks])]
+            for field in self.stat_fields:
+                table += [maxima[field], minima[field]]
+            out += np.asarray(table, dtype=_UINT32).tobytes()
+            if impacts is not None:
+                out += np.concatenate(impacts).astype(_UINT32).tobytes()
+        for block in blocks:
+            out += block
+        return bytes(out)
+
+    def _block_stats(self, columns: Dict[str, np.ndarray], n: int,
+                     norms: Optional[np.ndarray]) -> Tuple[Any, ...]:
+        """每块各统计字段的最大值和最小值，以及impact_fields的竞争性取值对"""
+        block_starts = np.arange(0, n, BLOCK_SIZE)
+        maxima = {field: np.maximum.reduceat(columns[field], block_starts) for field in self.stat_fields}
+        minima = {field: np.minimum.reduceat(columns[field], block_starts) for field in self.stat_fields}
+        impacts = None
+        if self.impact_fields:
+            higher, lower = (self._impact_column(columns, field, norms) for field in self.impact_fields)
+            frontiers = [_pareto_frontier(higher[start:start + BLOCK_SIZE], lower[start:start + BLOCK_SIZE])
+                         for start in block_starts.tolist()]
+            impacts = (
+                np.cumsum([len(first) for first, _ in frontiers], dtype=np.int64),
+                np.concatenate([first for first, _ in frontiers]) if frontiers else np.zeros(0, dtype=np.uint32),
+                np.concatenate([second for _, second in frontiers]) if frontiers else np.zeros(0, dtype=np.uint32)
+            )
+        return maxima, minima, impacts
+
+    @staticmethod
+    def _impact_column(columns: Dict[str, np.ndarray], field: str, norms: Optional[np.ndarray]) -> np.ndarray:
+        if field in columns:
+            return columns[field]
+        if norms is None:
+            raise ValueError(f"norms are required for impact field '{field}'")
+        return np.asarray(norms[columns['doc_id']], dtype=np.uint32)
+
+    def _encode_block(self, columns: Dict[str, np.ndarray], lengths: np.ndarray, values: np.ndarray,
+                      optional_values: Optional[np.ndarray], previous_doc: int, flags: int) -> bytes:
+        compressed = bool(flags & _FLAG_COMPRESSED)
+        starts = np.cumsum(lengths, dtype=np.int64) - lengths if compressed else None
+        out = bytearray()
+        for field in self.int_fields:
+            column = columns[field]
+            if compressed and field == 'doc_id':
+                # 第一项相对上一块的最后一个doc_id差分，每块可以单独解码
+                column = delta_encode(column, initial=previous_doc)
+            self._write_stream(out, column, compressed)
+        if not flags & _FLAG_LENGTHS_ARE_TF:
+            self._write_stream(out, lengths, compressed)
+        for stream in (values, optional_values):
+            if stream is not None:
+                self._write_stream(out, delta_encode(stream, starts) if compressed else stream, compressed)
+        return bytes(out)
+
+    # ---- 解码 ----
+
+    def _header(self, buffer: np.ndarray) -> Tuple[int, int, int]:
+        flags = int(buffer[0])
+        n, pos = _read_varint(buffer, 1)
+        return flags, n, pos
+
+    def count(self, buffer: np.ndarray) -> int:
+        """倒排列表项数"""
+        return self._header(buffer)[1]
+
+    def block_index(self, buffer: np.ndarray, norms: Optional[np.ndarray] = None) -> BlockIndex:
+        """读取倒排列表的块索引；只有一块时解码该块计算（需要与编码时相同的norms）"""
+        flags, n, pos = self._header(buffer)
+        num_blocks = -(-n // BLOCK_SIZE)
+        if num_blocks <= 1:
+            columns = self._decode_int_columns(buffer, pos, n, flags, 0)
+            maxima, minima, impacts = self._block_stats(columns, n, norms)
+            return BlockIndex(size=n, first_doc=int(columns['doc_id'][0]) if n else 0,
+                              last_doc=columns['doc_id'][-1:], starts=np.full(num_blocks, pos, dtype=np.int64),
+                              maxima=maxima, minima=minima, impacts=impacts)
+        rows = self._table_rows
+        table_size = 4 * rows * num_blocks
+        table = np.frombuffer(buffer[pos:pos + table_size].tobytes(), dtype=_UINT32).reshape(rows, num_blocks)
+        impacts = None
+        if self.impact_fields:
+            impact_start = pos + table_size
+            ends = np.frombuffer(buffer[impact_start:impact_start + 4 * num_blocks].tobytes(), dtype=_UINT32)
+            total = int(ends[-1])
+            pairs = np.frombuffer(buffer[impact_start + 4 * num_blocks:impact_start + 4 * (num_blocks + 2 * total)]
+                                  .tobytes(), dtype=_UINT32)
+            impacts = (ends.astype(np.int64), pairs[:total], pairs[total:])
+        data_start = self._data_start(buffer, pos, num_blocks)
+        # doc_id流在块的最前面，第一个值（相对0差分）就是第一个doc_id
+        first_docs, _ = self._read_stream(buffer, data_start, BLOCK_SIZE, bool(flags & _FLAG_COMPRESSED))
+        starts = np.empty(num_blocks, dtype=np.int64)
+        starts[0] = data_start
+        starts[1:] = data_start + table[1, :-1].astype(np.int64)
+        return BlockIndex(
+            size=n,
+            first_doc=int(first_docs[0]),
+            last_doc=table[0],
+            starts=starts,
+            maxima={field: table[2 + 2 * i] for i, field in enumerate(self.stat_fields)},
+            minima={field: table[3 + 2 * i] for i, field in enumerate(self.stat_fields)},
+            impacts=impacts
+        )
+
+    def _data_start(self, buffer: np.ndarray, pos: int, num_blocks: int) -> int:
+        """跳过跳表，返回第一块的起始位置"""
+        if num_blocks <= 1:
+            return pos
+        pos += 4 * self._table_rows * num_blocks
+        if self.impact_fields:
+            total = int(np.frombuffer(buffer[pos + 4 * (num_blocks - 1):pos + 4 * num_blocks].tobytes(),
+                                      dtype=_UINT32)[0])
+            pos += 4 * (num_blocks + 2 * total)
+        return pos
+
+    def _decode_int_columns(self, buffer: np.ndarray, pos: int, count: int, flags: int,
+                        previous_doc: int) -> Dict[str, np.ndarray]:
+        columns, _ = self._decode_block_columns(buffer, pos, count, flags, previous_doc)
+        return columns
+
+    def _decode_block_columns(self, buffer: np.ndarray, pos: int, count: int, flags: int,
+                              previous_doc: int) -> Tuple[Dict[str, np.ndarray], int]:
+        compressed = bool(flags & _FLAG_COMPRESSED)
+        columns = {}
+        for field in self.int_fields:
+            column, pos = self._read_stream(buffer, pos, count, compressed)
+            if compressed and field == 'doc_id':
+                column = delta_decode(column, initial=previous_doc)
+            columns[field] = column
+        return columns, pos
+
+    def decode_block(self, buffer: np.ndarray, index: BlockIndex, block: int) -> Dict[str, np.ndarray]:
+        """只解码第block块的整数字段（doc_id、tf等），返回字段名到数组的映射"""
+        flags = int(buffer[0])
+        count = min(BLOCK_SIZE, index.size - block * BLOCK_SIZE)
+        previous_doc = int(index.last_doc[block - 1]) if block else 0
+        return self._decode_int_columns(buffer, int(index.starts[block]), count, flags, previous_doc)
+
+    def decode_columns(self, buffer: np.ndarray) -> PostingColumns:
+        """按列解码一个倒排列表（buffer为该列表的uint8数组），不创建倒排列表项对象"""
+        flags, n, pos = self._header(buffer)
+        compressed = bool(flags & _FLAG_COMPRESSED)
+        pos = self._data_start(buffer, pos, -(-n // BLOCK_SIZE))
+
+        ints: Dict[str, List[np.ndarray]] = {field: [] for field in self.int_fields}
+        all_lengths = []
+        all_values = []
+        all_optional = [] if flags & _FLAG_OPTIONAL else None
+        previous_doc = 0
+        for start in range(0, n, BLOCK_SIZE):
+            count = min(BLOCK_SIZE, n - start)
+            columns, pos = self._decode_block_columns(buffer, pos, count, flags, previous_doc)
+            previous_doc = int(columns['doc_id'][-1])
+            if flags & _FLAG_LENGTHS_ARE_TF:
+                lengths = columns['tf']
+            else:
+                lengths, pos = self._read_stream(buffer, pos, count, compressed)
+            total = int(lengths.sum())
+            starts = np.cumsum(lengths, dtype=np.int64) - lengths if compressed else None
+
+            values, pos = self._read_stream(buffer, pos, total, compressed)
+            if compressed:
+                values = delta_decode(values, starts, lengths)
+            if all_optional is not None:
+                optional_values, pos = self._read_stream(buffer, pos, total, compressed)
+                if compressed:
+                    optional_values = delta_decode(optional_values, starts, lengths)
+                all_optional.append(optional_values)
+
+            for field, column in columns.items():
+                ints[field].append(column)
+            all_lengths.append(lengths)
+            all_values.append(values)
+
+        def concat(parts: List[np.ndarray]) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+        return PostingColumns(
+            {field: concat(parts) for field, parts in ints.items()}, concat(all_lengths), concat(all_values),
+            concat(all_optional) if all_optional is not None else None
+        )
+
+    def decode(self, buffer: np.ndarray) -> List[Any]:
+        """解码一个倒排列表（buffer为该列表的uint8数组）为倒排列表项对象的列表"""
+        return self.postings(self.decode_columns(buffer))
@@ -0,0 +1,176 @@
+"""
+流式读取爬虫数据库中的文档
+
+按id分批读取pages表，使用键集分页（WHERE id > 上一批最后的id ORDER BY id LIMIT n），
+每批都从索引定位，读取全部文档的代价与文档数成线性关系（LIMIT/OFFSET分页需要重新扫描前面的全部行）。
+后台线程预取下一批，读取与分词/建索引重叠进行。
+
+连接以只读方式打开；数据库没有未检查点的WAL文件时使用immutable模式（SQLite不加锁、不检测文件变化），
+因此读取期间不应有写入。可以按id范围和爬取时间过滤，供并行构建切分语料（split_id_ranges）
+或增量构建只读取新文档。
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 预取的批数
+PREFETCH_BATCHES = 2
+
+_END = object()
+
+
+class DocumentSource:
+    """pages表的流式读取器，每批为按id升序的行元组列表（第一列为id）"""
+
+    def __init__(self, db_path: str, columns: Sequence[str] = ('id', 'title', 'content'),
+                 batch_size: int = 1000, start_id: Optional[int] = None, end_id: Optional[int] = None,
+                 min_crawl_time: Optional[float] = None, prefetch: int = PREFETCH_BATCHES,
+                 immutable: Optional[bool] = None):
+        """
+        Args:
+            db_path: 爬虫数据库路径
+            columns: 读取的列，第一列必须是id
+            batch_size: 每批文档数
+            start_id: 只读取id >= start_id的文档
+            end_id: 只读取id < end_id的文档
+            min_crawl_time: 只读取crawl_time > min_crawl_time的文档
+            prefetch: 后台预取的批数，0表示不使用后台线程
+            immutable: 是否以immutable模式打开，None时在没有未检查点的WAL文件时使用
+        """
+        if columns[0] != 'id':
+            raise ValueError("the first column must be 'id'")
+        self.db_path = db_path
+        self.columns = tuple(columns)
+        self.batch_size = max(1, batch_size)
+        self.start_id = start_id
+        self.end_id = end_id
+        self.min_crawl_time = min_crawl_time
+        self.prefetch = prefetch
+        if immutable is None:
+            wal_path = f"{db_path}-wal"
+            immutable = not (os.path.exists(wal_path) and os.path.getsize(wal_path) > 0)
+        self.immutable = immutable
+
+    def _connect(self) -> sqlite3.Connection:
+        mode = "ro&immutable=1" if self.immutable else "ro"
+        return sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode={mode}", uri=True)
+
+    def _filters(self) -> Tuple[List[str], List]:
+        """id范围和爬取时间的过滤条件"""
+        conditions, params = [], []
+        if self.start_id is not None:
+            conditions.append("id >= ?")
+            params.append(self.start_id)
+        if self.end_id is not None:
+            conditions.append("id < ?")
+            params.append(self.end_id)
+        if self.min_crawl_time is not None:
+            conditions.append("crawl_time > ?")
+            params.append(self.min_crawl_time)
+        return conditions, params
+
+    def count(self) -> int:
+        """符合过滤条件的文档数"""
+        conditions, params = self._filters()
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        conn = self._connect()
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM pages{where}", params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def split_id_ranges(self, parts: int) -> List[Tuple[Optional[int], Optional[int]]]:
+        """
+        把符合过滤条件的文档按id切成最多parts段，每段文档数大致相同
+
+        Returns:
+            [(start_id, end_id)]，首尾相接，可作为新的DocumentSource的start_id/end_id
+        """
+        total = self.count()
+        parts = max(1, min(parts, total))
+        conditions, params = self._filters()
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        boundaries = []
+        conn = self._connect()
+        try:
+            for part in range(1, parts):
+                row = conn.execute(f"SELECT id FROM pages{where} ORDER BY id LIMIT 1 OFFSET ?",
+                                   params + [part * total // parts]).fetchone()
+                boundaries.append(row[0])
+        finally:
+            conn.close()
+        return list(zip([self.start_id] + boundaries, boundaries + [self.end_id]))
+
+    def _read_batches(self) -> Iterator[List[Tuple]]:
+        """在当前线程中按键集分页读取"""
+        conditions, params = self._filters()
+        query = (f"SELECT {', '.join(self.columns)} FROM pages "
+                 f"WHERE {' AND '.join(conditions + ['id > ?'])} ORDER BY id LIMIT ?")
+        last_id = None
+        conn = self._connect()
+        try:
+            while True:
+                # 第一批没有上一批的id，用最小的整数代替
+                batch = conn.execute(query, params + [-2 ** 63 if last_id is None else last_id,
+                                                      self.batch_size]).fetchall()
+                if not batch:
+                    return
+                yield batch
+                if len(batch) < self.batch_size:
+                    return
+                last_id = batch[-1][0]
+        finally:
+            conn.close()
+
+    def batches(self) -> Iterator[List[Tuple]]:
+        """按id升序逐批返回文档"""
+        if self.prefetch <= 0:
+            yield from self._read_batches()
+            return
+
+        batches: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            # 消费者提前结束时不再阻塞
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for batch in self._read_batches():
+                    if not put(batch):
+                        return
+                put(_END)
+            except Exception as e:
+                put(e)
+
+        thread = threading.Thread(target=produce, name="doc-source-prefetch", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def __iter__(self) -> Iterator[Tuple]:
+        """按id升序逐个返回文档"""
+        for batch in self.batches():
+            yield from batch
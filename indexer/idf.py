@@ -0,0 +1,78 @@
+"""
+语料IDF表
+
+构建索引时统计每个词项的文档频率，按全局词表ID写成稠密的float32数组（idf.npy），
+供关键词提取等场景按词项查询IDF；读取时以内存映射方式加载，只在首次使用时打开一次
+"""
+
+import logging
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from .vocabulary import Vocabulary
+
+logger = logging.getLogger(__name__)
+
+IDF_FILE = "idf.npy"
+
+
+def smooth_idf(doc_freq, total_docs: int):
+    """平滑IDF：log((N + 1) / (df + 1)) + 1，恒为正，未出现过的词取最大值"""
+    return np.log((total_docs + 1) / (np.asarray(doc_freq, dtype=np.float64) + 1)) + 1
+
+
+def save_idf(index_path: str, doc_freqs: Dict[int, int], total_docs: int, vocab_size: int):
+    """
+    按文档频率计算IDF并保存
+
+    Args:
+        index_path: 索引目录
+        doc_freqs: 词项ID -> 文档频率
+        total_docs: 文档总数
+        vocab_size: 词表大小（没有出现在doc_freqs中的词项按文档频率0计算）
+    """
+    df = np.zeros(vocab_size, dtype=np.int64)
+    if doc_freqs:
+        ids = np.fromiter(doc_freqs.keys(), dtype=np.int64, count=len(doc_freqs))
+        df[ids] = np.fromiter(doc_freqs.values(), dtype=np.int64, count=len(doc_freqs))
+    idf = smooth_idf(df, total_docs).astype(np.float32)
+
+    os.makedirs(index_path, exist_ok=True)
+    tmp_path = os.path.join(index_path, f"{IDF_FILE}.tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, idf)
+    os.replace(tmp_path, os.path.join(index_path, IDF_FILE))
+    logger.info(f"Saved IDF table for {vocab_size} terms over {total_docs} documents")
+
+
+class IdfTable:
+    """只读的IDF表，接口与dict.get一致，可直接传给TextProcessor.extract_keywords"""
+
+    def __init__(self, index_path: str = "data/indexer", vocabulary: Optional[Vocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary(index_path)
+        path = os.path.join(index_path, IDF_FILE)
+        self.values = np.load(path, mmap_mode='r') if os.path.exists(path) else np.zeros(0, dtype=np.float32)
+        # 词表中不存在的词按最稀有的词对待
+        self.default = float(self.values.max()) if len(self.values) else 1.0
+
+    @classmethod
+    def load(cls, index_path: str = "data/indexer") -> Optional['IdfTable']:
+        """索引目录中有IDF表时加载，否则返回None"""
+        if not os.path.exists(os.path.join(index_path, IDF_FILE)):
+            return None
+        return cls(index_path)
+
+    def get(self, term: str, default: Optional[float] = None) -> float:
+        """获取词项的IDF"""
+        term_id = self.vocabulary.get_id(term)
+        if term_id is None or term_id >= len(self.values):
+            return self.default if default is None else default
+        return float(self.values[term_id])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __bool__(self) -> bool:
+        return len(self.values) > 0
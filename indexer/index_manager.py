@@ -7,6 +7,8 @@ from pathlib import Path
 
 from .inverted_index import InvertedIndexBuilder
 from .bm25_indexer import BM25IndexBuilder
+from .segment import SEGMENT_SUFFIX
+from utils.text_processor import get_index_analyzer
 from config.settings import INDEXER_CONFIG
 
 logging.basicConfig(level=logging.INFO)
@@ -64,10 +66,15 @@ class IndexManager:
             logger.error(f"Error saving index status: {e}")
     
     def build_basic_index(self, num_shards: int = 16, batch_size: int = 1000, 
-                         max_memory_size: int = 10000) -> bool:
-        """构建基础倒排索引"""
+                         max_memory_size: int = 10000,
+                         tokenize_workers: Optional[int] = None,
+                         analyzer: Optional[str] = None,
+                         workers: int = 1) -> bool:
+        """构建基础倒排索引（workers>1时多进程并行构建）"""
         try:
             logger.info("Building basic inverted index...")
+            # 记录开始时间：构建期间爬取的页面由下次增量构建索引
+            start_time = time.time()
             
             # 创建索引构建器
             self.basic_indexer = InvertedIndexBuilder(
@@ -75,15 +82,17 @@ class IndexManager:
                 index_path=self.index_path,
                 num_shards=num_shards,
                 batch_size=batch_size,
-                max_memory_size=max_memory_size
+                max_memory_size=max_memory_size,
+                tokenize_workers=tokenize_workers,
+                analyzer=analyzer
             )
             
             # 构建索引
-            self.basic_indexer.build_index()
+            self.basic_indexer.build_index(workers=workers)
             
             # 更新状态
             self.index_status['basic_index']['built'] = True
-            self.index_status['basic_index']['last_updated'] = time.time()
+            self.index_status['basic_index']['last_updated'] = start_time
             self._save_index_status()
             
             logger.info("Basic inverted index built successfully")
@@ -94,10 +103,14 @@ class IndexManager:
             return False
     
     def build_bm25_index(self, num_shards: int = 16, batch_size: int = 1000, 
-                        max_memory_size: int = 10000) -> bool:
-        """构建BM25倒排索引"""
+                        max_memory_size: int = 10000,
+                        tokenize_workers: Optional[int] = None,
+                        analyzer: Optional[str] = None,
+                        workers: int = 1) -> bool:
+        """构建BM25倒排索引（workers>1时多进程并行构建）"""
         try:
             logger.info("Building BM25 inverted index...")
+            start_time = time.time()
             
             # 创建BM25索引构建器
             self.bm25_indexer = BM25IndexBuilder(
@@ -105,15 +118,17 @@ class IndexManager:
                 index_path=self.index_path,
                 num_shards=num_shards,
                 batch_size=batch_size,
-                max_memory_size=max_memory_size
+                max_memory_size=max_memory_size,
+                tokenize_workers=tokenize_workers,
+                analyzer=analyzer
             )
             
             # 构建索引
-            self.bm25_indexer.build_index()
+            self.bm25_indexer.build_index(workers=workers)
             
             # 更新状态
             self.index_status['bm25_index']['built'] = True
-            self.index_status['bm25_index']['last_updated'] = time.time()
+            self.index_status['bm25_index']['last_updated'] = start_time
             self._save_index_status()
             
             logger.info("BM25 inverted index built successfully")
@@ -124,7 +139,10 @@ class IndexManager:
             return False
     
     def build_all_indexes(self, num_shards: int = 16, batch_size: int = 1000, 
-                         max_memory_size: int = 10000) -> Dict[str, bool]:
+                         max_memory_size: int = 10000,
+                         tokenize_workers: Optional[int] = None,
+                         analyzer: Optional[str] = None,
+                         workers: int = 1) -> Dict[str, bool]:
         """构建所有类型的索引"""
         results = {}
         
@@ -132,18 +150,100 @@ class IndexManager:
         results['basic_index'] = self.build_basic_index(
             num_shards=num_shards,
             batch_size=batch_size,
-            max_memory_size=max_memory_size
+            max_memory_size=max_memory_size,
+            tokenize_workers=tokenize_workers,
+            analyzer=analyzer,
+            workers=workers
         )
         
         # 构建BM25索引
         results['bm25_index'] = self.build_bm25_index(
             num_shards=num_shards,
             batch_size=batch_size,
-            max_memory_size=max_memory_size
+            max_memory_size=max_memory_size,
+            tokenize_workers=tokenize_workers,
+            analyzer=analyzer,
+            workers=workers
         )
         
         return results
     
+    def update_basic_index(self, num_shards: int = 16, batch_size: int = 1000,
+                           max_memory_size: int = 10000,
+                           tokenize_workers: Optional[int] = None,
+                           analyzer: Optional[str] = None) -> bool:
+        """增量更新基础倒排索引：只索引上次构建之后爬取的页面，被替换的页面记入删除位图"""
+        try:
+            since = self.index_status['basic_index']['last_updated']
+            logger.info(f"Updating basic inverted index (since {since})...")
+            start_time = time.time()
+            
+            self.basic_indexer = InvertedIndexBuilder(
+                db_path=self.db_path,
+                index_path=self.index_path,
+                num_shards=num_shards,
+                batch_size=batch_size,
+                max_memory_size=max_memory_size,
+                tokenize_workers=tokenize_workers,
+                analyzer=analyzer
+            )
+            result = self.basic_indexer.update_index(since)
+            
+            self.index_status['basic_index']['built'] = True
+            self.index_status['basic_index']['last_updated'] = start_time
+            self._save_index_status()
+            
+            logger.info(f"Basic inverted index updated: {result}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error updating basic index: {e}")
+            return False
+    
+    def update_bm25_index(self, num_shards: int = 16, batch_size: int = 1000,
+                          max_memory_size: int = 10000,
+                          tokenize_workers: Optional[int] = None,
+                          analyzer: Optional[str] = None) -> bool:
+        """增量更新BM25倒排索引：只索引上次构建之后爬取的页面，被替换的页面记入删除位图"""
+        try:
+            since = self.index_status['bm25_index']['last_updated']
+            logger.info(f"Updating BM25 inverted index (since {since})...")
+            start_time = time.time()
+            
+            self.bm25_indexer = BM25IndexBuilder(
+                db_path=self.db_path,
+                index_path=self.index_path,
+                num_shards=num_shards,
+                batch_size=batch_size,
+                max_memory_size=max_memory_size,
+                tokenize_workers=tokenize_workers,
+                analyzer=analyzer
+            )
+            result = self.bm25_indexer.update_index(since)
+            
+            self.index_status['bm25_index']['built'] = True
+            self.index_status['bm25_index']['last_updated'] = start_time
+            self._save_index_status()
+            
+            logger.info(f"BM25 inverted index updated: {result}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error updating BM25 index: {e}")
+            return False
+    
+    def update_all_indexes(self, num_shards: int = 16, batch_size: int = 1000,
+                           max_memory_size: int = 10000,
+                           tokenize_workers: Optional[int] = None,
+                           analyzer: Optional[str] = None) -> Dict[str, bool]:
+        """增量更新所有类型的索引"""
+        options = dict(num_shards=num_shards, batch_size=batch_size, max_memory_size=max_memory_size,
+                       tokenize_workers=tokenize_workers, analyzer=analyzer)
+        return {
+            'basic_index': self.update_basic_index(**options),
+            'bm25_index': self.update_bm25_index(**options)
+        }
+    
     def load_basic_index(self) -> Optional[InvertedIndexBuilder]:
         """加载基础索引"""
         if not self.index_status['basic_index']['built']:
@@ -152,7 +252,7 @@ class IndexManager:
         
         try:
             # 检查索引文件是否存在
-            shard_files = [f for f in os.listdir(self.index_path) if f.startswith('shard_') and f.endswith('.pkl')]
+            shard_files = [f for f in os.listdir(self.index_path) if f.startswith('shard_') and f.endswith(SEGMENT_SUFFIX)]
             if not shard_files:
                 logger.warning("No basic index files found")
                 return None
@@ -163,7 +263,8 @@ class IndexManager:
                 index_path=self.index_path,
                 num_shards=64,  # 默认分片数
                 batch_size=1000,
-                max_memory_size=10000
+                max_memory_size=10000,
+                analyzer=get_index_analyzer(os.path.join(self.index_path, "index_stats.json")).name
             )
             
             logger.info("Basic index loaded successfully")
@@ -181,7 +282,7 @@ class IndexManager:
         
         try:
             # 检查索引文件是否存在
-            shard_files = [f for f in os.listdir(self.index_path) if f.startswith('bm25_shard_') and f.endswith('.pkl')]
+            shard_files = [f for f in os.listdir(self.index_path) if f.startswith('bm25_shard_') and f.endswith(SEGMENT_SUFFIX)]
             if not shard_files:
                 logger.warning("No BM25 index files found")
                 return None
@@ -192,7 +293,8 @@ class IndexManager:
                 index_path=self.index_path,
                 num_shards=16,  # 默认分片数
                 batch_size=1000,
-                max_memory_size=10000
+                max_memory_size=10000,
+                analyzer=get_index_analyzer(os.path.join(self.index_path, "bm25_index_stats.json")).name
             )
             
             logger.info("BM25 index loaded successfully")
@@ -393,8 +495,7 @@ def main():
         stats = manager.get_index_stats("bm25")
         print(f"\nBM25 Index Statistics:")
         for key, value in stats.items():
-            if key != 'doc_lengths':  # 跳过大的字典
-                print(f"  {key}: {value}")
+            print(f"  {key}: {value}")
 
 if __name__ == "__main__":
     main()
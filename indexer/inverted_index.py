@@ -1,16 +1,22 @@
 import sqlite3
-import pickle
-import hashlib
 import os
 import logging
 import time
-from typing import Dict, List, Set, Tuple, Optional, Any
-from collections import defaultdict, deque
+from typing import Dict, List, Sequence, Set, Tuple, Optional, Any
+from collections import Counter, defaultdict, deque
 import threading
 from dataclasses import dataclass
 import json
 
-from utils.text_processor import TextProcessor
+from utils.text_processor import TextProcessor, get_analyzer
+from .vocabulary import Vocabulary
+from .token_store import TokenStore, document_text
+from .doc_source import DocumentSource
+from .parallel_build import build_parallel
+from .idf import save_idf
+from .live_docs import LIVE_DOCS_FILE, LiveDocs
+from .codec import PostingCodec
+from .segment import SegmentedShard
 from config.settings import INDEXER_CONFIG
 
 logging.basicConfig(level=logging.INFO)
@@ -22,12 +28,14 @@ class Posting:
     doc_id: int
     positions: List[int]  # 词在文档中的位置
     tf: int  # 词频
+    offsets: Optional[List[int]] = None  # 词在"标题 内容"文本中的起始字符偏移，与positions一一对应
     
     def to_dict(self) -> Dict:
         return {
             'doc_id': self.doc_id,
             'positions': self.positions,
-            'tf': self.tf
+            'tf': self.tf,
+            'offsets': self.offsets
         }
     
     @classmethod
@@ -35,153 +43,26 @@ class Posting:
         return cls(
             doc_id=data['doc_id'],
             positions=data['positions'],
-            tf=data['tf']
+            tf=data['tf'],
+            offsets=data.get('offsets')
         )
 
-class InvertedIndexShard:
-    """倒排索引分片，负责管理单个分片的内存和磁盘存储"""
-    
-    def __init__(self, shard_id: int, base_path: str, max_memory_size: int = 100, clear_disk: bool = True):
-        self.shard_id = shard_id
-        self.base_path = base_path
-        self.max_memory_size = max_memory_size
-        
-        # 内存中的倒排索引
-        self.memory_index: Dict[str, List[Posting]] = {}
-        self.memory_size = 0
-        
-        # 磁盘文件路径
-        self.disk_file = os.path.join(base_path, f"shard_{shard_id}.pkl")
-        self.metadata_file = os.path.join(base_path, f"shard_{shard_id}_metadata.json")
-        
-        # 锁用于线程安全
-        self.lock = threading.Lock()
-        
-        # 清空磁盘文件
-        if clear_disk:
-            if os.path.exists(self.disk_file):
-                os.remove(self.disk_file)
-            if os.path.exists(self.metadata_file):
-                os.remove(self.metadata_file)
+def _live_postings(postings: List[Posting], live_docs: LiveDocs) -> List[Posting]:
+    """去掉已删除文档的倒排列表项"""
+    if not live_docs.deleted_count:
+        return postings
+    return [posting for posting in postings if live_docs.is_live(posting.doc_id)]
 
-        # 加载元数据
-        self._load_metadata()
-        
-        logger.info(f"Initialized shard {shard_id} with max_memory_size={max_memory_size}")
-    
-    def _load_metadata(self):
-        """加载分片元数据"""
-        if os.path.exists(self.metadata_file):
-            try:
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    self.metadata = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading metadata for shard {self.shard_id}: {e}")
-                self.metadata = {'term_count': 0, 'doc_count': 0}
-        else:
-            self.metadata = {'term_count': 0, 'doc_count': 0}
-    
-    def _save_metadata(self):
-        """保存分片元数据"""
-        try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving metadata for shard {self.shard_id}: {e}")
-    
-    def add_posting(self, term: str, posting: Posting):
-        """添加倒排列表项"""
-        with self.lock:
-            if term not in self.memory_index:
-                self.memory_index[term] = []
-                self.memory_size += 1
-            
-            self.memory_index[term].append(posting)
-            self.memory_size += 1
-            
-            # 检查是否需要刷新到磁盘
-            if self.memory_size >= self.max_memory_size:
-                self._flush_to_disk()
-    
-    def _flush_to_disk(self):
-        """将内存中的索引刷新到磁盘"""
-        if not self.memory_index:
-            return
-        
-        try:
-            # 读取现有的磁盘索引
-            existing_index = self._load_from_disk()
-            
-            # 合并内存和磁盘索引
-            for term, postings in self.memory_index.items():
-                if term in existing_index:
-                    # 合并倒排列表
-                    existing_index[term].extend(postings)
-                    # 按doc_id排序
-                    existing_index[term].sort(key=lambda x: x.doc_id)
-                else:
-                    existing_index[term] = postings
-            
-            # 保存到磁盘
-            with open(self.disk_file, 'wb') as f:
-                pickle.dump(existing_index, f)
-            
-            # 更新元数据
-            self.metadata['term_count'] = len(existing_index)
-            self.metadata['doc_count'] = sum(len(postings) for postings in existing_index.values())
-            self._save_metadata()
-            
-            # 清空内存
-            self.memory_index.clear()
-            self.memory_size = 0
-            
-            logger.info(f"Flushed shard {self.shard_id} to disk, terms: {self.metadata['term_count']}")
-            
-        except Exception as e:
-            logger.error(f"Error flushing shard {self.shard_id} to disk: {e}")
+class InvertedIndexShard(SegmentedShard):
+    """倒排索引分片，内存中的倒排列表刷新为不可变的磁盘段（见segment.py）"""
     
-    def _load_from_disk(self) -> Dict[str, List[Posting]]:
-        """从磁盘加载索引"""
-        if not os.path.exists(self.disk_file):
-            return {}
-        
-        try:
-            with open(self.disk_file, 'rb') as f:
-                return pickle.load(f)
-        except Exception as e:
-            logger.error(f"Error loading shard {self.shard_id} from disk: {e}")
-            return {}
+    file_prefix = "shard"
+    label = "shard"
+    codec = PostingCodec(Posting, ('doc_id', 'tf'), 'positions', 'offsets')
     
-    def get_postings(self, term: str) -> List[Posting]:
-        """获取指定term的倒排列表"""
-        with self.lock:
-            # 首先检查内存
-            if term in self.memory_index:
-                return self.memory_index[term].copy()
-            
-            # 检查磁盘
-            disk_index = self._load_from_disk()
-            if term in disk_index:
-                return disk_index[term].copy()
-            
-            return []
-    
-    def get_all_terms(self) -> Set[str]:
-        """获取所有term"""
-        with self.lock:
-            terms = set(self.memory_index.keys())
-            
-            # 添加磁盘中的term
-            disk_index = self._load_from_disk()
-            terms.update(disk_index.keys())
-            
-            return terms
-    
-    def finalize(self):
-        """最终化分片，确保所有数据都写入磁盘"""
-        with self.lock:
-            self._flush_to_disk()
-            logger.info(f"Finalized shard {self.shard_id}")
+    def __init__(self, shard_id: int, base_path: str, max_memory_size: int = 100, clear_disk: bool = True,
+                 **kwargs):
+        super().__init__(shard_id, base_path, max_memory_size=max_memory_size, clear_disk=clear_disk, **kwargs)
 
 class InvertedIndexBuilder:
     """倒排索引构建器"""
@@ -190,7 +71,10 @@ class InvertedIndexBuilder:
                  index_path: str = "data/indexer", 
                  num_shards: int = 16,
                  batch_size: int = 1000,
-                 max_memory_size: int = 10000):
+                 max_memory_size: int = 10000,
+                 tokenize_workers: Optional[int] = None,
+                 analyzer: Optional[str] = None,
+                 shard_path: Optional[str] = None):
         """
         初始化倒排索引构建器
         
@@ -200,30 +84,54 @@ class InvertedIndexBuilder:
             num_shards: 分片数量
             batch_size: 批处理大小
             max_memory_size: 每个分片的最大内存大小
+            tokenize_workers: 分词进程数，None时使用配置，0表示使用全部CPU
+            analyzer: 分析器名称（jieba/cjk_bigram），None时使用配置；记录在统计信息中供查询端使用
+            shard_path: 分片文件目录，None时与index_path相同（并行构建的工作进程写到各自的临时目录）
         """
         self.db_path = db_path
         self.index_path = index_path
+        self.shard_path = shard_path or index_path
         self.num_shards = num_shards
         self.batch_size = batch_size
         self.max_memory_size = max_memory_size
+        if tokenize_workers is None:
+            tokenize_workers = INDEXER_CONFIG.get('tokenize_workers', 1)
+        self.tokenize_workers = tokenize_workers
         
         # 文本处理器
-        self.text_processor = TextProcessor()
+        self.text_processor = TextProcessor(get_analyzer(analyzer))
+        
+        # 全局词表（同一索引目录下的索引共享，词项ID在多次构建之间保持不变）
+        self.vocabulary = Vocabulary(index_path)
+        
+        # 分词缓存（文档未变化且分析器相同时直接读取词项ID序列）
+        self.token_store = TokenStore(index_path, vocabulary=self.vocabulary,
+                                      text_processor=self.text_processor,
+                                      tokenize_workers=tokenize_workers)
         
-        # 分片管理器
+        # 已索引文档和删除位图（增量构建删除被替换的文档，检索时跳过）
+        self.live_docs = LiveDocs.load(index_path, LIVE_DOCS_FILE)
+        self.index_analyzer: Optional[str] = None  # 已有索引使用的分析器
+        
+        # 分片管理器（已有的段在构建开始时清空，构造时保留，供搜索和增量构建使用）
         self.shards: Dict[int, InvertedIndexShard] = {}
         self._init_shards()
         
+        # 本次构建中每个词项的文档频率，构建完成后写成IDF表
+        self.doc_freqs: Counter = Counter()
+        
         # 统计信息
         self.stats = {
             'total_docs': 0,
             'total_terms': 0,
             'total_postings': 0,
-            'processing_time': 0
+            'processing_time': 0,
+            'analyzer': self.text_processor.analyzer.name
         }
         
         # 创建索引目录
         os.makedirs(index_path, exist_ok=True)
+        self._load_stats()
         
         logger.info(f"Initialized InvertedIndexBuilder with {num_shards} shards")
     
@@ -232,77 +140,78 @@ class InvertedIndexBuilder:
         for i in range(self.num_shards):
             self.shards[i] = InvertedIndexShard(
                 shard_id=i,
-                base_path=self.index_path,
-                max_memory_size=self.max_memory_size
+                base_path=self.shard_path,
+                max_memory_size=self.max_memory_size,
+                clear_disk=False
             )
     
-    def _get_shard_id(self, term: str) -> int:
-        """根据term计算分片ID"""
-        # 使用哈希函数计算分片ID
-        hash_value = hashlib.md5(term.encode('utf-8')).hexdigest()
-        return int(hash_value, 16) % self.num_shards
+    def _get_shard_id(self, term_id: int) -> int:
+        """根据term ID计算分片ID"""
+        return term_id % self.num_shards
     
     def _process_document(self, doc_id: int, title: str, content: str) -> Dict[str, List[int]]:
         """处理单个文档，返回term到位置的映射"""
-        # 合并标题和内容
-        full_text = f"{title} {content}"
-        
-        # 分词
-        tokens = self.text_processor.tokenize(full_text)
-        
-        # 构建term到位置的映射
+        # 合并标题和内容并分词
+        tokens = self.text_processor.tokenize(f"{title} {content}")
+        return self._term_positions(tokens)
+    
+    @staticmethod
+    def _term_positions(tokens: List[str]) -> Dict[str, List[int]]:
+        """构建term到位置的映射"""
         term_positions = defaultdict(list)
         for pos, token in enumerate(tokens):
             term_positions[token].append(pos)
         
         return dict(term_positions)
     
-    def build_index(self):
-        """构建倒排索引"""
+    @staticmethod
+    def _term_offsets(term_ids: Sequence[int], starts: Sequence[int]) -> Dict[int, Tuple[List[int], List[int]]]:
+        """构建term ID到(位置列表, 起始字符偏移列表)的映射"""
+        term_offsets = {}
+        for position, (term_id, start) in enumerate(zip(term_ids, starts)):
+            entry = term_offsets.get(term_id)
+            if entry is None:
+                term_offsets[term_id] = ([position], [start])
+            else:
+                entry[0].append(position)
+                entry[1].append(start)
+        return term_offsets
+    
+    def build_index(self, workers: int = 1):
+        """
+        构建倒排索引
+
+        Args:
+            workers: 构建进程数，大于1时按doc_id范围多进程并行构建后归并（见parallel_build.py），0表示使用全部CPU
+        """
         start_time = time.time()
         logger.info("Starting inverted index construction...")
         
         try:
-            # 连接数据库
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # 按id流式读取文档（键集分页，后台预取下一批）
+            source = DocumentSource(self.db_path, ('id', 'url', 'title', 'content', 'keywords'),
+                                    batch_size=self.batch_size)
             
             # 获取总文档数
-            cursor.execute("SELECT COUNT(*) FROM pages")
-            total_docs = cursor.fetchone()[0]
+            total_docs = source.count()
             logger.info(f"Total documents to process: {total_docs}")
             
             if total_docs == 0:
                 logger.warning("No documents found in database")
                 return
             
-            # 分批处理文档
-            offset = 0
-            processed_docs = 0
+            self._reset_build()
             
-            while offset < total_docs:
-                # 获取一批文档
-                cursor.execute("""
-                    SELECT id, url, title, content, keywords 
-                    FROM pages 
-                    ORDER BY id 
-                    LIMIT ? OFFSET ?
-                """, (self.batch_size, offset))
-                
-                batch_docs = cursor.fetchall()
-                if not batch_docs:
-                    break
-                
-                # 处理这批文档
-                self._process_batch(batch_docs)
-                
-                processed_docs += len(batch_docs)
-                offset += self.batch_size
-                
-                logger.info(f"Processed {processed_docs}/{total_docs} documents")
+            if workers != 1:
+                build_parallel(self, source, workers)
+                processed_docs = self.stats['total_docs']
+            else:
+                processed_docs = self._build_inverted_index(source, total_docs)
             
             # 最终化所有分片
             self._finalize_shards()
+            self.live_docs.save(self.index_path, LIVE_DOCS_FILE)
+            save_idf(self.index_path, self.doc_freqs, processed_docs, len(self.vocabulary))
             
             # 更新统计信息
             self.stats['processing_time'] = time.time() - start_time
@@ -317,28 +226,150 @@ class InvertedIndexBuilder:
             logger.error(f"Error building index: {e}")
             raise
         finally:
-            conn.close()
+            self.token_store.close()
+            self.text_processor.close()
+    
+    def update_index(self, since: Optional[float] = None) -> Dict[str, int]:
+        """
+        增量构建倒排索引
+
+        已不在数据库中的文档记入删除位图，只索引crawl_time > since且尚未索引的文档，写入各分片的新段；
+        没有已构建的索引或分析器不同时改为全量构建（见BM25IndexBuilder.update_index）
+
+        Args:
+            since: 上次构建的开始时间，None时检查全部文档
+
+        Returns:
+            {'added': 新索引的文档数, 'deleted': 删除的文档数}
+        """
+        if not self.live_docs.count and not self.live_docs.deleted_count:
+            logger.info("No existing index to update, running a full build")
+            self.build_index()
+            return {'added': self.stats['total_docs'], 'deleted': 0}
+        if self.index_analyzer != self.text_processor.analyzer.name:
+            logger.info(f"Analyzer changed ({self.index_analyzer} -> {self.text_processor.analyzer.name}), "
+                        f"running a full build")
+            self.build_index()
+            return {'added': self.stats['total_docs'], 'deleted': 0}
+
+        start_time = time.time()
+        logger.info(f"Starting incremental index update (crawl_time > {since})...")
+
+        try:
+            removed = self.live_docs.missing_from(self.db_path)
+            self._delete_docs(removed)
+
+            source = DocumentSource(self.db_path, ('id', 'url', 'title', 'content', 'keywords'),
+                                    batch_size=self.batch_size, min_crawl_time=since)
+            added = 0
+            for batch_docs in source.batches():
+                # doc_id不会复用，已索引的文档内容没有变化
+                batch_docs = [row for row in batch_docs if not self.live_docs.is_indexed(row[0])]
+                if batch_docs:
+                    self._process_batch(batch_docs)
+                    added += len(batch_docs)
+
+            # 新文档刷新为各分片的新段
+            self._finalize_shards()
+            self.live_docs.save(self.index_path, LIVE_DOCS_FILE)
+
+            doc_freqs = Counter()
+            for shard in self.shards.values():
+                doc_freqs.update(shard.get_doc_freqs())
+            doc_freqs.subtract(self.live_docs.deleted_doc_freqs)
+            save_idf(self.index_path, +doc_freqs, self.live_docs.count, len(self.vocabulary))
+
+            self.stats['total_docs'] = self.live_docs.count
+            self.stats['processing_time'] = time.time() - start_time
+            self._save_stats()
+
+            logger.info(f"Index updated in {self.stats['processing_time']:.2f} seconds: "
+                        f"{added} added, {len(removed)} deleted")
+            return {'added': added, 'deleted': len(removed)}
+
+        except Exception as e:
+            logger.error(f"Error updating index: {e}")
+            raise
+        finally:
+            self.token_store.close()
+            self.text_processor.close()
+
+    def _delete_docs(self, doc_ids):
+        """删除文档：记入删除位图，文档频率按分词缓存中的词项修正"""
+        if not len(doc_ids):
+            return
+        cached = self.token_store.cached_term_ids(doc_ids.tolist())
+        for doc_id in doc_ids.tolist():
+            self.live_docs.delete(doc_id, cached.get(doc_id))
+        if len(cached) < len(doc_ids):
+            logger.warning(f"{len(doc_ids) - len(cached)} deleted documents are not in the token store, "
+                           f"their document frequencies are not corrected")
+
+    def _reset_build(self):
+        """清空已有的分片、删除位图和本次构建的统计"""
+        for shard in self.shards.values():
+            shard.clear()
+        self.doc_freqs.clear()
+        self.live_docs.clear()
+        self.stats['total_docs'] = 0
+        self.stats['total_postings'] = 0
+
+    def _build_inverted_index(self, source: DocumentSource, total_docs: int) -> int:
+        """分批处理文档，返回处理的文档数"""
+        processed_docs = 0
+        
+        for batch_docs in source.batches():
+            # 处理这批文档
+            self._process_batch(batch_docs)
+            
+            processed_docs += len(batch_docs)
+            
+            logger.info(f"Processed {processed_docs}/{total_docs} documents")
+        
+        return processed_docs
+    
+    def _build_part(self, start_id: Optional[int], end_id: Optional[int]) -> Dict[str, Any]:
+        """并行构建的工作进程中调用：把id范围内的文档构建到本构建器的分片中，返回本地统计"""
+        self._reset_build()
+        source = DocumentSource(self.db_path, ('id', 'url', 'title', 'content', 'keywords'),
+                                batch_size=self.batch_size, start_id=start_id, end_id=end_id)
+        total_docs = self._build_inverted_index(source, source.count())
+        for shard in self.shards.values():
+            shard.finalize()
+        return {'doc_freqs': self.doc_freqs, 'total_docs': total_docs,
+                'total_postings': self.stats['total_postings'], 'live_docs': self.live_docs.live_ids()}
+    
+    def _merge_part_stats(self, parts: List[Dict[str, Any]]):
+        """并行构建的主进程中调用：合并各工作进程的统计"""
+        for part in parts:
+            self.doc_freqs.update(part['doc_freqs'])
+            self.stats['total_docs'] += part['total_docs']
+            self.stats['total_postings'] += part['total_postings']
+            self.live_docs.add_many(part['live_docs'])
     
     def _process_batch(self, batch_docs: List[Tuple]):
         """处理一批文档"""
-        for doc_id, url, title, content, keywords in batch_docs:
+        # 从分词缓存读取词项ID和字符偏移，未命中的文档整批分词
+        # （tokenize_workers>1时在进程池中并行）
+        batch_tokens = self.token_store.get_many(
+            [(doc_id, document_text(title, content)) for doc_id, _, title, content, _ in batch_docs]
+        )
+        
+        for (doc_id, url, title, content, keywords), (term_ids, starts) in zip(batch_docs, batch_tokens):
             try:
+                self.live_docs.add(doc_id)
+                
                 # 处理文档
-                term_positions = self._process_document(doc_id, title, content)
+                term_offsets = self._term_offsets(term_ids, starts)
                 
-                # 为每个term创建posting并添加到对应分片
-                for term, positions in term_positions.items():
-                    posting = Posting(
-                        doc_id=doc_id,
-                        positions=positions,
-                        tf=len(positions)
-                    )
-                    
-                    # 计算分片ID
-                    shard_id = self._get_shard_id(term)
+                # 为每个term添加倒排列表项（按列追加，不创建Posting对象）
+                for term_id, (positions, offsets) in term_offsets.items():
+                    # 根据全局词项ID计算分片ID
+                    shard_id = self._get_shard_id(term_id)
+                    self.doc_freqs[term_id] += 1
                     
                     # 添加到对应分片
-                    self.shards[shard_id].add_posting(term, posting)
+                    self.shards[shard_id].add(term_id, (doc_id, len(positions)), positions, offsets)
                     
                     # 更新统计信息
                     self.stats['total_postings'] += 1
@@ -352,6 +383,8 @@ class InvertedIndexBuilder:
         
         for shard in self.shards.values():
             shard.finalize()
+        # 保存词表并提交分词缓存
+        self.token_store.flush()
         
         # 计算总term数
         all_terms = set()
@@ -361,6 +394,20 @@ class InvertedIndexBuilder:
         self.stats['total_terms'] = len(all_terms)
         logger.info(f"Total unique terms: {self.stats['total_terms']}")
     
+    def _load_stats(self):
+        """加载已有索引的统计信息，供增量构建在其上累加"""
+        stats_file = os.path.join(self.index_path, "index_stats.json")
+        if not os.path.exists(stats_file):
+            return
+        try:
+            with open(stats_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            # 分析器以构造参数为准
+            self.stats.update({key: value for key, value in saved.items() if key != 'analyzer'})
+            self.index_analyzer = saved.get('analyzer')
+        except Exception as e:
+            logger.error(f"Error loading stats: {e}")
+    
     def _save_stats(self):
         """保存统计信息"""
         stats_file = os.path.join(self.index_path, "index_stats.json")
@@ -371,10 +418,11 @@ class InvertedIndexBuilder:
             logger.error(f"Error saving stats: {e}")
 
     def get_posting(self, term: str) -> List[Posting]:
-        """获取指定term的倒排列表"""
-        shard_id = self._get_shard_id(term)
-        print(f"shard_id: {shard_id}")
-        return self.shards[shard_id].get_postings(term)
+        """获取指定term的倒排列表（不含已删除的文档）"""
+        term_id = self.vocabulary.get_id(term)
+        if term_id is None:
+            return []
+        return _live_postings(self.shards[self._get_shard_id(term_id)].get_postings(term_id), self.live_docs)
     
     def search(self, query: str, max_results: int = 20) -> List[Dict]:
         """搜索功能（简单实现）"""
@@ -388,8 +436,7 @@ class InvertedIndexBuilder:
         doc_scores = defaultdict(float)
         
         for term in query_terms:
-            shard_id = self._get_shard_id(term)
-            postings = self.shards[shard_id].get_postings(term)
+            postings = self.get_posting(term)
             
             for posting in postings:
                 # 简单的TF-IDF评分
@@ -458,6 +505,8 @@ class InvertedIndexReader:
     def __init__(self, index_path: str, num_shards: int = 64):
         self.index_path = index_path
         self.num_shards = num_shards
+        self.vocabulary = Vocabulary(index_path)
+        self.live_docs = LiveDocs.load(index_path, LIVE_DOCS_FILE)
         self.shards: Dict[int, InvertedIndexShard] = {}
         self._init_shards()
     
@@ -471,15 +520,15 @@ class InvertedIndexReader:
             )
 
     def get_posting(self, term: str) -> List[Posting]:
-        """获取指定term的倒排列表"""
-        shard_id = self._get_shard_id(term)
-        return self.shards[shard_id].get_postings(term)
+        """获取指定term的倒排列表（不含已删除的文档）"""
+        term_id = self.vocabulary.get_id(term)
+        if term_id is None:
+            return []
+        return _live_postings(self.shards[self._get_shard_id(term_id)].get_postings(term_id), self.live_docs)
 
-    def _get_shard_id(self, term: str) -> int:
-        """根据term计算分片ID"""
-        # 使用哈希函数计算分片ID
-        hash_value = hashlib.md5(term.encode('utf-8')).hexdigest()
-        return int(hash_value, 16) % self.num_shards
+    def _get_shard_id(self, term_id: int) -> int:
+        """根据term ID计算分片ID"""
+        return term_id % self.num_shards
 
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+"""
+索引中的文档与删除位图（live docs）
+
+爬虫以INSERT OR REPLACE按URL写入pages表（id为AUTOINCREMENT，不会复用），内容变化的页面得到新的id，
+旧的行被删除。增量构建只索引新文档，旧文档的倒排列表项仍留在不可变的段中，
+由删除位图标记，检索时跳过：
+- indexed:  按doc_id的位图，记录已写入索引的文档（包括已删除的）；
+- deleted:  按doc_id的位图，记录已删除的文档；
+- 文档频率修正：每个词项在已删除文档中的文档数，段词典中的文档频率减去该值即为现存文档的文档频率。
+
+已删除文档的倒排列表项在段合并时保留（修正值始终与段中的统计对应），重新全量构建后清空。
+"""
+
+import logging
+import os
+from collections import Counter
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .doc_source import DocumentSource
+
+logger = logging.getLogger(__name__)
+
+# 基础索引与BM25索引各自维护（两者可能在不同时间更新）
+LIVE_DOCS_FILE = "live_docs.npz"
+BM25_LIVE_DOCS_FILE = "bm25_live_docs.npz"
+
+
+class LiveDocs:
+    """已索引文档和已删除文档的位图（按doc_id的布尔数组，扩容方式与DocNorms相同），以及文档频率修正"""
+
+    def __init__(self):
+        self.indexed = np.zeros(1024, dtype=bool)
+        self.deleted = np.zeros(1024, dtype=bool)
+        self.deleted_doc_freqs: Counter = Counter()  # 词项ID -> 包含该词项的已删除文档数
+        self.count = 0  # 现存文档数
+        self.deleted_count = 0  # 已删除文档数
+
+    def _reserve(self, size: int):
+        if size > len(self.indexed):
+            capacity = max(size, 2 * len(self.indexed))
+            for name in ('indexed', 'deleted'):
+                values = np.zeros(capacity, dtype=bool)
+                old = getattr(self, name)
+                values[:len(old)] = old
+                setattr(self, name, values)
+
+    def add(self, doc_id: int):
+        """记录写入索引的文档"""
+        self._reserve(doc_id + 1)
+        if not self.indexed[doc_id]:
+            self.indexed[doc_id] = True
+            self.count += 1
+
+    def add_many(self, doc_ids: np.ndarray):
+        """记录一批写入索引的文档（如并行构建的工作进程返回的文档）"""
+        if not len(doc_ids):
+            return
+        self._reserve(int(doc_ids.max()) + 1)
+        self.count += int(np.count_nonzero(~self.indexed[doc_ids]))
+        self.indexed[doc_ids] = True
+
+    def is_indexed(self, doc_id: int) -> bool:
+        """文档已写入索引（包括已删除的）"""
+        return doc_id < len(self.indexed) and bool(self.indexed[doc_id])
+
+    def is_live(self, doc_id: int) -> bool:
+        """文档已写入索引且没有被删除"""
+        return self.is_indexed(doc_id) and not self.deleted[doc_id]
+
+    def live_ids(self) -> np.ndarray:
+        """全部现存文档的doc_id（升序）"""
+        return np.flatnonzero(self.indexed & ~self.deleted)
+
+    def delete(self, doc_id: int, term_ids: Optional[Iterable[int]] = None):
+        """
+        删除文档
+
+        Args:
+            doc_id: 已写入索引的文档
+            term_ids: 文档的词项ID序列，用于修正文档频率；None时不修正
+        """
+        if not self.is_live(doc_id):
+            return
+        self.deleted[doc_id] = True
+        self.count -= 1
+        self.deleted_count += 1
+        if term_ids is not None:
+            self.deleted_doc_freqs.update(set(term_ids))
+
+    def doc_freq_correction(self, term_id: int) -> int:
+        """词项在已删除文档中的文档数"""
+        return self.deleted_doc_freqs.get(term_id, 0)
+
+    def missing_from(self, db_path: str, batch_size: int = 10000) -> np.ndarray:
+        """现存文档中已不在数据库中的doc_id（被新的id替换或删除的页面）"""
+        present = np.zeros(len(self.indexed), dtype=bool)
+        for batch in DocumentSource(db_path, ('id',), batch_size=batch_size).batches():
+            ids = np.fromiter((row[0] for row in batch), dtype=np.int64, count=len(batch))
+            ids = ids[ids < len(present)]
+            present[ids] = True
+        return np.flatnonzero(self.indexed & ~self.deleted & ~present)
+
+    def clear(self):
+        self.__init__()
+
+    def save(self, index_path: str, file_name: str = LIVE_DOCS_FILE):
+        """位图按位压缩后与文档频率修正一起保存（先写临时文件再替换）"""
+        size = int(np.flatnonzero(self.indexed)[-1]) + 1 if self.count or self.deleted_count else 0
+        terms = np.fromiter(self.deleted_doc_freqs.keys(), dtype=np.int64, count=len(self.deleted_doc_freqs))
+        freqs = np.fromiter(self.deleted_doc_freqs.values(), dtype=np.int64, count=len(self.deleted_doc_freqs))
+        tmp_path = os.path.join(index_path, f"{file_name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, size=np.int64(size), indexed=np.packbits(self.indexed[:size]),
+                     deleted=np.packbits(self.deleted[:size]), terms=terms, freqs=freqs)
+        os.replace(tmp_path, os.path.join(index_path, file_name))
+        logger.info(f"Saved live docs: {self.count} live, {self.deleted_count} deleted")
+
+    @classmethod
+    def load(cls, index_path: str, file_name: str = LIVE_DOCS_FILE) -> 'LiveDocs':
+        """加载索引目录中的位图，不存在时返回空位图（没有已删除的文档，检索时不过滤）"""
+        live_docs = cls()
+        path = os.path.join(index_path, file_name)
+        if not os.path.exists(path):
+            return live_docs
+        with np.load(path) as data:
+            size = int(data['size'])
+            live_docs._reserve(size)
+            live_docs.indexed[:size] = np.unpackbits(data['indexed'], count=size).astype(bool)
+            live_docs.deleted[:size] = np.unpackbits(data['deleted'], count=size).astype(bool)
+            live_docs.deleted_doc_freqs.update(dict(zip(data['terms'].tolist(), data['freqs'].tolist())))
+        live_docs.deleted_count = int(np.count_nonzero(live_docs.deleted))
+        live_docs.count = int(np.count_nonzero(live_docs.indexed)) - live_docs.deleted_count
+        return live_docs
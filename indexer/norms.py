@@ -0,0 +1,150 @@
+"""
+文档长度（norms）
+
+按doc_id索引的稠密uint32数组：构建时随文档流式写入，倒排列表中不逐项保存文档长度，统计信息中也不保存。
+构建完成后保存为bm25_norms.npy，加载索引时以内存映射方式打开（写时复制，不读入整个文件）；
+文档数和文档长度之和保存在bm25_norms.json中（长度为0的文档也计入文档数，不能从数组中数出来）。
+
+BM25计分时每个文档只需一次数组查找：按当前的k1、b和平均文档长度预先算出每个文档的长度归一化因子
+k1 * (1 - b + b * dl / avgdl)，缓存到文档长度或参数变化为止。
+"""
+
+import json
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NORMS_FILE = "bm25_norms.npy"
+NORMS_STATS_FILE = "bm25_norms.json"
+
+
+def bm25_length_factor(lengths, k1: float, b: float, avg_doc_length: float):
+    """BM25的长度归一化因子k1 * (1 - b + b * dl / avgdl)，lengths可以是数值或NumPy数组"""
+    return k1 * (1 - b + b * np.asarray(lengths, dtype=np.float64) / avg_doc_length)
+
+
+class DocNorms:
+    """
+    文档长度数组，没有记录长度的doc_id取0
+
+    数组扩容时换成新的数组而不修改旧数组，后台合并线程持有的旧数组仍包含其所需的全部文档
+    """
+
+    def __init__(self, values: Optional[np.ndarray] = None):
+        self._values = values if values is not None else np.zeros(1024, dtype=np.uint32)
+        self.size = len(values) if values is not None else 0  # 最大doc_id + 1
+        self.count = 0  # 记录的文档数
+        self.total = 0  # 文档长度之和
+        self._factors: Optional[np.ndarray] = None  # 长度归一化因子的缓存
+        self._factors_key = None
+
+    @property
+    def values(self) -> np.ndarray:
+        """按doc_id索引的文档长度数组（长度可能大于最大doc_id + 1）"""
+        return self._values
+
+    def _reserve(self, size: int):
+        self._factors = None
+        if size > len(self._values):
+            values = np.zeros(max(size, 2 * len(self._values)), dtype=np.uint32)
+            values[:len(self._values)] = self._values
+            self._values = values
+
+    def set(self, doc_id: int, length: int):
+        """记录文档长度，每个文档只记录一次"""
+        self._reserve(doc_id + 1)
+        self._values[doc_id] = length
+        self.size = max(self.size, doc_id + 1)
+        self.count += 1
+        self.total += length
+
+    def delete(self, doc_id: int):
+        """删除文档（增量构建中被替换的文档），长度清零，不再计入文档数和平均文档长度"""
+        length = self[doc_id]
+        self._factors = None
+        if doc_id < len(self._values):
+            self._values[doc_id] = 0
+        self.count -= 1
+        self.total -= length
+
+    def merge(self, values: np.ndarray, count: int, total: int):
+        """
+        合并另一部分文档的长度（如并行构建的工作进程），doc_id与已有的文档互不重叠
+
+        Args:
+            values: 按doc_id索引的文档长度（即另一个DocNorms的values[:size]）
+            count: 其中的文档数
+            total: 其中的文档长度之和
+        """
+        self._reserve(len(values))
+        self._values[:len(values)] += values
+        self.size = max(self.size, len(values))
+        self.count += count
+        self.total += total
+
+    def __getitem__(self, doc_id: int) -> int:
+        return int(self._values[doc_id]) if doc_id < len(self._values) else 0
+
+    def average(self) -> float:
+        """平均文档长度"""
+        return self.total / self.count if self.count else 0
+
+    def length_factors(self, k1: float, b: float, avg_doc_length: float) -> np.ndarray:
+        """
+        按doc_id索引的BM25长度归一化因子（float64，与values等长），BM25得分为idf * tf * (k1 + 1) / (tf + 因子)
+
+        结果缓存到文档长度或参数变化为止；avg_doc_length为0（没有文档）时按1计算
+        """
+        key = (k1, b, avg_doc_length)
+        factors = self._factors
+        if factors is None or self._factors_key != key or len(factors) != len(self._values):
+            factors = bm25_length_factor(self._values, k1, b, avg_doc_length or 1)
+            self._factors, self._factors_key = factors, key
+        return factors
+
+    def clear(self):
+        self._values = np.zeros(1024, dtype=np.uint32)
+        self.size = 0
+        self.count = 0
+        self.total = 0
+        self._factors = None
+
+    def save(self, index_path: str):
+        """保存为索引目录下的NORMS_FILE和NORMS_STATS_FILE（先写临时文件再替换）"""
+        tmp_path = os.path.join(index_path, f"{NORMS_FILE}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, self._values[:self.size])
+        stats_tmp_path = os.path.join(index_path, f"{NORMS_STATS_FILE}.tmp")
+        with open(stats_tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'count': self.count, 'total': self.total}, f)
+        os.replace(tmp_path, os.path.join(index_path, NORMS_FILE))
+        os.replace(stats_tmp_path, os.path.join(index_path, NORMS_STATS_FILE))
+        logger.info(f"Saved norms for {self.count} documents")
+
+    @classmethod
+    def load(cls, index_path: str) -> 'DocNorms':
+        """
+        以写时复制的内存映射加载索引目录中的文档长度，不存在时返回空数组
+
+        增量构建修改的页面只复制到进程内存，保存时写新文件再替换，已打开的映射不受影响
+        """
+        path = os.path.join(index_path, NORMS_FILE)
+        if not os.path.exists(path):
+            return cls()
+        # 普通ndarray视图的索引开销比memmap对象小
+        norms = cls(np.load(path, mmap_mode='c').view(np.ndarray))
+        stats_path = os.path.join(index_path, NORMS_STATS_FILE)
+        if os.path.exists(stats_path):
+            with open(stats_path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            norms.count, norms.total = stats['count'], stats['total']
+        else:
+            # 旧版本索引没有保存文档数，长度为0的文档无法计入
+            logger.warning(f"{NORMS_STATS_FILE} not found, counting documents with non-zero length")
+            norms.count = int(np.count_nonzero(norms._values))
+            norms.total = int(norms._values.sum(dtype=np.int64))
+        return norms
@@ -0,0 +1,123 @@
+"""
+多进程并行构建索引
+
+1. 先补全分词缓存：未命中的文档在workers个分词进程中分词，词项ID在主进程中分配并保存到词表，
+   工作进程只读缓存和词表，不会分配相互冲突的ID；
+2. 按doc_id把语料切成若干段（每段文档数大致相同），每个工作进程读取自己的id范围，
+   在临时目录中构建完整的一套分片段，并返回本地统计（文档频率、文档长度等）；
+3. 主进程合并各工作进程的统计，再把各分片的归并分给进程池：每个进程把各工作进程中同一分片的段多路归并为
+   最终索引中的一个段（段内按term ID有序，不需要把整个分片读入内存），分片之间互不依赖；
+   之后与单进程构建一样最终化分片、保存统计信息。
+
+仍在主进程中串行的部分是词项ID分配和分词缓存写入（按词项数计，远少于分词本身的开销）。
+
+构建器需要提供_build_part(start_id, end_id)（工作进程中构建并返回统计）和
+_merge_part_stats(parts)（主进程中合并统计）；分片需要提供merge_options(tmp_dir)（在归并进程中打开
+同一分片的构造参数）。
+"""
+
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .doc_source import DocumentSource
+from .token_store import TokenStore, document_text
+
+logger = logging.getLogger(__name__)
+
+
+def _build_part(builder_cls: type, options: Dict[str, Any], start_id: Optional[int], end_id: Optional[int],
+                part_path: str) -> Dict[str, Any]:
+    """工作进程：把id范围[start_id, end_id)内的文档构建到part_path中的分片"""
+    builder = builder_cls(shard_path=part_path, tokenize_workers=1, **options)
+    # 只读分词缓存：词项ID都已在主进程中分配
+    builder.token_store.close()
+    builder.token_store = TokenStore(builder.index_path, vocabulary=builder.vocabulary,
+                                     text_processor=builder.text_processor, read_only=True)
+    try:
+        stats = builder._build_part(start_id, end_id)
+        if builder.token_store.stats['misses']:
+            raise RuntimeError(f"{builder.token_store.stats['misses']} documents changed during the parallel build")
+    finally:
+        for shard in builder.shards.values():
+            shard.close()
+        builder.token_store.close()
+        builder.text_processor.close()
+    return stats
+
+
+def _merge_shard(shard_cls: type, shard_id: int, shard_path: str, part_paths: List[str],
+                 options: Dict[str, Any]) -> int:
+    """归并进程：把各部分目录中的分片shard_id归并为shard_path中同一分片的一个新段，返回分片ID"""
+    shard = shard_cls(shard_id, shard_path, clear_disk=False, background_merge=False, **options)
+    part_shards = [shard_cls(shard_id, part_path, clear_disk=False, background_merge=False, **options)
+                   for part_path in part_paths]
+    try:
+        shard.merge_from(part_shards)
+    finally:
+        for part_shard in part_shards:
+            part_shard.close()
+        shard.close()
+    return shard_id
+
+
+def build_parallel(builder, source: DocumentSource, workers: int):
+    """
+    用多个进程构建索引，结果写入builder的分片和统计
+
+    Args:
+        builder: InvertedIndexBuilder或BM25IndexBuilder（分片已清空）
+        source: 全部文档
+        workers: 进程数，0表示使用全部CPU
+    """
+    workers = workers or os.cpu_count() or 1
+
+    # 补全分词缓存并保存词表（分词在workers个进程中进行，词项ID在本进程中分配）
+    logger.info("Updating token store before the parallel build...")
+    text_source = DocumentSource(builder.db_path, ('id', 'title', 'content'), batch_size=builder.batch_size,
+                                 start_id=source.start_id, end_id=source.end_id,
+                                 min_crawl_time=source.min_crawl_time)
+    tokenize_workers = builder.token_store.tokenize_workers
+    builder.token_store.tokenize_workers = workers
+    try:
+        for batch in text_source.batches():
+            builder.token_store.get_many([(doc_id, document_text(title, content))
+                                          for doc_id, title, content in batch])
+    finally:
+        builder.token_store.tokenize_workers = tokenize_workers
+    builder.token_store.flush()
+
+    ranges = source.split_id_ranges(workers)
+    logger.info(f"Building {len(ranges)} parts with {workers} worker processes...")
+    options = {
+        'db_path': builder.db_path,
+        'index_path': builder.index_path,
+        'num_shards': builder.num_shards,
+        'batch_size': builder.batch_size,
+        'max_memory_size': builder.max_memory_size,
+        'analyzer': builder.text_processor.analyzer.name
+    }
+    with tempfile.TemporaryDirectory(prefix="parallel_build_", dir=builder.index_path) as tmp_dir:
+        part_paths = [os.path.join(tmp_dir, f"part_{i:03d}") for i in range(len(ranges))]
+        for part_path in part_paths:
+            os.makedirs(part_path)
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            futures = [
+                pool.submit(_build_part, type(builder), options, start_id, end_id, part_path)
+                for (start_id, end_id), part_path in zip(ranges, part_paths)
+            ]
+            parts = [future.result() for future in futures]
+
+        # 先合并统计（BM25编码跳表需要全部文档长度），再在进程池中按分片归并各部分的段
+        builder._merge_part_stats(parts)
+        logger.info(f"Merging parts into {len(builder.shards)} shards with {workers} processes...")
+        with ProcessPoolExecutor(max_workers=min(workers, len(builder.shards))) as pool:
+            futures = [
+                pool.submit(_merge_shard, type(shard), shard_id, shard.base_path, part_paths,
+                            shard.merge_options(tmp_dir))
+                for shard_id, shard in builder.shards.items()
+            ]
+            for future in futures:
+                builder.shards[future.result()].reload()
@@ -14,6 +14,9 @@ from typing import Dict, Any
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from indexer.index_manager import IndexManager
+from indexer.static_rank import compute_static_rank
+from indexer.token_store import build_token_store
+from utils.text_processor import ANALYZERS
 from config.settings import INDEXER_CONFIG
 
 logging.basicConfig(
@@ -58,32 +61,61 @@ def build_indexes(manager: IndexManager, args: argparse.Namespace):
     num_shards = args.shards if args.shards else 16
     batch_size = args.batch_size if args.batch_size else 1000
     max_memory = args.max_memory if args.max_memory else 10000
+    tokenize_workers = args.tokenize_workers
+    analyzer = args.analyzer
+    workers = args.workers
     
     print(f"配置参数:")
     print(f"  分片数量: {num_shards}")
     print(f"  批处理大小: {batch_size}")
     print(f"  最大内存大小: {max_memory}")
+    if tokenize_workers is not None:
+        print(f"  分词进程数: {tokenize_workers or os.cpu_count()}")
+    if analyzer:
+        print(f"  分析器: {analyzer}")
+    if workers != 1:
+        print(f"  构建进程数: {workers or os.cpu_count()}")
+    if args.incremental:
+        print(f"  增量构建: 只索引上次构建之后爬取的页面")
     
     # 构建索引
     start_time = time.time()
     
-    if args.index_type == "all":
+    if args.incremental:
+        options = dict(num_shards=num_shards, batch_size=batch_size, max_memory_size=max_memory,
+                       tokenize_workers=tokenize_workers, analyzer=analyzer)
+        if args.index_type == "all":
+            results = manager.update_all_indexes(**options)
+        elif args.index_type == "basic":
+            results = {'basic_index': manager.update_basic_index(**options)}
+        else:
+            results = {'bm25_index': manager.update_bm25_index(**options)}
+    elif args.index_type == "all":
         results = manager.build_all_indexes(
             num_shards=num_shards,
             batch_size=batch_size,
-            max_memory_size=max_memory
+            max_memory_size=max_memory,
+            tokenize_workers=tokenize_workers,
+            analyzer=analyzer,
+            workers=workers
         )
     elif args.index_type == "basic":
         results = {'basic_index': manager.build_basic_index(
             num_shards=num_shards,
             batch_size=batch_size,
-            max_memory_size=max_memory
+            max_memory_size=max_memory,
+            tokenize_workers=tokenize_workers,
+            analyzer=analyzer,
+            workers=workers
         )}
     elif args.index_type == "bm25":
         results = {'bm25_index': manager.build_bm25_index(
             num_shards=num_shards,
             batch_size=batch_size,
-            max_memory_size=max_memory
+            max_memory_size=max_memory,
+            tokenize_workers=tokenize_workers,
+            analyzer=analyzer,
+            workers=workers
         )}
     else:
         print(f"❌ 未知的索引类型: {args.index_type}")
@@ -137,11 +169,10 @@ def show_stats(manager: IndexManager, args: argparse.Namespace):
     if stats:
         print(f"\n{args.index_type.upper()} 索引统计:")
         for key, value in stats.items():
-            if key != 'doc_lengths':  # 跳过大的字典
-                if isinstance(value, float):
-                    print(f"  {key}: {value:.2f}")
-                else:
-                    print(f"  {key}: {value}")
+            if isinstance(value, float):
+                print(f"  {key}: {value:.2f}")
+            else:
+                print(f"  {key}: {value}")
     else:
         print(f"❌ 无法获取 {args.index_type} 索引的统计信息")
 
@@ -164,6 +195,41 @@ def show_shard_info(manager: IndexManager, args: argparse.Namespace):
     else:
         print(f"❌ 无法获取 {args.index_type} 索引的分片信息")
 
+def build_static_rank(manager: IndexManager, args: argparse.Namespace):
+    """根据链接图计算文档静态权重"""
+    print("\n" + "="*50)
+    print("计算文档静态权重")
+    print("="*50)
+    
+    stats = compute_static_rank(
+        db_path=manager.db_path,
+        graph_dir=args.graph_dir,
+        index_path=manager.index_path,
+        damping=args.damping
+    )
+    print(f"  链接图节点数: {stats['graph_nodes']}")
+    print(f"  链接图边数: {stats['graph_edges']}")
+    print(f"  已计算权重的文档: {stats['documents_ranked']}/{stats['documents']}")
+    print(f"  耗时: {stats['processing_time']:.2f}秒")
+
+def build_tokens(manager: IndexManager, args: argparse.Namespace):
+    """生成分词缓存"""
+    print("\n" + "="*50)
+    print("生成分词缓存")
+    print("="*50)
+    
+    stats = build_token_store(
+        db_path=manager.db_path,
+        index_path=manager.index_path,
+        analyzer=args.analyzer,
+        batch_size=args.batch_size,
+        tokenize_workers=args.tokenize_workers
+    )
+    print(f"  分析器版本: {stats['analyzer_version']}")
+    print(f"  文档数: {stats['documents']}")
+    print(f"  重新分词的文档: {stats['tokenized']}")
+    print(f"  耗时: {stats['processing_time']:.2f}秒")
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(
@@ -180,11 +246,29 @@ def main():
   # 构建BM25索引
   python run_indexer.py build --type bm25 --shards 32 --batch-size 500
   
+  # 使用16个进程并行分词构建索引
+  python run_indexer.py build --type bm25 --tokenize-workers 16
+  
+  # 使用8个进程并行构建索引（按doc_id范围切分语料，最后归并各进程的段）
+  python run_indexer.py build --type bm25 --workers 8
+  
+  # 爬取新页面后增量构建（只索引上次构建之后爬取的页面，被替换的旧页面不再出现在结果中）
+  python run_indexer.py build --type all --incremental
+  
+  # 使用汉字二元组分析器构建索引（查询时自动使用相同的分析器）
+  python run_indexer.py build --type all --analyzer cjk_bigram
+  
   # 测试搜索
   python run_indexer.py search --query "股票投资" --type bm25
   
   # 显示统计信息
   python run_indexer.py stats --type bm25
+  
+  # 根据链接图计算文档静态权重
+  python run_indexer.py rank
+  
+  # 爬取完成后生成分词缓存（之后构建索引和启动搜索引擎不再重复分词）
+  python run_indexer.py tokens --tokenize-workers 0
         """
     )
     
@@ -200,6 +284,10 @@ def main():
     build_parser.add_argument('--shards', type=int, help='分片数量')
     build_parser.add_argument('--batch-size', type=int, help='批处理大小')
     build_parser.add_argument('--max-memory', type=int, help='最大内存大小')
+    build_parser.add_argument('--tokenize-workers', type=int, help='分词进程数，0表示使用全部CPU')
+    build_parser.add_argument('--analyzer', choices=sorted(ANALYZERS), help='分析器（默认使用配置）')
+    build_parser.add_argument('--workers', type=int, default=1, help='构建进程数，0表示使用全部CPU')
+    build_parser.add_argument('--incremental', action='store_true', help='增量构建，只索引上次构建之后爬取的页面')
     
     # 搜索命令
     search_parser = subparsers.add_parser('search', help='测试搜索')
@@ -218,6 +306,19 @@ def main():
     shard_parser.add_argument('--type', choices=['basic', 'bm25'], 
                             default='bm25', help='索引类型')
     
+    # 静态权重命令
+    rank_parser = subparsers.add_parser('rank', help='根据链接图计算文档静态权重')
+    rank_parser.add_argument('--graph-dir', default='data/crawler/graph', help='链接图目录')
+    rank_parser.add_argument('--damping', type=float, default=0.85, help='PageRank阻尼系数')
+    
+    # 分词缓存命令
+    tokens_parser = subparsers.add_parser('tokens', help='生成分词缓存')
+    tokens_parser.add_argument('--analyzer', choices=sorted(ANALYZERS), help='分析器（默认使用配置）')
+    tokens_parser.add_argument('--batch-size', type=int, default=1000, help='批处理大小')
+    tokens_parser.add_argument('--tokenize-workers', type=int,
+                               default=INDEXER_CONFIG.get('tokenize_workers', 1),
+                               help='分词进程数，0表示使用全部CPU')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -246,6 +347,10 @@ def main():
             show_stats(manager, args)
         elif args.command == 'shards':
             show_shard_info(manager, args)
+        elif args.command == 'rank':
+            build_static_rank(manager, args)
+        elif args.command == 'tokens':
+            build_tokens(manager, args)
         else:
             print(f"❌ 未知命令: {args.command}")
             
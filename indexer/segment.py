@@ -0,0 +1,636 @@
+"""
+分片的段式存储（LSM）
+
+每个分片由若干不可变的磁盘段组成：
+- 内存中的倒排列表达到阈值时，按term ID排序后写成一个新段，写入量只与本次刷新的数据成正比；
+- 段是二进制文件：倒排列表块（编码见codec.py）之后是词典（有序的term ID数组、块偏移和每个term的
+  文档频率/总词频/最大词频），读取时内存映射，按term ID二分查找并只解码所需的倒排列表，
+  词项统计直接从词典读取，不需要解码倒排列表；
+- 段按层级（tier）组织，同一层的段数达到merge_factor时合并为上一层的一个段，
+  合并在后台线程池中进行（INDEX_OPTIMIZATION['enable_background_merge']/['merge_thread_count']）；
+- 段列表记录在分片元数据文件中，段文件写完后才加入列表，合并完成后才删除被合并的段，
+  任何时刻读到的段列表都是完整的。
+
+内存中的倒排列表是按列追加的PostingBuffer，段合并按列（PostingColumns）进行，
+都不创建倒排列表项对象；get_postings()返回时才按列生成。
+"""
+
+import glob
+import heapq
+import json
+import logging
+import os
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from config.indexer_config import INDEX_OPTIMIZATION
+from .codec import PostingBuffer, PostingCodec, PostingColumns
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".seg"
+
+_MAGIC = b'SEGMENT1'
+_FORMAT_VERSION = 3
+_TRAILER = '<QII8s'
+_TRAILER_SIZE = struct.calcsize(_TRAILER)
+_UINT32 = '<u4'
+
+_merge_executor: Optional[ThreadPoolExecutor] = None
+_merge_executor_lock = threading.Lock()
+
+
+def _get_merge_executor() -> ThreadPoolExecutor:
+    """所有分片共享的后台合并线程池"""
+    global _merge_executor
+    if _merge_executor is None:
+        with _merge_executor_lock:
+            if _merge_executor is None:
+                _merge_executor = ThreadPoolExecutor(
+                    max_workers=max(1, INDEX_OPTIMIZATION.get('merge_thread_count', 2)),
+                    thread_name_prefix="segment-merge"
+                )
+    return _merge_executor
+
+
+@dataclass
+class TermStats:
+    """词项统计：文档频率（倒排列表长度）、总词频和最大词频"""
+    doc_freq: int = 0
+    total_tf: int = 0
+    max_tf: int = 0
+
+    def add(self, other: 'TermStats'):
+        """累加另一部分倒排列表（其他段或内存中）的统计"""
+        self.doc_freq += other.doc_freq
+        self.total_tf += other.total_tf
+        self.max_tf = max(self.max_tf, other.max_tf)
+
+    @classmethod
+    def of(cls, postings: Any) -> 'TermStats':
+        """统计一个倒排列表（倒排列表项对象的列表或PostingColumns）"""
+        if isinstance(postings, PostingColumns):
+            return cls.of_tfs(postings.ints['tf'])
+        tfs = [posting.tf for posting in postings]
+        return cls(len(tfs), sum(tfs), max(tfs, default=0))
+
+    @classmethod
+    def of_tfs(cls, tfs: np.ndarray) -> 'TermStats':
+        """由倒排列表的tf列统计"""
+        return cls(len(tfs), int(tfs.sum(dtype=np.uint64)), int(tfs.max()) if len(tfs) else 0)
+
+
+def write_segment(path: str, items: Iterable[Tuple[int, Any]], codec: PostingCodec,
+                  norms: Optional[np.ndarray] = None) -> Tuple[int, int]:
+    """
+    按term ID升序写出段文件（先写临时文件再替换），可以流式写入
+
+    文件格式：
+        [MAGIC] [倒排列表块...] [term ID: uint32 × V] [块偏移: uint64 × (V+1)]
+        [文档频率: uint32 × V] [最大词频: uint32 × V] [总词频: uint64 × V]
+        [尾部: 词典起始位置uint64, V uint32, 版本uint32, MAGIC]
+
+    倒排列表为倒排列表项对象的列表、PostingBuffer或PostingColumns，需要有tf字段；
+    norms为编码跳表时使用的文档级取值（见PostingCodec）。
+
+    Returns:
+        (term数, 倒排列表项数)
+    """
+    term_ids = []
+    offsets = [0]
+    doc_freqs = []
+    total_tfs = []
+    max_tfs = []
+    num_postings = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_MAGIC)
+        for term_id, postings in items:
+            postings = codec.columns(postings)
+            block = codec.encode(postings, norms)
+            f.write(block)
+            term_ids.append(term_id)
+            offsets.append(offsets[-1] + len(block))
+            stats = TermStats.of(postings)
+            doc_freqs.append(stats.doc_freq)
+            total_tfs.append(stats.total_tf)
+            max_tfs.append(stats.max_tf)
+            num_postings += len(postings)
+
+        f.write(b'\0' * (-f.tell() % 8))
+        dictionary_start = f.tell()
+        f.write(np.asarray(term_ids, dtype=_UINT32).tobytes())
+        f.write(b'\0' * (-f.tell() % 8))
+        f.write(np.asarray(offsets, dtype='<u8').tobytes())
+        f.write(np.asarray(doc_freqs, dtype=_UINT32).tobytes())
+        f.write(np.asarray(max_tfs, dtype=_UINT32).tobytes())
+        f.write(np.asarray(total_tfs, dtype='<u8').tobytes())
+        f.write(struct.pack(_TRAILER, dictionary_start, len(term_ids), _FORMAT_VERSION, _MAGIC))
+    os.replace(tmp_path, path)
+    return len(term_ids), num_postings
+
+
+class SegmentReader:
+    """
+    只读的段文件，以内存映射方式打开
+
+    词典（term ID数组、块偏移和词项统计）是映射上的视图，查找一个term只需二分查找访问O(log V)个页面，
+    并只解码该term的倒排列表，与段的大小无关；段被合并删除后已打开的映射仍然有效
+    """
+
+    def __init__(self, path: str, codec: PostingCodec):
+        self.path = path
+        self.codec = codec
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        dictionary_start, num_terms, version, magic = struct.unpack(
+            _TRAILER, data[-_TRAILER_SIZE:].tobytes()
+        )
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported segment file: {path}")
+
+        # 切片普通ndarray视图比切片memmap对象开销小得多
+        self._data = data = data.view(np.ndarray)
+        self.term_ids = data[dictionary_start:dictionary_start + 4 * num_terms].view(_UINT32)
+        offsets_start = dictionary_start + 4 * num_terms
+        offsets_start += -offsets_start % 8
+        self.offsets = data[offsets_start:offsets_start + 8 * (num_terms + 1)].view('<u8')
+        stats_start = offsets_start + 8 * (num_terms + 1)
+        self.doc_freqs = data[stats_start:stats_start + 4 * num_terms].view(_UINT32)
+        self.max_tfs = data[stats_start + 4 * num_terms:stats_start + 8 * num_terms].view(_UINT32)
+        self.total_tfs = data[stats_start + 8 * num_terms:stats_start + 16 * num_terms].view('<u8')
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def _block(self, index: int) -> np.ndarray:
+        start = len(_MAGIC) + int(self.offsets[index])
+        end = len(_MAGIC) + int(self.offsets[index + 1])
+        return self._data[start:end]
+
+    def _find(self, term_id: int) -> int:
+        """term在词典中的下标，不存在时返回-1"""
+        index = int(np.searchsorted(self.term_ids, term_id))
+        if index >= len(self.term_ids) or int(self.term_ids[index]) != term_id:
+            return -1
+        return index
+
+    def get_encoded(self, term_id: int) -> Optional[np.ndarray]:
+        """获取term的编码后的倒排列表（映射上的uint8视图），不存在时返回None"""
+        index = self._find(term_id)
+        return self._block(index) if index >= 0 else None
+
+    def term_stats(self, term_id: int) -> Optional[TermStats]:
+        """从词典读取term的统计信息，不解码倒排列表，不存在时返回None"""
+        index = self._find(term_id)
+        if index < 0:
+            return None
+        return TermStats(int(self.doc_freqs[index]), int(self.total_tfs[index]), int(self.max_tfs[index]))
+
+    def get(self, term_id: int) -> List[Any]:
+        """获取term的倒排列表，不存在时返回空列表"""
+        block = self.get_encoded(term_id)
+        return self.codec.decode(block) if block is not None else []
+
+    def get_columns(self, term_id: int) -> Optional[PostingColumns]:
+        """按列获取term的倒排列表，不存在时返回None"""
+        block = self.get_encoded(term_id)
+        return self.codec.decode_columns(block) if block is not None else None
+
+    def terms(self) -> List[int]:
+        """段中的全部term ID（升序）"""
+        return self.term_ids.tolist()
+
+    def items(self) -> Iterator[Tuple[int, PostingColumns]]:
+        """按term ID升序遍历(term ID, 按列解码的倒排列表)"""
+        decode = self.codec.decode_columns
+        for index, term_id in enumerate(self.term_ids.tolist()):
+            yield term_id, decode(self._block(index))
+
+    def close(self):
+        """释放映射（实际解除映射在最后一个视图被回收时进行）"""
+        self._data = self.term_ids = self.offsets = None
+        self.doc_freqs = self.max_tfs = self.total_tfs = None
+
+
+def merge_items(readers: List[SegmentReader]) -> Iterator[Tuple[int, PostingColumns]]:
+    """按term ID多路归并若干段，同一term的倒排列表按列合并后按doc_id排序"""
+    streams = [
+        ((term_id, order, postings) for term_id, postings in reader.items())
+        for order, reader in enumerate(readers)
+    ]
+    current_term = None
+    parts: List[PostingColumns] = []
+    for term_id, _, postings in heapq.merge(*streams, key=lambda item: (item[0], item[1])):
+        if term_id != current_term:
+            if parts:
+                yield current_term, PostingColumns.merge(parts)
+            current_term, parts = term_id, [postings]
+        else:
+            parts.append(postings)
+    if parts:
+        yield current_term, PostingColumns.merge(parts)
+
+
+class SegmentedShard:
+    """
+    由不可变磁盘段组成的倒排索引分片
+
+    子类通过file_prefix/label区分文件名和日志，并可覆盖_empty_metadata()和
+    _update_stats()维护额外的统计信息，覆盖_norm_values()为编码提供文档级取值
+    """
+
+    file_prefix = "shard"
+    label = "shard"
+    # 倒排列表的编码方式，由子类按各自的倒排列表项类型设置
+    codec: PostingCodec = None
+
+    def __init__(self, shard_id: int, base_path: str, max_memory_size: int = 100,
+                 clear_disk: bool = False, merge_factor: Optional[int] = None,
+                 background_merge: Optional[bool] = None):
+        """
+        初始化分片
+
+        Args:
+            shard_id: 分片ID
+            base_path: 索引目录
+            max_memory_size: 内存中倒排列表项数（含term数）达到该值时刷新为新段
+            clear_disk: 是否删除已有的段和元数据
+            merge_factor: 同一层的段数达到该值时合并，None时使用INDEX_OPTIMIZATION['merge_factor']
+            background_merge: 是否在后台线程中合并，None时使用INDEX_OPTIMIZATION['enable_background_merge']
+        """
+        self.shard_id = shard_id
+        self.base_path = base_path
+        self.max_memory_size = max_memory_size
+        self.merge_factor = max(2, merge_factor or INDEX_OPTIMIZATION.get('merge_factor', 8))
+        if background_merge is None:
+            background_merge = INDEX_OPTIMIZATION.get('enable_background_merge', True)
+        self.background_merge = background_merge
+
+        # 内存中的倒排索引
+        self.memory_index: Dict[int, PostingBuffer] = {}  # term_id -> 按列追加的倒排列表
+        self.memory_size = 0
+
+        # 元数据文件（含段列表）
+        self.metadata_file = os.path.join(base_path, f"{self.file_prefix}_{shard_id}_metadata.json")
+
+        # 锁用于线程安全（刷新在持有锁时触发，使用可重入锁）
+        self.lock = threading.RLock()
+        self._readers: Dict[str, SegmentReader] = {}
+        self._merging: Set[str] = set()
+        # 合并失败的段，在下一次刷新之前不再参与合并（避免持续失败时反复重试）
+        self._failed_merges: Set[str] = set()
+        self._pending_merges: List[Future] = []
+
+        if clear_disk:
+            self._clear_disk()
+
+        # 加载元数据
+        self._load_metadata()
+
+        logger.info(f"Initialized {self.label} {shard_id} with max_memory_size={max_memory_size}")
+
+    # ---- 元数据 ----
+
+    def _empty_metadata(self) -> Dict[str, Any]:
+        return {'term_count': 0, 'doc_count': 0}
+
+    def _update_stats(self, index: Dict[int, PostingBuffer]):
+        """刷新新段时更新子类维护的统计信息"""
+
+    def _norm_values(self) -> Optional[np.ndarray]:
+        """编码倒排列表时使用的文档级取值（按doc_id索引），见PostingCodec的impact_fields"""
+        return None
+
+    def _load_metadata(self):
+        """加载分片元数据"""
+        self.metadata = self._empty_metadata()
+        if os.path.exists(self.metadata_file):
+            try:
+                with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                    self.metadata.update(json.load(f))
+            except Exception as e:
+                logger.error(f"Error loading metadata for {self.label} {self.shard_id}: {e}")
+        self.metadata.setdefault('segments', [])
+        self.metadata.setdefault('next_segment', 0)
+
+    def _save_metadata(self):
+        """保存分片元数据（先写临时文件再替换，读取端不会看到写了一半的段列表）"""
+        try:
+            tmp_path = f"{self.metadata_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.metadata_file)
+        except Exception as e:
+            logger.error(f"Error saving metadata for {self.label} {self.shard_id}: {e}")
+
+    def _clear_disk(self):
+        """删除分片的全部段和元数据"""
+        pattern = os.path.join(self.base_path, f"{self.file_prefix}_{self.shard_id}_*{SEGMENT_SUFFIX}")
+        legacy = os.path.join(self.base_path, f"{self.file_prefix}_{self.shard_id}.pkl")
+        for path in glob.glob(pattern) + [legacy, self.metadata_file]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ---- 段文件 ----
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.base_path, name)
+
+    def _new_segment_name(self) -> str:
+        name = f"{self.file_prefix}_{self.shard_id}_{self.metadata['next_segment']:06d}{SEGMENT_SUFFIX}"
+        self.metadata['next_segment'] += 1
+        return name
+
+    def _reader(self, name: str) -> SegmentReader:
+        reader = self._readers.get(name)
+        if reader is None:
+            reader = self._readers[name] = SegmentReader(self._segment_path(name), self.codec)
+        return reader
+
+    def _segment_readers(self) -> List[SegmentReader]:
+        """按写入顺序返回当前全部段的读取器"""
+        return [self._reader(segment['name']) for segment in self.metadata['segments']]
+
+    # ---- 写入 ----
+
+    def add(self, term_id: int, row: Sequence[int], values: Sequence[int],
+            optional_values: Optional[Sequence[int]] = None):
+        """
+        按字段添加倒排列表项，不创建倒排列表项对象
+
+        Args:
+            term_id: 词项ID
+            row: 各整数字段的取值，按codec.int_fields的顺序（如(doc_id, tf)）
+            values: 列表字段（positions）
+            optional_values: 可选列表字段（offsets）
+        """
+        with self.lock:
+            buffer = self.memory_index.get(term_id)
+            if buffer is None:
+                buffer = self.memory_index[term_id] = self.codec.new_buffer()
+                self.memory_size += 1
+
+            buffer.append(row, values, optional_values)
+            self.memory_size += 1
+
+            # 检查是否需要刷新到磁盘
+            if self.memory_size >= self.max_memory_size:
+                self._flush_to_disk()
+
+    def add_posting(self, term_id: int, posting: Any):
+        """添加倒排列表项对象"""
+        optional = self.codec.optional_list_field
+        self.add(term_id, [getattr(posting, field) for field in self.codec.int_fields],
+                 getattr(posting, self.codec.list_field), getattr(posting, optional) if optional else None)
+
+    def _flush_to_disk(self):
+        """将内存中的倒排列表写成一个新段，不读取也不重写已有的段"""
+        if not self.memory_index:
+            return
+
+        try:
+            name = self._new_segment_name()
+            items = ((term_id, self.memory_index[term_id]) for term_id in sorted(self.memory_index))
+            terms, postings = write_segment(self._segment_path(name), items, self.codec, self._norm_values())
+            self.metadata['segments'].append({
+                'name': name, 'tier': 0, 'terms': terms, 'postings': postings
+            })
+            self.metadata['doc_count'] += postings
+            self._update_stats(self.memory_index)
+            self._save_metadata()
+
+            # 清空内存
+            self.memory_index = {}
+            self.memory_size = 0
+
+            logger.info(f"Flushed {self.label} {self.shard_id} to segment {name}, terms: "
+                        f"{self.metadata['segments'][-1]['terms']}")
+        except Exception as e:
+            logger.error(f"Error flushing {self.label} {self.shard_id} to disk: {e}")
+            return
+
+        # 每次刷新后重试之前合并失败的段
+        with self.lock:
+            self._failed_merges.clear()
+        self._schedule_merges()
+
+    # ---- 合并 ----
+
+    def _pick_merge(self) -> Optional[List[Dict[str, Any]]]:
+        """选出一组待合并的段：段数达到merge_factor的最低一层中最早的merge_factor个段"""
+        by_tier: Dict[int, List[Dict[str, Any]]] = {}
+        for segment in self.metadata['segments']:
+            if segment['name'] not in self._merging and segment['name'] not in self._failed_merges:
+                by_tier.setdefault(segment['tier'], []).append(segment)
+        for tier in sorted(by_tier):
+            if len(by_tier[tier]) >= self.merge_factor:
+                inputs = by_tier[tier][:self.merge_factor]
+                self._merging.update(segment['name'] for segment in inputs)
+                return inputs
+        return None
+
+    def _schedule_merges(self):
+        """按合并策略安排合并：后台模式提交到线程池，否则立即在当前线程合并"""
+        with self.lock:
+            while True:
+                inputs = self._pick_merge()
+                if inputs is None:
+                    return
+                if self.background_merge:
+                    self._pending_merges.append(_get_merge_executor().submit(self._merge, inputs))
+                    return
+                self._merge(inputs)
+
+    def _merge(self, inputs: List[Dict[str, Any]]):
+        """合并一组段为上一层的一个新段（读取和写入都在锁外进行）"""
+        names = [segment['name'] for segment in inputs]
+        name = None
+        try:
+            with self.lock:
+                readers = [self._reader(old) for old in names]
+                name = self._new_segment_name()
+                norms = self._norm_values()
+
+            # 各段都按term ID有序，多路归并后流式写出，不需要把合并结果整体放在内存中
+            terms, postings = write_segment(self._segment_path(name), merge_items(readers), self.codec, norms)
+
+            segment = {
+                'name': name,
+                'tier': max(segment['tier'] for segment in inputs) + 1,
+                'terms': terms,
+                'postings': postings
+            }
+            with self.lock:
+                # 新段放在被合并的第一个段的位置，保持段列表大致按写入顺序
+                segments = self.metadata['segments']
+                index = min(i for i, s in enumerate(segments) if s['name'] in names)
+                remaining = [s for s in segments if s['name'] not in names]
+                remaining.insert(index, segment)
+                self.metadata['segments'] = remaining
+                self._save_metadata()
+
+                for old in names:
+                    reader = self._readers.pop(old, None)
+                    if reader is not None:
+                        reader.close()
+                    os.remove(self._segment_path(old))
+
+            logger.info(f"Merged {len(names)} segments of {self.label} {self.shard_id} into {name}")
+        except Exception as e:
+            logger.error(f"Error merging segments of {self.label} {self.shard_id}: {e}")
+            with self.lock:
+                self._merging.difference_update(names)
+                self._failed_merges.update(names)
+                if name is not None and name not in (s['name'] for s in self.metadata['segments']):
+                    # 删除写了一半的输出段
+                    try:
+                        os.remove(self._segment_path(name))
+                    except OSError:
+                        pass
+            return
+
+        with self.lock:
+            self._merging.difference_update(names)
+
+        # 合并出的段可能使上一层也达到合并条件
+        self._schedule_merges()
+
+    def merge_from(self, shards: Sequence['SegmentedShard']):
+        """
+        把其他目录中同一分片ID的分片（如并行构建的各部分）多路归并为本分片的一个新段，并累加其统计信息
+
+        shards按doc_id范围的先后顺序给出，同一term的倒排列表合并后按doc_id排序
+        """
+        readers = [reader for shard in shards for reader in shard._segment_readers()]
+        if readers:
+            with self.lock:
+                name = self._new_segment_name()
+                norms = self._norm_values()
+            terms, postings = write_segment(self._segment_path(name), merge_items(readers), self.codec, norms)
+            tier = max(segment['tier'] for shard in shards for segment in shard.metadata['segments']) + 1
+            with self.lock:
+                self.metadata['segments'].append({'name': name, 'tier': tier, 'terms': terms, 'postings': postings})
+        with self.lock:
+            for key in self._empty_metadata():
+                if key != 'term_count':
+                    self.metadata[key] += sum(shard.metadata.get(key, 0) for shard in shards)
+            self._save_metadata()
+        logger.info(f"Merged {len(shards)} parts into {self.label} {self.shard_id}")
+
+    def merge_options(self, tmp_dir: str) -> Dict[str, Any]:
+        """
+        在其他进程中打开同一分片（如并行构建的归并进程调用merge_from）所需的构造参数，需要可以pickle
+
+        子类按需补充，tmp_dir为可以写入临时文件的目录
+        """
+        return {'max_memory_size': self.max_memory_size}
+
+    def reload(self):
+        """重新读取元数据（其他进程修改了本分片的段之后），内存中的数据不变"""
+        with self.lock:
+            self.close()
+            self._failed_merges.clear()
+            self._load_metadata()
+
+    def wait_for_merges(self):
+        """等待已安排的后台合并完成（包括合并过程中级联安排的合并）"""
+        while True:
+            with self.lock:
+                pending, self._pending_merges = self._pending_merges, []
+            if not pending:
+                return
+            for future in pending:
+                future.result()
+
+    # ---- 读取 ----
+
+    def get_columns(self, term_id: int) -> Optional[PostingColumns]:
+        """按列获取指定term ID的倒排列表（合并各段和内存中的数据，按doc_id排序），不存在时返回None"""
+        with self.lock:
+            parts = [columns for columns in (reader.get_columns(term_id) for reader in self._segment_readers())
+                     if columns is not None and len(columns)]
+            memory_postings = self.memory_index.get(term_id)
+            if memory_postings:
+                parts.append(self.codec.columns(memory_postings))
+        return PostingColumns.merge(parts) if parts else None
+
+    def get_postings(self, term_id: int) -> List[Any]:
+        """获取指定term ID的倒排列表（合并各段和内存中的数据，按doc_id排序）"""
+        columns = self.get_columns(term_id)
+        return self.codec.postings(columns) if columns is not None else []
+
+    def get_encoded_postings(self, term_id: int) -> List[np.ndarray]:
+        """获取指定term ID在各段（以及内存中）的编码后的倒排列表，按写入顺序，不合并也不解码"""
+        with self.lock:
+            encoded = [block for block in (reader.get_encoded(term_id) for reader in self._segment_readers())
+                       if block is not None]
+            memory_postings = self.memory_index.get(term_id)
+            if memory_postings:
+                encoded.append(np.frombuffer(self.codec.encode(memory_postings, self._norm_values()), dtype=np.uint8))
+        return encoded
+
+    def get_term_stats(self, term_id: int) -> TermStats:
+        """获取指定term ID的统计信息（各段词典中的统计与内存中的倒排列表合计）"""
+        with self.lock:
+            stats = TermStats()
+            for reader in self._segment_readers():
+                segment_stats = reader.term_stats(term_id)
+                if segment_stats is not None:
+                    stats.add(segment_stats)
+            memory_postings = self.memory_index.get(term_id)
+            if memory_postings:
+                # 只读tf列，不复制位置等列表字段
+                stats.add(TermStats.of_tfs(self.codec.int_column(memory_postings, 'tf')))
+        return stats
+
+    def get_doc_freqs(self) -> Dict[int, int]:
+        """全部term的文档频率（从各段词典读取，加上内存中的倒排列表），增量构建后重新计算IDF表时使用"""
+        doc_freqs: Dict[int, int] = {}
+        with self.lock:
+            for reader in self._segment_readers():
+                for term_id, doc_freq in zip(reader.term_ids.tolist(), reader.doc_freqs.tolist()):
+                    doc_freqs[term_id] = doc_freqs.get(term_id, 0) + doc_freq
+            for term_id, postings in self.memory_index.items():
+                doc_freqs[term_id] = doc_freqs.get(term_id, 0) + len(postings)
+        return doc_freqs
+
+    def get_all_terms(self) -> Set[int]:
+        """获取所有term ID"""
+        with self.lock:
+            terms = set(self.memory_index.keys())
+            for reader in self._segment_readers():
+                terms.update(reader.terms())
+            return terms
+
+    def finalize(self):
+        """最终化分片，确保所有数据都写入磁盘并完成后台合并"""
+        with self.lock:
+            self._flush_to_disk()
+        self.wait_for_merges()
+        with self.lock:
+            self.metadata['term_count'] = len(self.get_all_terms())
+            self._save_metadata()
+        logger.info(f"Finalized {self.label} {self.shard_id} with {len(self.metadata['segments'])} segments")
+
+    def clear(self):
+        """清空分片（内存中的数据、全部段和元数据），重新构建前调用"""
+        self.wait_for_merges()
+        with self.lock:
+            self.close()
+            self._clear_disk()
+            self.memory_index = {}
+            self.memory_size = 0
+            self._failed_merges.clear()
+            self._load_metadata()
+
+    def close(self):
+        """关闭段读取器"""
+        with self.lock:
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
@@ -0,0 +1,92 @@
+"""
+文档静态权重（与查询无关的先验分数）
+
+离线根据爬虫采集的链接图计算PageRank，并按pages表的doc_id写成稠密的float32数组
+（static_rank.npy，取值范围[0, 1]），供搜索时作为同分排序依据。
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from utils.link_graph import LinkGraph, build_csr, normalize_link
+
+logger = logging.getLogger(__name__)
+
+STATIC_RANK_FILE = "static_rank.npy"
+
+
+def compute_static_rank(db_path: str = "data/crawler/crawler.db",
+                        graph_dir: str = "data/crawler/graph",
+                        index_path: str = "data/indexer",
+                        damping: float = 0.85) -> Dict[str, Any]:
+    """
+    计算并保存每个文档的静态权重
+
+    Args:
+        db_path: 爬虫数据库路径
+        graph_dir: 链接图目录
+        index_path: 索引存储路径
+        damping: PageRank阻尼系数
+
+    Returns:
+        统计信息
+    """
+    start_time = time.time()
+    build_csr(graph_dir)
+    graph = LinkGraph(graph_dir)
+    rank = graph.pagerank(damping=damping)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT id, url FROM pages").fetchall()
+    finally:
+        conn.close()
+
+    max_doc_id = max((doc_id for doc_id, _ in rows), default=-1)
+    scores = np.zeros(max_doc_id + 1, dtype=np.float32)
+    url_ids = graph.url_ids
+    matched = 0
+    for doc_id, url in rows:
+        node = url_ids.get(normalize_link(url))
+        if node is not None:
+            # 乘以节点数使平均值为1，再取对数压缩长尾
+            scores[doc_id] = np.log1p(rank[node] * graph.num_nodes)
+            matched += 1
+
+    if scores.size and scores.max() > 0:
+        scores /= scores.max()
+
+    os.makedirs(index_path, exist_ok=True)
+    np.save(os.path.join(index_path, STATIC_RANK_FILE), scores)
+
+    stats = {
+        'graph_nodes': graph.num_nodes,
+        'graph_edges': graph.num_edges,
+        'documents': len(rows),
+        'documents_ranked': matched,
+        'processing_time': time.time() - start_time
+    }
+    logger.info(f"Static rank computed: {stats}")
+    return stats
+
+
+class StaticRank:
+    """只读的文档静态权重表，文件不存在时所有文档权重为0"""
+
+    def __init__(self, index_path: str = "data/indexer"):
+        path = os.path.join(index_path, STATIC_RANK_FILE)
+        self.scores = np.load(path, mmap_mode='r') if os.path.exists(path) else np.zeros(0, dtype=np.float32)
+
+    def get(self, doc_id: int) -> float:
+        """获取文档静态权重"""
+        if 0 <= doc_id < len(self.scores):
+            return float(self.scores[doc_id])
+        return 0.0
+
+    def __bool__(self) -> bool:
+        return len(self.scores) > 0
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+倒排列表编码测试脚本
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25Posting
+from indexer.codec import PostingCodec, PostingColumns, pack_uints, unpack_uints
+from indexer.inverted_index import Posting
+
+
+def test_pack_uints():
+    """测试位打包与解包（包括跨块、全0块和32位最大值）"""
+    print("🔍 测试位打包...")
+    rng = np.random.default_rng(0)
+    for values in ([], [0] * 200, [2 ** 32 - 1, 0, 7], rng.integers(0, 1000, 1000)):
+        values = np.asarray(values, dtype=np.uint32)
+        packed = pack_uints(values)
+        buffer = np.frombuffer(b'xx' + packed + b'yy', dtype=np.uint8)
+        decoded, pos = unpack_uints(buffer, 2, len(values))
+        assert decoded.tolist() == values.tolist() and pos == 2 + len(packed)
+    # 小于1024的值每个最多10位
+    assert len(pack_uints(rng.integers(0, 1024, 1280))) == 10 * (1 + 10 * 128 // 8)
+
+
+def test_posting_codec_roundtrip():
+    """测试压缩与不压缩两种格式的编解码"""
+    print("\n🔍 测试倒排列表编解码...")
+    rng = random.Random(1)
+    doc_ids = sorted(rng.sample(range(1_000_000), 500))
+    postings = []
+    for doc_id in doc_ids:
+        positions = sorted(rng.sample(range(5000), rng.randint(1, 6)))
+        postings.append(Posting(doc_id=doc_id, positions=positions, tf=len(positions),
+                                offsets=[position * 3 for position in positions]))
+    # tf与positions长度不同、offsets缺失、doc_id无序的情况
+    irregular = [
+        Posting(doc_id=9, positions=[5, 2], tf=7),
+        Posting(doc_id=3, positions=[], tf=1),
+        Posting(doc_id=2 ** 32 - 1, positions=[2 ** 32 - 1, 0], tf=2),
+    ]
+    bm25 = [BM25Posting(doc_id=i * 2, positions=[i], tf=1) for i in range(300)]
+
+    for compress in (True, False):
+        codec = PostingCodec(Posting, ('doc_id', 'tf'), 'positions', 'offsets', compress=compress)
+        bm25_codec = PostingCodec(BM25Posting, ('doc_id', 'tf'), 'positions', compress=compress)
+        for codec_, items in ((codec, postings), (codec, irregular), (codec, []), (bm25_codec, bm25)):
+            encoded = codec_.encode(items)
+            assert codec_.decode(np.frombuffer(encoded, dtype=np.uint8)) == items
+
+    raw = len(PostingCodec(Posting, ('doc_id', 'tf'), 'positions', 'offsets', compress=False).encode(postings))
+    packed = len(PostingCodec(Posting, ('doc_id', 'tf'), 'positions', 'offsets', compress=True).encode(postings))
+    print(f"   未压缩: {raw} 字节, 压缩: {packed} 字节")
+    assert packed * 2 < raw
+
+
+def test_block_index():
+    """测试跳表：每块的最后一个doc_id、字段最值、由文档长度数组得到的竞争性取值对，以及按块解码"""
+    print("\n🔍 测试跳表...")
+    postings = [BM25Posting(doc_id=i * 3, positions=[0] * (i % 5 + 1), tf=i % 5 + 1) for i in range(300)]
+    norms = np.zeros(900, dtype=np.uint32)
+    norms[::3] = [200 - i % 97 for i in range(300)]
+    for compress in (True, False):
+        codec = PostingCodec(BM25Posting, ('doc_id', 'tf'), 'positions',
+                             impact_fields=('tf', 'doc_length'), compress=compress)
+        encoded = np.frombuffer(codec.encode(postings, norms), dtype=np.uint8)
+        index = codec.block_index(encoded, norms)
+        assert len(index) == 3 and index.size == 300 and codec.count(encoded) == 300
+        assert index.first_doc == 0 and index.last_doc.tolist() == [127 * 3, 255 * 3, 299 * 3]
+        for block in range(3):
+            chunk = postings[block * 128:(block + 1) * 128]
+            columns = codec.decode_block(encoded, index, block)
+            assert columns['doc_id'].tolist() == [p.doc_id for p in chunk]
+            assert columns['tf'].tolist() == [p.tf for p in chunk] and 'doc_length' not in columns
+            assert index.maxima['tf'][block] == max(p.tf for p in chunk)
+            assert index.minima['tf'][block] == min(p.tf for p in chunk)
+            # 竞争性取值对：没有其他项tf不更小且文档长度不更大
+            pairs = {(p.tf, int(norms[p.doc_id])) for p in chunk}
+            frontier = {(tf, length) for tf, length in pairs
+                        if not any((t, l) != (tf, length) and t >= tf and l <= length for t, l in pairs)}
+            ends, tfs, lengths = index.impacts
+            start = ends[block - 1] if block else 0
+            assert set(zip(tfs[start:ends[block]].tolist(), lengths[start:ends[block]].tolist())) == frontier
+            assert ends[block] - start == len(frontier)
+
+        # 只有一块时由解码计算
+        single = np.frombuffer(codec.encode(postings[:5], norms), dtype=np.uint8)
+        index = codec.block_index(single, norms)
+        assert index.first_doc == 0 and index.last_doc.tolist() == [12] and index.maxima['tf'].tolist() == [5]
+        assert len(codec.block_index(np.frombuffer(codec.encode([]), dtype=np.uint8), norms)) == 0
+        # 没有文档长度时无法计算竞争性取值对
+        try:
+            codec.block_index(single)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_posting_buffer():
+    """测试按列追加的内存倒排列表：与倒排列表项对象编码相同，按列合并、排序后再生成对象"""
+    print("\n🔍 测试按列的倒排列表...")
+    codec = PostingCodec(Posting, ('doc_id', 'tf'), 'positions', 'offsets')
+    postings = [Posting(doc_id=i * 2, positions=[i, i + 4], tf=2, offsets=[i * 3, i * 3 + 9]) for i in range(300)]
+    buffer = codec.new_buffer()
+    for posting in postings:
+        codec.append(buffer, posting)
+    assert len(buffer) == 300 and buffer.values.itemsize == 4
+    # tf列直接读取array，不复制，视图释放后可以继续追加
+    tfs = codec.int_column(buffer, 'tf')
+    assert not tfs.flags.owndata and tfs.sum() == 600
+    del tfs
+    assert codec.encode(buffer) == codec.encode(postings)
+    assert codec.postings(buffer) == postings
+    encoded = np.frombuffer(codec.encode(buffer), dtype=np.uint8)
+    assert codec.postings(codec.decode_columns(encoded)) == codec.decode(encoded) == postings
+
+    # 任一项缺少offsets时整个倒排列表不保存
+    buffer.append((601, 1), [7])
+    assert buffer.optional_values is None and codec.postings(buffer)[0].offsets is None
+    assert codec.decode(np.frombuffer(codec.encode(buffer), dtype=np.uint8))[-1] == \
+        Posting(doc_id=601, positions=[7], tf=1)
+
+    # 两部分的doc_id交错，合并后按doc_id稳定排序，positions随之移动
+    odd = [Posting(doc_id=i * 2 + 1, positions=[i], tf=1, offsets=[i]) for i in range(300)]
+    merged = PostingColumns.merge([codec.columns(postings), codec.columns(odd)])
+    assert codec.postings(merged) == sorted(postings + odd, key=lambda p: p.doc_id)
+    assert PostingColumns.merge([codec.columns(postings[:1]), codec.columns(postings[1:2])]).values.tolist() == \
+        [0, 4, 1, 5]
+
+
+if __name__ == "__main__":
+    test_pack_uints()
+    test_posting_codec_roundtrip()
+    test_block_index()
+    test_posting_buffer()
+    print("\n🎉 所有测试通过！")
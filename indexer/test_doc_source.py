@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+文档流式读取测试脚本
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.doc_source import DocumentSource
+from indexer.testing import create_pages_db
+
+
+def _create_db(db_path: str, ids):
+    create_pages_db(db_path, [
+        (doc_id, f"https://a.com/{doc_id}", f"标题{doc_id}", f"内容{doc_id}", float(doc_id % 10)) for doc_id in ids
+    ], columns=('id', 'url', 'title', 'content', 'crawl_time'))
+
+
+def test_keyset_batches():
+    """测试按id分批读取（id不连续），以及预取与不预取结果相同"""
+    print("🔍 测试键集分页读取...")
+    ids = [doc_id for doc_id in range(1, 2000) if doc_id % 7]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        _create_db(db_path, ids)
+
+        for prefetch in (0, 2):
+            source = DocumentSource(db_path, batch_size=100, prefetch=prefetch)
+            assert source.immutable and source.count() == len(ids)
+            batches = list(source.batches())
+            assert [len(batch) for batch in batches[:-1]] == [100] * (len(batches) - 1)
+            assert [row[0] for batch in batches for row in batch] == ids
+            assert batches[0][0] == (1, "标题1", "内容1")
+
+        # 提前结束时预取线程退出
+        for _ in DocumentSource(db_path, batch_size=10, prefetch=1).batches():
+            break
+        assert not [t for t in threading.enumerate() if t.name == "doc-source-prefetch"]
+
+        try:
+            DocumentSource(db_path, ('title', 'id'))
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_filters():
+    """测试id范围和爬取时间过滤"""
+    print("\n🔍 测试过滤条件...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        _create_db(db_path, range(1, 501))
+
+        # 相邻的id范围覆盖全部文档且互不重叠
+        ranges = [(None, 100), (100, 350), (350, None)]
+        parts = [[row[0] for row in DocumentSource(db_path, ('id',), batch_size=64, start_id=start, end_id=end)]
+                 for start, end in ranges]
+        assert parts[0] == list(range(1, 100)) and parts[1] == list(range(100, 350))
+        assert sum(parts, []) == list(range(1, 501))
+
+        # 按文档数切分id范围
+        ranges = DocumentSource(db_path, ('id',), start_id=101).split_id_ranges(4)
+        assert ranges == [(101, 201), (201, 301), (301, 401), (401, None)]
+        assert DocumentSource(db_path, ('id',), start_id=498).split_id_ranges(4) == [(498, 499), (499, 500), (500, None)]
+
+        source = DocumentSource(db_path, ('id', 'crawl_time'), batch_size=7, start_id=200, min_crawl_time=7)
+        rows = list(source)
+        assert source.count() == len(rows) == 60
+        assert all(doc_id >= 200 and crawl_time > 7 for doc_id, crawl_time in rows)
+
+
+def test_wal_database():
+    """测试有未检查点的WAL文件时不使用immutable模式，能读到WAL中的数据"""
+    print("\n🔍 测试WAL数据库...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        _create_db(db_path, range(1, 11))
+        writer = sqlite3.connect(db_path)
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        writer.execute("INSERT INTO pages (id, url, title, content, crawl_time) VALUES (11, 'u', 't', 'c', 0)")
+        writer.commit()
+        try:
+            source = DocumentSource(db_path, ('id',))
+            assert not source.immutable
+            assert [row[0] for row in source] == list(range(1, 12))
+        finally:
+            writer.close()
+
+
+if __name__ == "__main__":
+    test_keyset_batches()
+    test_filters()
+    test_wal_database()
+    print("\n🎉 所有测试通过！")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+语料IDF表测试脚本
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25IndexBuilder
+from indexer.idf import IdfTable, smooth_idf
+from indexer.inverted_index import InvertedIndexBuilder
+from indexer.testing import create_pages_db
+from utils.text_processor import TextProcessor
+
+
+def test_idf_table_from_build():
+    """测试构建索引时写出IDF表，关键词提取据此过滤常见词"""
+    print("🔍 测试IDF表...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        index_path = os.path.join(tmp_dir, "indexer")
+        assert IdfTable.load(index_path) is None
+
+        create_pages_db(db_path, [
+            (i, f"https://a.com/{i}", "股票日报", f"今日股票{topic}", "")
+            for i, topic in enumerate(["上涨", "下跌", "震荡", "停牌"], start=1)
+        ])
+        InvertedIndexBuilder(db_path=db_path, index_path=index_path, num_shards=4).build_index()
+
+        idf = IdfTable.load(index_path)
+        assert len(idf) == len(idf.vocabulary)
+        assert abs(idf.get("股票") - smooth_idf(4, 4)) < 1e-6
+        assert abs(idf.get("停牌") - smooth_idf(1, 4)) < 1e-6
+        assert idf.get("不存在的词") == idf.default == max(idf.get("停牌"), idf.get("股票"))
+
+        keywords = TextProcessor().extract_keywords("股票停牌，股票停牌", top_k=1, idf=idf)
+        print(f"   关键词: {keywords}")
+        assert keywords == ["停牌"]
+
+
+def test_bm25_idf_from_term_dictionary():
+    """测试BM25的IDF从段词典读取，加载已有索引时可用，重新构建后缓存失效"""
+    print("\n🔍 测试BM25词典IDF...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        index_path = os.path.join(tmp_dir, "indexer")
+        create_pages_db(db_path, [
+            (i, f"https://a.com/{i}", "日报", f"今日{topic}", "")
+            for i, topic in enumerate(["股票", "基金", "债券", "银行", "股票"], start=1)
+        ])
+        bm25 = BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4)
+        bm25.build_index()
+        term_id = bm25.vocabulary.get_id("股票")
+        assert bm25._term_idf(term_id) == bm25._calculate_idf(2)
+
+        # 新的构建器读取已保存的统计信息，与构建时的IDF相同
+        loaded = BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4)
+        assert loaded.doc_stats['total_docs'] == 5 and loaded.doc_stats['generation'] == 1
+        assert loaded._term_idf(term_id) == bm25._term_idf(term_id)
+        assert loaded.search("股票") == bm25.search("股票", exhaustive=True)
+
+        # 重新构建后索引代数增加，IDF按新的文档频率计算
+        conn = sqlite3.connect(db_path)
+        conn.executemany("INSERT INTO pages (id, url, title, content, keywords) VALUES (?, ?, ?, ?, ?)", [
+            (i, f"https://a.com/{i}", "日报", "今日股票", "") for i in range(6, 9)
+        ])
+        conn.commit()
+        conn.close()
+        rebuilt = BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4)
+        rebuilt.build_index()
+        assert rebuilt.doc_stats['generation'] == 2
+        assert rebuilt._term_idf(term_id) == rebuilt._calculate_idf(5) != loaded._term_idf(term_id)
+
+
+if __name__ == "__main__":
+    test_idf_table_from_build()
+    test_bm25_idf_from_term_dictionary()
+    print("\n🎉 所有测试通过！")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+增量构建测试脚本
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25IndexBuilder
+from indexer.idf import IDF_FILE
+from indexer.inverted_index import InvertedIndexBuilder, InvertedIndexReader
+from indexer.testing import WORDS, create_pages_db, random_content
+
+PAGE_COLUMNS = ('url', 'title', 'content', 'keywords', 'crawl_time')
+
+
+def _page(rng: random.Random, url: str, crawl_time: float):
+    return (url, rng.choice(WORDS), random_content(rng), "", crawl_time)
+
+
+def _create_db(db_path: str, rng: random.Random):
+    # 最后一个页面分词后长度为0，计入文档数
+    create_pages_db(db_path, [_page(rng, f"https://a.com/{i}", 100.0) for i in range(300)]
+                    + [("https://a.com/empty", "", "", "", 100.0)], PAGE_COLUMNS)
+
+
+def _recrawl(db_path: str, rng: random.Random):
+    """与爬虫相同以INSERT OR REPLACE写入：40个页面内容变化（得到新的id），新增30个页面，删除5个页面"""
+    conn = sqlite3.connect(db_path)
+    pages = [_page(rng, f"https://a.com/{i}", 200.0) for i in rng.sample(range(5, 300), 40)]
+    pages += [_page(rng, f"https://b.com/{i}", 200.0) for i in range(30)]
+    conn.executemany(f"INSERT OR REPLACE INTO pages ({', '.join(PAGE_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", pages)
+    conn.execute("DELETE FROM pages WHERE url IN ('https://a.com/0', 'https://a.com/1', 'https://a.com/2', "
+                 "'https://a.com/3', 'https://a.com/4')")
+    conn.commit()
+    conn.close()
+
+
+def _builder(builder_cls: type, db_path: str, index_path: str):
+    # 两种索引共享词表，在前一个构建完成后再创建
+    return builder_cls(db_path=db_path, index_path=index_path, num_shards=4, batch_size=50, max_memory_size=200)
+
+
+def test_incremental_matches_full_build():
+    """测试增量构建后的检索结果、统计信息和IDF与重新全量构建相同"""
+    print("🔍 测试增量构建...")
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        _create_db(db_path, rng)
+        incremental_path = os.path.join(tmp_dir, "incremental")
+        _builder(InvertedIndexBuilder, db_path, incremental_path).build_index()
+        _builder(BM25IndexBuilder, db_path, incremental_path).build_index()
+        old_ids = {doc_id for doc_id, in sqlite3.connect(db_path).execute("SELECT id FROM pages")}
+
+        _recrawl(db_path, rng)
+        current_ids = {doc_id for doc_id, in sqlite3.connect(db_path).execute("SELECT id FROM pages")}
+        removed = old_ids - current_ids
+        assert len(removed) == 45
+
+        basic = _builder(InvertedIndexBuilder, db_path, incremental_path)
+        assert basic.update_index(since=150.0) == {'added': 70, 'deleted': 45}
+        assert _builder(BM25IndexBuilder, db_path, incremental_path).update_index(since=150.0) == \
+            {'added': 70, 'deleted': 45}
+        # 再次更新没有新文档
+        assert _builder(BM25IndexBuilder, db_path, incremental_path).update_index(since=150.0) == \
+            {'added': 0, 'deleted': 0}
+
+        full_path = os.path.join(tmp_dir, "full")
+        full_basic = _builder(InvertedIndexBuilder, db_path, full_path)
+        full_basic.build_index()
+        full_bm25 = _builder(BM25IndexBuilder, db_path, full_path)
+        full_bm25.build_index()
+
+        bm25 = _builder(BM25IndexBuilder, db_path, incremental_path)
+        assert bm25.live_docs.count == bm25.norms.count == len(current_ids) and bm25.live_docs.deleted_count == 45
+        for key in ('total_docs', 'avg_doc_length'):
+            assert bm25.doc_stats[key] == full_bm25.doc_stats[key], key
+        assert all(bm25.norms[doc_id] == full_bm25.norms[doc_id] for doc_id in current_ids)
+        assert not any(bm25.norms[doc_id] for doc_id in removed)
+        assert basic.stats['total_docs'] == full_basic.stats['total_docs'] == len(current_ids)
+
+        # 词项ID按首次出现的顺序分配，两个索引目录的词表不同，按词比较
+        incremental_idf = np.load(os.path.join(incremental_path, IDF_FILE))
+        full_idf = np.load(os.path.join(full_path, IDF_FILE))
+        reader = InvertedIndexReader(incremental_path, num_shards=4)
+        for term_id in range(len(full_bm25.vocabulary)):
+            term = full_bm25.vocabulary.get_term(term_id)
+            incremental_id = bm25.vocabulary.get_id(term)
+            assert incremental_idf[incremental_id] == full_idf[term_id], term
+            assert bm25._term_idf(incremental_id) == full_bm25._term_idf(term_id), term
+            postings = reader.get_posting(term)
+            assert [posting.doc_id for posting in postings] == \
+                [posting.doc_id for posting in full_basic.get_posting(term)]
+            assert not removed & {posting.doc_id for posting in postings}
+
+        for query in ["股票", "央行 降准", "利率 汇率 通胀 银行"]:
+            results = bm25.search(query, max_results=10)
+            assert results == full_bm25.search(query, max_results=10)
+            assert results == bm25.search(query, max_results=10, exhaustive=True)
+            assert not removed & {result['doc_id'] for result in results}
+        print(f"   股票: {[result['doc_id'] for result in bm25.search('股票', max_results=5)]}")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_build()
+    print("\n🎉 所有测试通过！")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+文档长度（norms）测试脚本
+"""
+
+import json
+import math
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25IndexBuilder
+from indexer.norms import NORMS_FILE, DocNorms
+from indexer.testing import create_pages_db
+
+
+def test_memory_mapped_norms():
+    """测试文档长度以写时复制的内存映射加载，修改不影响文件"""
+    print("🔍 测试文档长度数组...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        norms = DocNorms()
+        for doc_id, length in [(1, 10), (3, 30), (5, 0), (2000, 7)]:
+            norms.set(doc_id, length)
+        norms.save(tmp_dir)
+
+        loaded = DocNorms.load(tmp_dir)
+        assert not loaded.values.flags.owndata
+        # 长度为0的文档也计入文档数，重新加载前后文档数和平均文档长度相同
+        assert loaded.size == 2001 and loaded.total == 47
+        assert loaded.count == norms.count == 4 and loaded.average() == norms.average()
+        assert loaded[3] == 30 and loaded[4] == 0 and loaded[5000] == 0
+
+        loaded.delete(3)
+        loaded.set(3000, 8)
+        assert loaded[3] == 0 and loaded[3000] == 8 and loaded.total == 25 and loaded.count == 4
+        assert np.load(os.path.join(tmp_dir, NORMS_FILE))[3] == 30
+
+
+def test_length_factors():
+    """测试预先计算的长度归一化因子，文档长度或参数变化后重新计算"""
+    print("\n🔍 测试长度归一化因子...")
+    norms = DocNorms()
+    norms.set(1, 10)
+    norms.set(2, 30)
+    factors = norms.length_factors(1.5, 0.75, 20.0)
+    assert factors[2] == 1.5 * (1 - 0.75 + 0.75 * 30 / 20.0)
+    assert norms.length_factors(1.5, 0.75, 20.0) is factors
+
+    norms.set(3, 50)
+    assert norms.length_factors(1.5, 0.75, 20.0)[3] == 1.5 * (1 - 0.75 + 0.75 * 50 / 20.0)
+    assert norms.length_factors(1.2, 0.75, 30.0)[2] == 1.2 * (1 - 0.75 + 0.75 * 30 / 30.0)
+
+
+def test_bm25_scores_from_norms():
+    """测试统计文件不保存文档长度，加载的索引按文档长度数组计分"""
+    print("\n🔍 测试BM25计分...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        index_path = os.path.join(tmp_dir, "indexer")
+        create_pages_db(db_path, [
+            (i, f"https://a.com/{i}", "日报", content, "")
+            for i, content in enumerate(["股票", "基金，银行，债券", "股票，股票，基金", "银行", "债券"], start=1)
+        ])
+        BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4).build_index()
+
+        with open(os.path.join(index_path, "bm25_index_stats.json"), encoding='utf-8') as f:
+            assert 'doc_lengths' not in json.load(f)
+
+        bm25 = BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4)
+        avg_doc_length = bm25.doc_stats['avg_doc_length']
+        assert avg_doc_length == bm25.norms.total / 5
+
+        idf = math.log((5 - 2 + 0.5) / (2 + 0.5))
+        term_ids = bm25.token_store.cached_term_ids([1, 3])
+        expected = {}
+        for doc_id in (1, 3):
+            tf = list(term_ids[doc_id]).count(bm25.vocabulary.get_id("股票"))
+            length = bm25.norms[doc_id]
+            expected[doc_id] = idf * tf * (bm25.k1 + 1) / (
+                tf + bm25.k1 * (1 - bm25.b + bm25.b * length / avg_doc_length))
+        results = bm25.search("股票", exhaustive=True)
+        assert [result['doc_id'] for result in results] == sorted(expected, key=lambda d: -expected[d])
+        assert all(abs(result['score'] - expected[result['doc_id']]) < 1e-12 for result in results)
+        assert bm25.search("股票") == results
+
+
+if __name__ == "__main__":
+    test_memory_mapped_norms()
+    test_length_factors()
+    test_bm25_scores_from_norms()
+    print("\n🎉 所有测试通过！")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+多进程并行构建测试脚本
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25IndexBuilder
+from indexer.idf import IDF_FILE
+from indexer.inverted_index import InvertedIndexBuilder
+from indexer.testing import WORDS, create_pages_db, random_content
+
+
+def _create_db(db_path: str):
+    rng = random.Random(5)
+    create_pages_db(db_path, [
+        (doc_id, f"https://a.com/{doc_id}", rng.choice(WORDS), random_content(rng, 40), "")
+        for doc_id in range(1, 700) if doc_id % 5
+    ])
+
+
+def test_parallel_build_matches_serial():
+    """测试多进程构建与单进程构建得到相同的倒排列表、统计信息和检索结果"""
+    print("🔍 测试并行构建...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        _create_db(db_path)
+        builders = {}
+        for workers in (1, 3):
+            index_path = os.path.join(tmp_dir, f"index_{workers}")
+            basic = InvertedIndexBuilder(db_path=db_path, index_path=index_path, num_shards=4, batch_size=50,
+                                         max_memory_size=300)
+            basic.build_index(workers=workers)
+            bm25 = BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4, batch_size=50,
+                                    max_memory_size=300)
+            bm25.build_index(workers=workers)
+            builders[workers] = (index_path, basic, bm25)
+            # 临时目录已删除，每个分片只有归并出的一个段
+            assert not [name for name in os.listdir(index_path) if name.startswith("parallel_build_")]
+            if workers > 1:
+                assert all(len(shard.metadata['segments']) == 1 for shard in bm25.shards.values())
+
+        (serial_path, serial_basic, serial_bm25), (parallel_path, parallel_basic, parallel_bm25) = \
+            builders[1], builders[3]
+        assert parallel_basic.stats['total_docs'] == serial_basic.stats['total_docs'] == 560
+        assert parallel_basic.stats['total_postings'] == serial_basic.stats['total_postings']
+        for key in ('total_docs', 'total_terms', 'total_postings', 'avg_doc_length'):
+            assert parallel_bm25.doc_stats[key] == serial_bm25.doc_stats[key], key
+        assert np.array_equal(parallel_bm25.norms.values[:parallel_bm25.norms.size],
+                              serial_bm25.norms.values[:serial_bm25.norms.size])
+        assert np.array_equal(np.load(os.path.join(serial_path, IDF_FILE)),
+                              np.load(os.path.join(parallel_path, IDF_FILE)))
+
+        for term_id in range(len(serial_bm25.vocabulary)):
+            term = serial_bm25.vocabulary.get_term(term_id)
+            assert parallel_bm25.vocabulary.get_id(term) == term_id
+            shard_id = term_id % 4
+            assert parallel_basic.shards[shard_id].get_postings(term_id) == \
+                serial_basic.shards[shard_id].get_postings(term_id)
+            assert parallel_bm25.shards[shard_id].get_postings(term_id) == \
+                serial_bm25.shards[shard_id].get_postings(term_id)
+            assert parallel_bm25.shards[shard_id].metadata['total_tf'] == \
+                serial_bm25.shards[shard_id].metadata['total_tf']
+
+        for query in ["股票", "央行 降准", "利率 汇率 通胀"]:
+            assert parallel_bm25.search(query) == serial_bm25.search(query)
+        print(f"   股票: {[result['doc_id'] for result in parallel_bm25.search('股票', max_results=5)]}")
+
+
+if __name__ == "__main__":
+    test_parallel_build_matches_serial()
+    print("\n🎉 所有测试通过！")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+分片段式存储测试脚本
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25IndexShard, BM25Posting
+from indexer.inverted_index import InvertedIndexShard, Posting
+from indexer import segment as segment_module
+from indexer.segment import SegmentReader, TermStats, write_segment
+
+
+def _fill(shard, num_docs: int):
+    """每个文档包含term 0和term (doc_id % 5 + 1)"""
+    for doc_id in range(num_docs):
+        for term_id in (0, doc_id % 5 + 1):
+            shard.add_posting(term_id, Posting(doc_id=doc_id, positions=[0, 3], tf=2, offsets=[0, 6]))
+
+
+def test_flush_writes_segments_and_merges():
+    """测试每次刷新写新段、同层段数达到阈值时合并"""
+    print("🔍 测试段刷新与合并...")
+    with tempfile.TemporaryDirectory() as index_path:
+        shard = InvertedIndexShard(0, index_path, max_memory_size=6, merge_factor=3, background_merge=False)
+        _fill(shard, 40)
+        shard.finalize()
+
+        tiers = [segment['tier'] for segment in shard.metadata['segments']]
+        print(f"   段层级: {tiers}")
+        # 同一层的段数始终小于merge_factor
+        assert all(tiers.count(tier) < 3 for tier in set(tiers))
+        assert max(tiers) >= 2
+        files = sorted(f for f in os.listdir(index_path) if f.endswith(".seg"))
+        assert files == sorted(segment['name'] for segment in shard.metadata['segments'])
+
+        postings = shard.get_postings(0)
+        assert [posting.doc_id for posting in postings] == list(range(40))
+        assert [posting.doc_id for posting in shard.get_postings(3)] == list(range(2, 40, 5))
+        assert shard.get_postings(99) == [] and shard.get_all_terms() == {0, 1, 2, 3, 4, 5}
+        assert shard.metadata['doc_count'] == 80 and shard.metadata['term_count'] == 6
+
+        # 重新打开（不清空）读取相同的数据
+        reopened = InvertedIndexShard(0, index_path, clear_disk=False)
+        assert [posting.doc_id for posting in reopened.get_postings(0)] == list(range(40))
+        assert reopened.get_postings(1)[0].offsets == [0, 6]
+
+        # 清空后没有残留的段
+        InvertedIndexShard(0, index_path, clear_disk=True)
+        assert not [f for f in os.listdir(index_path) if f.endswith(".seg")]
+
+
+def test_binary_segment_lookup():
+    """测试二进制段文件的写出与按term查找"""
+    print("\n🔍 测试二进制段文件...")
+    codec = InvertedIndexShard.codec
+    items = [
+        (term_id, [Posting(doc_id=doc_id, positions=[doc_id, doc_id + 2], tf=2,
+                           offsets=[doc_id * 3, doc_id * 3 + 6] if term_id % 2 else None)
+                   for doc_id in range(term_id % 4 + 1)])
+        for term_id in range(0, 3000, 3)
+    ]
+    with tempfile.TemporaryDirectory() as index_path:
+        path = os.path.join(index_path, "test.seg")
+        assert write_segment(path, iter(items), codec) == (1000, sum(len(p) for _, p in items))
+        with open(path, "rb") as f:
+            assert f.read(8) == b'SEGMENT1'
+
+        reader = SegmentReader(path, codec)
+        assert len(reader) == 1000 and reader.terms() == [term_id for term_id, _ in items]
+        assert reader.get(2997) == items[-1][1]
+        assert reader.get(9) == items[3][1] and reader.get(9)[1].offsets == [3, 9]
+        assert reader.get(6)[0].offsets is None
+        # 不存在的term（两个term之间、超出范围）
+        assert reader.get(10) == [] and reader.get(5000) == []
+        # 遍历时按列解码，需要时才生成倒排列表项对象
+        assert [(term_id, codec.postings(columns)) for term_id, columns in reader.items()] == items
+        # 词项统计直接从词典读取
+        assert reader.term_stats(9) == TermStats(doc_freq=2, total_tf=4, max_tf=2)
+        assert reader.term_stats(10) is None
+        reader.close()
+
+        # 空段
+        write_segment(path, iter([]), codec)
+        assert SegmentReader(path, codec).get(0) == []
+
+
+def test_background_merge():
+    """测试后台合并以及合并期间的读取"""
+    print("\n🔍 测试后台合并...")
+    with tempfile.TemporaryDirectory() as index_path:
+        shard = BM25IndexShard(1, index_path, max_memory_size=4, merge_factor=2, background_merge=True)
+        for doc_id in range(100):
+            shard.norms.set(doc_id, 10)
+            shard.add_posting(7, BM25Posting(doc_id=doc_id, positions=[1], tf=1))
+            if doc_id % 10 == 0:
+                # 合并过程中读取到的倒排列表始终完整有序
+                assert [p.doc_id for p in shard.get_postings(7)] == list(range(doc_id + 1))
+        shard.finalize()
+
+        assert [p.doc_id for p in shard.get_postings(7)] == list(range(100))
+        assert shard.metadata['total_tf'] == 100
+        # 各段的统计与内存中的倒排列表合计
+        shard.norms.set(100, 10)
+        shard.add_posting(7, BM25Posting(doc_id=100, positions=[1, 5, 9], tf=3))
+        assert shard.get_term_stats(7) == TermStats(doc_freq=101, total_tf=103, max_tf=3)
+        assert shard.get_term_stats(8) == TermStats()
+        tiers = [segment['tier'] for segment in shard.metadata['segments']]
+        assert all(tiers.count(tier) < 2 for tier in set(tiers))
+        shard.close()
+
+
+def test_failed_merge_not_retried_immediately():
+    """测试合并失败时不立即重试同一组段，下一次刷新后再重试"""
+    print("\n🔍 测试合并失败...")
+    attempts = []
+
+    def failing_merge_items(readers):
+        attempts.append(len(readers))
+        raise OSError("No space left on device")
+
+    original = segment_module.merge_items
+    with tempfile.TemporaryDirectory() as index_path:
+        # 每添加一个倒排列表项刷新一次
+        shard = InvertedIndexShard(2, index_path, max_memory_size=2, merge_factor=2, background_merge=False)
+        add = lambda doc_id: shard.add_posting(0, Posting(doc_id=doc_id, positions=[0], tf=1))
+        segment_module.merge_items = failing_merge_items
+        try:
+            add(0)
+            add(1)
+            # 第二次刷新触发合并，失败后不递归重试
+            assert attempts == [2]
+            assert len(shard.metadata['segments']) == 2
+            files = sorted(f for f in os.listdir(index_path) if f.endswith(".seg"))
+            assert files == sorted(segment['name'] for segment in shard.metadata['segments'])
+        finally:
+            segment_module.merge_items = original
+
+        # 下一次刷新后重新合并
+        add(2)
+        print(f"   合并尝试: {attempts}, 段层级: {[s['tier'] for s in shard.metadata['segments']]}")
+        assert [segment['tier'] for segment in shard.metadata['segments']] == [1, 0]
+        assert [posting.doc_id for posting in shard.get_postings(0)] == [0, 1, 2]
+        shard.close()
+
+
+if __name__ == "__main__":
+    test_flush_writes_segments_and_merges()
+    test_binary_segment_lookup()
+    test_background_merge()
+    test_failed_merge_not_retried_immediately()
+    print("\n🎉 所有测试通过！")
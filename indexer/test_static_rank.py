@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+链接图与静态权重测试脚本
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.link_graph import LinkGraphWriter, LinkGraph, build_csr
+from indexer.static_rank import compute_static_rank, StaticRank
+from indexer.testing import create_pages_db
+
+
+def test_link_graph_csr():
+    """测试链接图采集与CSR转换"""
+    print("🔍 测试链接图CSR转换...")
+    with tempfile.TemporaryDirectory() as graph_dir:
+        writer = LinkGraphWriter(graph_dir, flush_edges=2)
+        writer.add_page("https://a.com/", ["https://b.com/", "https://c.com/#top", "https://b.com/"])
+        writer.add_page("https://b.com/", ["https://c.com/", "https://b.com/"])
+        writer.close()
+
+        # 重新打开后继续追加，URL ID保持不变
+        writer = LinkGraphWriter(graph_dir)
+        writer.add_page("https://c.com/", ["https://a.com/"])
+        writer.close()
+
+        assert build_csr(graph_dir) == 3
+        graph = LinkGraph(graph_dir)
+        assert graph.num_edges == 4
+        assert list(graph.neighbors(graph.url_ids["https://a.com/"])) == [1, 2]
+        assert list(graph.out_degrees()) == [2, 1, 1]
+
+
+def test_pagerank():
+    """测试PageRank结果与迭代定义一致"""
+    print("\n🔍 测试PageRank...")
+    with tempfile.TemporaryDirectory() as graph_dir:
+        writer = LinkGraphWriter(graph_dir)
+        writer.add_page("a", ["b", "c"])
+        writer.add_page("b", ["c"])
+        writer.add_page("c", ["a"])
+        writer.add_page("d", ["c"])
+        writer.close()
+        build_csr(graph_dir)
+
+        rank = LinkGraph(graph_dir).pagerank(tol=1e-12)
+        print(f"   PageRank: {rank}")
+        assert abs(rank.sum() - 1.0) < 1e-9
+        assert rank.argmax() == 2  # c的入链最多
+        assert rank[3] == rank.min()  # d没有入链
+
+
+def test_compute_static_rank():
+    """测试按doc_id保存静态权重"""
+    print("\n🔍 测试静态权重计算...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        graph_dir = os.path.join(tmp_dir, "graph")
+        db_path = os.path.join(tmp_dir, "crawler.db")
+
+        writer = LinkGraphWriter(graph_dir)
+        writer.add_page("https://a.com/", ["https://hub.com/"])
+        writer.add_page("https://b.com/", ["https://hub.com/"])
+        writer.add_page("https://hub.com/", ["https://a.com/"])
+        writer.close()
+
+        create_pages_db(db_path, [(1, "https://a.com/"), (2, "https://b.com/"), (5, "https://hub.com/"),
+                                  (6, "https://x.com/")], columns=('id', 'url'))
+
+        stats = compute_static_rank(db_path=db_path, graph_dir=graph_dir, index_path=tmp_dir)
+        assert stats['documents_ranked'] == 3
+
+        static_rank = StaticRank(tmp_dir)
+        assert static_rank.get(5) == 1.0
+        assert static_rank.get(1) > static_rank.get(2) > 0
+        assert static_rank.get(6) == 0.0 and static_rank.get(100) == 0.0
+
+
+if __name__ == "__main__":
+    test_link_graph_csr()
+    test_pagerank()
+    test_compute_static_rank()
+    print("\n🎉 所有测试通过！")
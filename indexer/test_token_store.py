@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+分词缓存测试脚本
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25IndexBuilder
+from indexer.inverted_index import InvertedIndexBuilder
+from indexer.testing import create_pages_db
+from indexer.token_store import TokenStore, build_token_store, document_text
+from indexer.vocabulary import Vocabulary
+from utils.text_processor import TextProcessor, get_analyzer
+
+DOCS = [
+    (1, "美联储加息", "美联储宣布加息25个基点，股票市场下跌"),
+    (2, "债券市场周报", "国债收益率小幅下行"),
+    (3, "黄金价格走强", "避险需求推动金价上涨"),
+]
+
+
+def _create_db(db_path: str):
+    create_pages_db(db_path, [(doc_id, f"https://a.com/{doc_id}", title, content, "")
+                              for doc_id, title, content in DOCS])
+
+
+def test_token_store_roundtrip():
+    """测试缓存命中、文本变化和分析器变化时失效"""
+    print("🔍 测试分词缓存...")
+    processor = TextProcessor()
+    docs = [(doc_id, document_text(title, content)) for doc_id, title, content in DOCS]
+    with tempfile.TemporaryDirectory() as index_path:
+        store = TokenStore(index_path, text_processor=processor)
+        first = store.get_many(docs)
+        assert store.stats == {'hits': 0, 'misses': 3}
+        store.flush()
+        store.close()
+
+        # 重新打开后全部命中，词项ID与词表对应
+        store = TokenStore(index_path, text_processor=processor)
+        cached = store.get_many(docs)
+        assert store.stats == {'hits': 3, 'misses': 0} and cached == first
+        term_ids, starts = cached[0]
+        stream = processor.tokenize_with_offsets(docs[0][1])
+        assert [store.vocabulary.get_term(term_id) for term_id in term_ids] == stream.terms
+        assert starts == stream.starts and term_ids.typecode == 'I'
+
+        # 文档内容变化时重新分词
+        changed = store.get_many([(2, document_text("债券市场周报", "国债期货大幅上涨"))])
+        assert store.stats['misses'] == 1
+        assert "期货" in [store.vocabulary.get_term(term_id) for term_id in changed[0][0]]
+        store.close()
+
+        # 不同的分析器使用各自的缓存行
+        bigram = TokenStore(index_path, analyzer=get_analyzer("cjk_bigram"))
+        assert bigram.analyzer_version != store.analyzer_version and len(bigram) == 0
+        bigram.get_many(docs)
+        assert bigram.stats['misses'] == 3
+        bigram.close()
+
+
+def test_token_store_uncommitted_and_read_only():
+    """测试未flush的写入不会持久化，只读模式不写文件"""
+    print("\n🔍 测试分词缓存事务和只读模式...")
+    docs = [(doc_id, document_text(title, content)) for doc_id, title, content in DOCS]
+    with tempfile.TemporaryDirectory() as index_path:
+        # 没有缓存文件时只读模式仍然可以分词
+        store = TokenStore(index_path, read_only=True)
+        assert len(store.get_many(docs)) == 3 and len(store) == 0
+        assert not os.path.exists(os.path.join(index_path, "token_store.db"))
+
+        # 未flush时缓存和词表都没有写入
+        store = TokenStore(index_path)
+        store.get_many(docs)
+        store.close()
+        assert len(TokenStore(index_path)) == 0 and len(Vocabulary(index_path)) == 0
+
+
+def test_builders_share_token_store():
+    """测试基础索引构建后，BM25构建和预先生成缓存都不再分词"""
+    print("\n🔍 测试索引构建共享分词缓存...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        index_path = os.path.join(tmp_dir, "indexer")
+        _create_db(db_path)
+
+        stats = build_token_store(db_path=db_path, index_path=index_path)
+        assert stats['documents'] == 3 and stats['tokenized'] == 3
+
+        basic = InvertedIndexBuilder(db_path=db_path, index_path=index_path, num_shards=4)
+        basic.build_index()
+        assert basic.token_store.stats == {'hits': 3, 'misses': 0}
+
+        bm25 = BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4)
+        bm25.build_index()
+        # 单遍构建，每个文档只从缓存读取一次
+        assert bm25.token_store.stats == {'hits': 3, 'misses': 0}
+        assert [result['doc_id'] for result in bm25.search("加息")] == [1]
+        assert [posting.doc_id for posting in basic.get_posting("加息")] == [1]
+
+
+if __name__ == "__main__":
+    test_token_store_roundtrip()
+    test_token_store_uncommitted_and_read_only()
+    test_builders_share_token_store()
+    print("\n🎉 所有测试通过！")
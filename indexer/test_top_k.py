@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+块最大分数top-k检索测试脚本
+"""
+
+import os
+import random
+import sys
+import tempfile
+from collections import defaultdict
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexer.bm25_indexer import BM25IndexBuilder, BM25IndexShard, BM25Posting
+from indexer.testing import WORDS, create_pages_db
+from indexer.top_k import PostingCursor, block_max_top_k
+
+
+def test_block_max_matches_brute_force():
+    """测试随机倒排列表上的剪枝结果与穷举一致（包括负权重和同分）"""
+    print("🔍 测试块最大分数剪枝...")
+    rng = random.Random(7)
+    codec = BM25IndexShard.codec
+    for trial in range(30):
+        norms = np.array([rng.choice([50, 100, 400]) for _ in range(3000)], dtype=np.uint32)
+        lists = []
+        for _ in range(rng.randint(1, 4)):
+            # 部分列表只覆盖一段doc_id范围（类似不同段中的同一个词）
+            start = rng.choice([0, 0, rng.randint(0, 2500)])
+            doc_ids = sorted(rng.sample(range(start, 3000), rng.randint(1, min(900, 3000 - start))))
+            lists.append([BM25Posting(doc_id=doc_id, positions=[0], tf=rng.randint(1, 4)) for doc_id in doc_ids])
+        weights = [rng.choice([1.0, 2.5, -0.5]) for _ in lists]
+
+        def score(weight):
+            return lambda columns: weight * columns['tf'] / norms[columns['doc_id']]
+
+        def bound(weight):
+            def block_bound(index):
+                if weight < 0:
+                    return np.zeros(len(index))
+                ends, tfs, lengths = index.impacts
+                return np.maximum.reduceat(weight * tfs / lengths, np.concatenate(([0], ends[:-1])))
+            return block_bound
+
+        cursors = [
+            PostingCursor(codec, np.frombuffer(codec.encode(postings, norms), dtype=np.uint8), score(w), bound(w),
+                          norms)
+            for postings, w in zip(lists, weights)
+        ]
+        expected = defaultdict(float)
+        for postings, w in zip(lists, weights):
+            for posting in postings:
+                expected[posting.doc_id] += w * posting.tf / norms[posting.doc_id]
+        tie = lambda doc_id: float(doc_id % 3)
+        k = rng.choice([1, 5, 20, 100])
+        brute = sorted(expected.items(), key=lambda x: (-x[1], -tie(x[0]), x[0]))[:k]
+        assert block_max_top_k(cursors, k, tie) == brute, f"trial {trial}"
+    assert block_max_top_k([], 10, tie) == []
+
+
+def test_bm25_search_matches_exhaustive():
+    """测试BM25检索与穷举计分结果完全相同"""
+    print("\n🔍 测试BM25剪枝检索...")
+    rng = random.Random(3)
+    words = WORDS[:10]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "crawler.db")
+        index_path = os.path.join(tmp_dir, "indexer")
+        create_pages_db(db_path, [
+            (i, f"https://a.com/{i}", rng.choice(words),
+             "，".join(rng.choices(words[:3], k=rng.randint(1, 3)) + rng.choices(words, k=rng.randint(1, 30))), "")
+            for i in range(1, 801)
+        ])
+        bm25 = BM25IndexBuilder(db_path=db_path, index_path=index_path, num_shards=4, max_memory_size=500)
+        bm25.build_index()
+
+        for query in ["股票", "汇率", "股票 市场", "利率 通胀 汇率", "股票 股票 银行", "不存在"]:
+            for k in (1, 10, 50):
+                pruned = bm25.search(query, max_results=k)
+                assert pruned == bm25.search(query, max_results=k, exhaustive=True), (query, k)
+            print(f"   {query}: {[result['doc_id'] for result in pruned[:5]]}")
+
+
+if __name__ == "__main__":
+    test_block_max_matches_brute_force()
+    test_bm25_search_matches_exhaustive()
+    print("\n🎉 所有测试通过！")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+全局词表测试脚本
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import indexer.vocabulary as vocabulary_module
+from indexer.vocabulary import POOL_FILE, SORTED_FILE, Vocabulary
+
+
+def test_vocabulary_roundtrip():
+    """测试词表的ID分配、保存和内存映射查找"""
+    print("🔍 测试词表读写...")
+    with tempfile.TemporaryDirectory() as index_path:
+        vocabulary = Vocabulary(index_path)
+        assert vocabulary.add_many(["股票", "ipo", "基金", "股票"]) == [0, 1, 2, 0]
+        assert vocabulary.get_term(2) == "基金" and vocabulary.get_id("债券") is None
+        vocabulary.save()
+
+        # 重新打开后通过二分查找得到相同的ID
+        reopened = Vocabulary(index_path)
+        assert len(reopened) == 3
+        assert [reopened.get_id(term) for term in ("ipo", "基金", "股票", "债券", "")] == [1, 2, 0, None, None]
+        assert [reopened.get_term(i) for i in range(3)] == ["股票", "ipo", "基金"]
+
+
+def test_vocabulary_incremental():
+    """测试增量构建时已有ID保持不变"""
+    print("\n🔍 测试词表增量追加...")
+    with tempfile.TemporaryDirectory() as index_path:
+        vocabulary = Vocabulary(index_path)
+        vocabulary.add_many(["b", "d", "f"])
+        vocabulary.save()
+
+        vocabulary = Vocabulary(index_path)
+        assert vocabulary.add_many(["a", "d", "g", "c"]) == [3, 1, 4, 5]
+        vocabulary.save()
+        vocabulary.save()  # 没有新词项时不重写
+
+        reopened = Vocabulary(index_path)
+        terms = ["a", "b", "c", "d", "f", "g"]
+        print(f"   词表: {[(term, reopened.get_id(term)) for term in terms]}")
+        assert [reopened.get_id(term) for term in terms] == [3, 0, 5, 1, 2, 4]
+        assert reopened.get_id("e") is None and reopened.get_id("z") is None
+
+
+def test_vocabulary_append_only_save():
+    """测试保存只追加字符串池并插入新词项的有序ID，中断的保存留下的尾部被截断，查找缓存有上限"""
+    print("\n🔍 测试词表追加保存...")
+    with tempfile.TemporaryDirectory() as index_path:
+        vocabulary = Vocabulary(index_path)
+        vocabulary.add_many(["m", "c", "x"])
+        vocabulary.save()
+        # 模拟上次保存在追加字符串池后中断
+        with open(os.path.join(index_path, POOL_FILE), 'ab') as f:
+            f.write(b"garbage")
+
+        vocabulary = Vocabulary(index_path)
+        assert vocabulary.add_many(["a", "n", "z", "d", "c"]) == [3, 4, 5, 6, 1]
+        vocabulary.save()
+        assert os.path.getsize(os.path.join(index_path, POOL_FILE)) == len("mcxanzd")
+
+        reopened = Vocabulary(index_path)
+        terms = [reopened.get_term(int(term_id)) for term_id in np.load(os.path.join(index_path, SORTED_FILE))]
+        assert terms == sorted("mcxanzd")
+
+        limit = vocabulary_module.MAX_CACHED_TERMS
+        vocabulary_module.MAX_CACHED_TERMS = 2
+        try:
+            assert [reopened.get_id(term) for term in "mcxanzd"] == list(range(7))
+            assert len(reopened._cache) <= 2
+        finally:
+            vocabulary_module.MAX_CACHED_TERMS = limit
+
+
+if __name__ == "__main__":
+    test_vocabulary_roundtrip()
+    test_vocabulary_incremental()
+    test_vocabulary_append_only_save()
+    print("\n🎉 所有测试通过！")
@@ -0,0 +1,46 @@
+"""
+索引测试共用的辅助函数
+
+测试脚本既可以用pytest运行，也可以直接运行，共用的测试数据库放在这里而不是conftest.py中
+"""
+
+import random
+import sqlite3
+from typing import Iterable, Sequence
+
+# 与爬虫数据库（crawler/crawler.py）相同的pages表，省略索引不使用的列
+PAGES_SCHEMA = """
+    CREATE TABLE pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE NOT NULL,
+        title TEXT,
+        content TEXT,
+        keywords TEXT,
+        crawl_time REAL
+    )
+"""
+
+PAGE_COLUMNS = ('id', 'url', 'title', 'content', 'keywords')
+
+WORDS = ["股票", "市场", "基金", "债券", "银行", "上涨", "下跌", "利率", "通胀", "汇率", "央行", "降准"]
+
+
+def create_pages_db(db_path: str, rows: Iterable[Sequence], columns: Sequence[str] = PAGE_COLUMNS):
+    """
+    创建pages表并写入页面
+
+    Args:
+        db_path: 数据库文件路径
+        rows: 页面，每行按columns的顺序给出各列的值
+        columns: rows中的列名，未给出的列为NULL（id未给出时自动分配）
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute(PAGES_SCHEMA)
+    conn.executemany(f"INSERT INTO pages ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+    conn.commit()
+    conn.close()
+
+
+def random_content(rng: random.Random, max_words: int = 30, words: Sequence[str] = WORDS) -> str:
+    """由1到max_words个随机词组成的正文"""
+    return "，".join(rng.choices(words, k=rng.randint(1, max_words)))
@@ -0,0 +1,244 @@
+"""
+分词结果缓存（token store）
+
+按(analyzer_version, doc_id)保存每个文档"标题 内容"的分词结果：
+- content_hash: 文档文本的哈希，文档内容变化时缓存失效
+- term_ids:     uint32数组，全局词表（vocabulary.py）中的词项ID序列，位置即下标
+- starts:       uint32数组，每个词项在文本中的起始字符偏移（用于高亮）
+
+分析器版本包含分词配置和词典版本，分析器变化时自动使用新的缓存行。
+缓存位于索引目录下（token_store.db），与词表一起随索引目录清理；
+第一次构建（或run_indexer.py tokens）写入后，基础索引、BM25构建和
+搜索引擎启动都直接读取，不再重复运行jieba
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.text_processor import Analyzer, TextProcessor, get_analyzer
+from .doc_source import DocumentSource
+from .vocabulary import Vocabulary
+
+logger = logging.getLogger(__name__)
+
+TOKEN_STORE_FILE = "token_store.db"
+
+# SQLite单条语句的参数个数有上限，按此大小分批查询
+_LOOKUP_CHUNK = 500
+
+
+def document_text(title: str, content: str) -> str:
+    """索引和缓存使用的文档文本（标题和内容以空格连接）"""
+    return f"{title} {content}"
+
+
+def content_hash(text: str) -> bytes:
+    """文档文本的哈希"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class TokenStore:
+    """持久化的分词结果缓存，词项ID与同一索引目录下的全局词表对应"""
+
+    def __init__(self, index_path: str, analyzer: Optional[Analyzer] = None,
+                 vocabulary: Optional[Vocabulary] = None,
+                 text_processor: Optional[TextProcessor] = None,
+                 tokenize_workers: int = 1, read_only: bool = False):
+        """
+        打开（或新建）分词缓存
+
+        Args:
+            index_path: 索引目录
+            analyzer: 分析器，默认使用配置中的分析器
+            vocabulary: 全局词表，应与使用缓存结果的索引构建器共享同一个实例
+            text_processor: 缓存未命中时用于分词的文本处理器
+            tokenize_workers: 缓存未命中时的分词进程数
+            read_only: 只读模式，未命中的文档在内存中分词，不写入缓存和词表文件
+        """
+        self.index_path = index_path
+        self.db_file = os.path.join(index_path, TOKEN_STORE_FILE)
+        self.text_processor = text_processor or TextProcessor(analyzer or get_analyzer())
+        self.analyzer = analyzer or self.text_processor.analyzer
+        self.analyzer_version = self.analyzer.version
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary(index_path)
+        self.tokenize_workers = tokenize_workers
+        self.read_only = read_only
+
+        self.stats = {'hits': 0, 'misses': 0}
+        self.conn = self._connect()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.read_only:
+            if not os.path.exists(self.db_file):
+                return None
+            return sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True, check_same_thread=False)
+
+        os.makedirs(self.index_path, exist_ok=True)
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS token_streams (
+                analyzer TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                content_hash BLOB NOT NULL,
+                term_ids BLOB NOT NULL,
+                starts BLOB NOT NULL,
+                PRIMARY KEY (analyzer, doc_id)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+        return conn
+
+    def _lookup(self, doc_ids: List[int]) -> Dict[int, Tuple[bytes, bytes, bytes]]:
+        """按文档ID批量读取缓存行：doc_id -> (content_hash, term_ids, starts)"""
+        rows = {}
+        if self.conn is None:
+            return rows
+        for i in range(0, len(doc_ids), _LOOKUP_CHUNK):
+            chunk = doc_ids[i:i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT doc_id, content_hash, term_ids, starts FROM token_streams "
+                f"WHERE analyzer = ? AND doc_id IN ({placeholders})",
+                (self.analyzer_version, *chunk)
+            )
+            for doc_id, digest, term_ids, starts in cursor:
+                rows[doc_id] = (digest, term_ids, starts)
+        return rows
+
+    def get_many(self, docs: Sequence[Tuple[int, str]]) -> List[Tuple[array, array]]:
+        """
+        获取一批文档的分词结果，未命中或文本已变化的文档重新分词并写入缓存
+
+        Args:
+            docs: (doc_id, 文档文本)列表，文档文本由document_text()得到
+
+        Returns:
+            与docs顺序一致的(term_ids, starts)列表，两者都是array('I')
+        """
+        docs = list(docs)
+        rows = self._lookup([doc_id for doc_id, _ in docs])
+
+        results: List[Optional[Tuple[array, array]]] = [None] * len(docs)
+        missing = []
+        for i, (doc_id, text) in enumerate(docs):
+            digest = content_hash(text)
+            row = rows.get(doc_id)
+            if row is not None and row[0] == digest:
+                term_ids = array('I')
+                term_ids.frombytes(row[1])
+                starts = array('I')
+                starts.frombytes(row[2])
+                results[i] = (term_ids, starts)
+            else:
+                missing.append((i, doc_id, digest))
+
+        self.stats['hits'] += len(docs) - len(missing)
+        self.stats['misses'] += len(missing)
+        if not missing:
+            return results
+
+        # 未命中的文档整批分词（tokenize_workers>1时在进程池中并行）
+        streams = self.text_processor.tokenize_many(
+            (docs[i][1] for i, _, _ in missing), workers=self.tokenize_workers, with_offsets=True
+        )
+        add_term = self.vocabulary.add
+        new_rows = []
+        for (i, doc_id, digest), stream in zip(missing, streams):
+            term_ids = array('I', [add_term(term) for term in stream.terms])
+            results[i] = (term_ids, stream.starts)
+            new_rows.append((self.analyzer_version, doc_id, digest, term_ids.tobytes(), stream.starts.tobytes()))
+
+        if not self.read_only:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO token_streams (analyzer, doc_id, content_hash, term_ids, starts) "
+                "VALUES (?, ?, ?, ?, ?)",
+                new_rows
+            )
+        return results
+
+    def cached_term_ids(self, doc_ids: Sequence[int]) -> Dict[int, array]:
+        """
+        读取缓存中的词项ID序列，不校验文本哈希（用于已不在数据库中的文档，如增量构建删除旧文档时修正文档频率）
+
+        Returns:
+            doc_id -> term_ids，缓存中没有的文档不包含在结果中
+        """
+        results = {}
+        for doc_id, (_, term_ids_bytes, _) in self._lookup(list(doc_ids)).items():
+            term_ids = array('I')
+            term_ids.frombytes(term_ids_bytes)
+            results[doc_id] = term_ids
+        return results
+
+    def flush(self):
+        """
+        提交缓存写入
+
+        缓存中的词项ID引用词表，先保存词表再提交缓存事务，
+        构建中途失败时两者都不会留下不一致的内容
+        """
+        if self.read_only or self.conn is None:
+            return
+        self.vocabulary.save()
+        self.conn.commit()
+
+    def close(self):
+        """关闭缓存（未flush的写入被丢弃）"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __len__(self) -> int:
+        """当前分析器版本下缓存的文档数"""
+        if self.conn is None:
+            return 0
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM token_streams WHERE analyzer = ?", (self.analyzer_version,)
+        ).fetchone()[0]
+
+
+def build_token_store(db_path: str = "data/crawler/crawler.db",
+                      index_path: str = "data/indexer",
+                      analyzer: Optional[str] = None,
+                      batch_size: int = 1000,
+                      tokenize_workers: int = 1) -> Dict[str, Any]:
+    """
+    为数据库中的全部文档生成分词缓存（爬取完成后运行，之后的索引构建和搜索引擎启动直接读取）
+
+    Args:
+        db_path: 爬虫数据库路径
+        index_path: 索引存储路径
+        analyzer: 分析器名称，None时使用配置
+        batch_size: 每批文档数
+        tokenize_workers: 分词进程数，0表示使用全部CPU
+
+    Returns:
+        统计信息
+    """
+    start_time = time.time()
+    text_processor = TextProcessor(get_analyzer(analyzer))
+    store = TokenStore(index_path, text_processor=text_processor, tokenize_workers=tokenize_workers)
+
+    try:
+        # 后台预取下一批，读取与分词重叠进行
+        for batch in DocumentSource(db_path, ('id', 'title', 'content'), batch_size=batch_size).batches():
+            store.get_many([(doc_id, document_text(title, content)) for doc_id, title, content in batch])
+        store.flush()
+    finally:
+        store.close()
+        text_processor.close()
+
+    stats = {
+        'analyzer_version': store.analyzer_version,
+        'documents': store.stats['hits'] + store.stats['misses'],
+        'tokenized': store.stats['misses'],
+        'processing_time': time.time() - start_time
+    }
+    logger.info(f"Token store updated: {stats}")
+    return stats
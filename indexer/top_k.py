@@ -0,0 +1,143 @@
+"""
+基于块最大分数（Block-Max）的top-k检索
+
+倒排列表每块记录了各整数字段的最大值和最小值（见codec.py），由此可以得到块内任意文档得分的上界。
+把全部查询词倒排列表的块边界（每块的最后一个doc_id，以及每个列表第一个doc_id之前的位置）合在一起，
+doc_id空间被切成若干区间，每个区间在每个倒排列表中最多落在一个块内（同一个词在不同段中的列表通常只覆盖各自的doc_id范围），区间的上界为各列表对应块的上界（负值按0计）之和。
+
+按上界从高到低分批处理区间，用大小为k的堆维护当前结果：下一个区间的上界低于第k名的得分时，
+其余区间中不可能有文档进入结果，直接结束。处理区间时只解码落在区间内的块，用NumPy整块计算得分。
+
+结果与穷举计算完全一致：每个文档的得分按倒排列表的顺序逐个累加（与穷举相同的浮点运算顺序），
+排序依据为(得分, 同分排序权重)降序、doc_id升序。要求每个倒排列表按doc_id有序，且同一文档在一个列表中最多出现一次。
+已删除的文档（见live_docs.py）在解码块时去掉，块的上界仍包含它们，只会偏高，不影响结果。
+"""
+
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .codec import BlockIndex, PostingCodec
+
+# 每批处理的区间数
+INTERVAL_BATCH = 8
+
+
+class PostingCursor:
+    """一个查询词在一个段中的倒排列表，按块解码并缓存每块的doc_id和得分"""
+
+    def __init__(self, codec: PostingCodec, encoded: np.ndarray,
+                 score: Callable[[Dict[str, np.ndarray]], np.ndarray],
+                 bound: Callable[[BlockIndex], np.ndarray], norms: Optional[np.ndarray] = None,
+                 deleted: Optional[np.ndarray] = None):
+        """
+        Args:
+            codec: 倒排列表编码
+            encoded: 编码后的倒排列表
+            score: 根据一块的整数字段计算每个文档的得分
+            bound: 根据块索引计算每块得分的上界
+            norms: 编码时使用的文档级取值（见PostingCodec）
+            deleted: 按doc_id的删除位图，None表示没有已删除的文档
+        """
+        self.codec = codec
+        self.encoded = encoded
+        self.index = codec.block_index(encoded, norms)
+        self.score = score
+        self.bounds = np.asarray(bound(self.index), dtype=np.float64)
+        self.deleted = deleted
+        self._blocks: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.index.size
+
+    def block(self, block: int) -> Tuple[np.ndarray, np.ndarray]:
+        """第block块中未删除的文档的(doc_id数组, 得分数组)"""
+        cached = self._blocks.get(block)
+        if cached is None:
+            columns = self.codec.decode_block(self.encoded, self.index, block)
+            docs, scores = columns['doc_id'], self.score(columns)
+            if self.deleted is not None:
+                in_range = docs < len(self.deleted)
+                keep = np.ones(len(docs), dtype=bool)
+                keep[in_range] = ~self.deleted[docs[in_range]]
+                docs, scores = docs[keep], scores[keep]
+            cached = self._blocks[block] = (docs, scores)
+        return cached
+
+
+def block_max_top_k(cursors: List[PostingCursor], k: int,
+                    tie_breaker: Callable[[int], float]) -> List[Tuple[int, float]]:
+    """
+    计算各倒排列表得分之和最高的k个文档
+
+    Args:
+        cursors: 倒排列表，文档得分为其出现的各列表得分之和（按列表顺序累加）
+        k: 返回的文档数
+        tie_breaker: 同分时的排序权重（越大越靠前）
+
+    Returns:
+        [(doc_id, 得分)]，按得分降序
+    """
+    cursors = [cursor for cursor in cursors if len(cursor)]
+    if not cursors or k <= 0:
+        return []
+
+    # 区间j为(boundaries[j-1], boundaries[j]]，边界包括每块的最后一个doc_id和每个列表第一个doc_id的前一个位置；
+    # blocks[c][j]为区间j在列表c中所在的块，列表还未开始或已经结束时为-1
+    boundaries = np.unique(np.concatenate(
+        [cursor.index.last_doc.astype(np.int64) for cursor in cursors] +
+        [np.array([cursor.index.first_doc - 1 for cursor in cursors], dtype=np.int64)]
+    ))
+    blocks = []
+    bounds = np.zeros(len(boundaries))
+    for cursor in cursors:
+        cursor_blocks = np.searchsorted(cursor.index.last_doc, boundaries)
+        cursor_blocks[(cursor_blocks >= len(cursor.index)) | (boundaries < cursor.index.first_doc)] = -1
+        valid = cursor_blocks >= 0
+        bounds[valid] += np.maximum(cursor.bounds[cursor_blocks[valid]], 0.0)
+        blocks.append(cursor_blocks)
+
+    # 按上界从高到低每次取一批区间处理，减少逐区间的Python开销
+    order = np.argsort(-bounds, kind='stable')
+    heap: List[Tuple[float, float, int, int]] = []  # (得分, 同分权重, -doc_id, doc_id)的小顶堆
+    selected = np.zeros(len(boundaries), dtype=bool)
+    for batch_start in range(0, len(order), INTERVAL_BATCH):
+        threshold = heap[0][0] if len(heap) >= k else -np.inf
+        batch = order[batch_start:batch_start + INTERVAL_BATCH]
+        batch = batch[bounds[batch] >= threshold]
+        if not len(batch):
+            break
+
+        selected[:] = False
+        selected[batch] = True
+        parts = []
+        for cursor, cursor_blocks in zip(cursors, blocks):
+            for block in np.unique(cursor_blocks[batch]).tolist():
+                if block < 0:
+                    continue
+                docs, scores = cursor.block(block)
+                keep = selected[np.searchsorted(boundaries, docs)]
+                if keep.any():
+                    parts.append((docs[keep], scores[keep]))
+        if not parts:
+            continue
+
+        # 每个文档只属于一个区间，得分按列表顺序累加
+        candidates = np.unique(np.concatenate([docs for docs, _ in parts]))
+        totals = np.zeros(len(candidates))
+        for docs, scores in parts:
+            totals[np.searchsorted(candidates, docs)] += scores
+
+        keep = totals >= threshold
+        if keep.sum() > k:
+            # 第k高的得分及与其同分的文档都保留，由同分权重决定先后
+            keep &= totals >= np.partition(totals[keep], -k)[-k]
+        for doc_id, score in zip(candidates[keep].tolist(), totals[keep].tolist()):
+            item = (score, tie_breaker(doc_id), -doc_id, doc_id)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    return [(doc_id, score) for score, _, _, doc_id in sorted(heap, reverse=True)]
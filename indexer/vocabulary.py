@@ -0,0 +1,184 @@
+"""
+全局词表：term <-> 稠密uint32 ID
+
+磁盘格式（位于索引目录下）:
+- vocab_pool.bin:     按ID顺序拼接的UTF-8词项字节串
+- vocab_offsets.npy:  uint64，第i个词项在字符串池中的区间为[offsets[i], offsets[i+1])
+- vocab_sorted.npy:   uint32，按词项字节序排好的ID，用于二分查找
+
+三个文件都以内存映射方式打开，不需要把整个词表读入内存；
+构建索引时新出现的词项追加在末尾，已有词项的ID保持不变。
+
+保存时只把新词项的字节追加到字符串池，新词项单独排序后按二分查找的位置插入已有的有序ID数组，
+代价为O(k log k + k log V)次比较加一次O(V)的数组拷贝（k为新词项数），不重新排序整个词表。
+已保存词项的查找结果缓存在进程内，缓存达到MAX_CACHED_TERMS时清空，内存占用与词表大小无关。
+"""
+
+import bisect
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+POOL_FILE = "vocab_pool.bin"
+OFFSETS_FILE = "vocab_offsets.npy"
+SORTED_FILE = "vocab_sorted.npy"
+
+# 已保存词项查找缓存的最大条目数
+MAX_CACHED_TERMS = 1 << 20
+
+
+class _SortedTerms:
+    """按字节序排列的词项视图（供bisect使用）"""
+
+    def __init__(self, vocabulary: 'Vocabulary'):
+        self.vocabulary = vocabulary
+
+    def __len__(self) -> int:
+        return len(self.vocabulary._sorted_ids)
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.vocabulary._term_bytes(int(self.vocabulary._sorted_ids[index]))
+
+
+class Vocabulary:
+    """持久化的全局词表，按索引目录共享"""
+
+    def __init__(self, index_path: str):
+        """
+        打开（或新建）词表
+
+        Args:
+            index_path: 索引目录
+        """
+        self.index_path = index_path
+        self.pool_file = os.path.join(index_path, POOL_FILE)
+        self.offsets_file = os.path.join(index_path, OFFSETS_FILE)
+        self.sorted_file = os.path.join(index_path, SORTED_FILE)
+
+        # 已查找过的已保存词项 -> ID（有上限的缓存）
+        self._cache: Dict[str, int] = {}
+        # 尚未保存的新词项及其ID（ID从已保存词表的大小开始连续分配）
+        self._new_terms: List[str] = []
+        self._new_ids: Dict[str, int] = {}
+
+        self._load()
+
+    def _load(self):
+        """以内存映射方式加载已保存的词表"""
+        self._pool = np.empty(0, dtype=np.uint8)
+        self._offsets = np.zeros(1, dtype=np.uint64)
+        self._sorted_ids = np.empty(0, dtype=np.uint32)
+
+        if not all(os.path.exists(path) for path in (self.pool_file, self.offsets_file, self.sorted_file)):
+            return
+
+        try:
+            offsets = np.load(self.offsets_file, mmap_mode='r')
+            sorted_ids = np.load(self.sorted_file, mmap_mode='r')
+            if len(offsets) > 1 and int(offsets[-1]) > 0:
+                self._pool = np.memmap(self.pool_file, dtype=np.uint8, mode='r')
+            self._offsets = offsets
+            self._sorted_ids = sorted_ids
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading vocabulary from {self.index_path}: {e}")
+
+    @property
+    def saved_size(self) -> int:
+        """已保存的词项数"""
+        return len(self._offsets) - 1
+
+    def __len__(self) -> int:
+        return self.saved_size + len(self._new_terms)
+
+    def __contains__(self, term: str) -> bool:
+        return self.get_id(term) is not None
+
+    def _term_bytes(self, term_id: int) -> bytes:
+        return self._pool[int(self._offsets[term_id]):int(self._offsets[term_id + 1])].tobytes()
+
+    def get_id(self, term: str) -> Optional[int]:
+        """查找词项ID，不存在时返回None"""
+        term_id = self._cache.get(term)
+        if term_id is None:
+            term_id = self._new_ids.get(term)
+        if term_id is not None:
+            return term_id
+
+        if not len(self._sorted_ids):
+            return None
+        key = term.encode('utf-8')
+        sorted_terms = _SortedTerms(self)
+        index = bisect.bisect_left(sorted_terms, key)
+        if index < len(sorted_terms) and sorted_terms[index] == key:
+            term_id = int(self._sorted_ids[index])
+            if len(self._cache) >= MAX_CACHED_TERMS:
+                self._cache.clear()
+            self._cache[term] = term_id
+            return term_id
+        return None
+
+    def add(self, term: str) -> int:
+        """返回词项ID，新词项分配下一个ID"""
+        term_id = self.get_id(term)
+        if term_id is None:
+            term_id = len(self)
+            self._new_terms.append(term)
+            self._new_ids[term] = term_id
+        return term_id
+
+    def add_many(self, terms: Iterable[str]) -> List[int]:
+        """批量返回词项ID"""
+        return [self.add(term) for term in terms]
+
+    def get_term(self, term_id: int) -> str:
+        """根据ID取词项"""
+        if term_id >= self.saved_size:
+            return self._new_terms[term_id - self.saved_size]
+        return self._term_bytes(term_id).decode('utf-8')
+
+    def save(self):
+        """将新增词项追加到磁盘词表（字符串池原地追加，有序ID数组只插入新词项）"""
+        if not self._new_terms and os.path.exists(self.sorted_file):
+            return
+
+        os.makedirs(self.index_path, exist_ok=True)
+        new_bytes = [term.encode('utf-8') for term in self._new_terms]
+        saved_size = self.saved_size
+        base = int(self._offsets[-1])
+
+        # 偏移数组：在已有数据后追加
+        new_offsets = np.cumsum([len(b) for b in new_bytes], dtype=np.uint64) + np.uint64(base)
+        offsets = np.concatenate([np.asarray(self._offsets, dtype=np.uint64), new_offsets])
+
+        # 排序数组：新词项单独排序，按二分查找的位置插入已有的有序ID（新词项都不在已有词表中）
+        order = sorted(range(len(new_bytes)), key=new_bytes.__getitem__)
+        sorted_terms = _SortedTerms(self)
+        positions = [bisect.bisect_left(sorted_terms, new_bytes[i]) for i in order]
+        sorted_ids = np.insert(np.asarray(self._sorted_ids, dtype=np.uint32), positions,
+                               np.asarray(order, dtype=np.uint32) + np.uint32(saved_size))
+
+        # 字符串池原地追加：已有字节不变，已打开的映射仍然有效；偏移数组替换后读取端才会看到新词项。
+        # 先截断到已保存的长度，去掉上次中断的保存可能留下的尾部
+        self._pool = np.empty(0, dtype=np.uint8)
+        with open(self.pool_file, 'ab') as f:
+            f.truncate(base)
+            f.write(b''.join(new_bytes))
+        self._write(self.offsets_file, lambda f: np.save(f, offsets))
+        self._write(self.sorted_file, lambda f: np.save(f, sorted_ids))
+
+        logger.info(f"Saved vocabulary with {len(offsets) - 1} terms ({len(new_bytes)} new)")
+        self._new_terms = []
+        self._new_ids = {}
+        self._load()
+
+    @staticmethod
+    def _write(path: str, writer):
+        """先写临时文件再替换，读取端不会看到写了一半的文件"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            writer(f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,259 @@
+"""
+基于文本密度/链接密度的正文抽取器
+
+在一次lxml解析结果上完成:
+1. 按标签和class/id特征标记导航、页脚、侧栏、相关链接等模板块（不修改文档树，
+   同一棵树还可以继续用于提取链接）
+2. 自底向上统计每个元素的文本长度和链接文本长度
+3. 段落级文本块按长度、逗号数为父/祖父元素打分，选出得分最高的正文容器，
+   并合并得分接近的兄弟元素
+4. 输出正文容器中链接密度不高的文本；找不到正文容器（如门户首页）时，
+   退化为输出全页所有低链接密度的文本块
+"""
+
+import re
+from typing import Dict, List, Optional, Set, Union
+
+import lxml.html
+from lxml import etree
+
+HtmlDocument = lxml.html.HtmlElement
+
+# 直接丢弃的标签
+_DROP_TAGS = frozenset({
+    'script', 'style', 'noscript', 'iframe', 'svg', 'canvas', 'template',
+    'nav', 'footer', 'header', 'aside', 'form', 'button', 'select', 'input', 'textarea'
+})
+
+# 可作为正文文本块的标签
+_BLOCK_TAGS = frozenset({'p', 'div', 'td', 'li', 'section', 'article', 'main', 'pre', 'blockquote', 'dd', 'h2', 'h3'})
+
+# 换行分隔的块级标签
+_NEWLINE_TAGS = _BLOCK_TAGS | frozenset({'br', 'tr', 'ul', 'ol', 'table', 'h1', 'h4', 'h5', 'h6', 'dl', 'dt'})
+
+# 模板块的class/id特征
+_BOILERPLATE_PATTERN = re.compile(
+    r'nav|menu|footer|header|sidebar|side-bar|breadcrumb|crumb|copyright|'
+    r'related|recommend|share|social|comment|advert|\bad[s_-]|banner|sponsor|'
+    r'login|signup|subscribe|toolbar|pagination|pager|popup|modal|cookie|hot-?news',
+    re.IGNORECASE
+)
+
+# 正文容器的class/id特征
+_CONTENT_PATTERN = re.compile(r'article|content|post|story|entry|detail|正文', re.IGNORECASE)
+
+_COMMA_PATTERN = re.compile(r'[,，、;；。]')
+
+
+class ContentExtractor:
+    """基于文本密度和链接密度的正文抽取器"""
+
+    def __init__(self, min_block_length: int = 25, max_link_density: float = 0.5,
+                 sibling_threshold: float = 0.2):
+        """
+        初始化正文抽取器
+
+        Args:
+            min_block_length: 计入打分的文本块最小字符数
+            max_link_density: 文本块允许的最大链接文本占比
+            sibling_threshold: 兄弟元素得分达到最高分的该比例时一并作为正文
+        """
+        self.min_block_length = min_block_length
+        self.max_link_density = max_link_density
+        self.sibling_threshold = sibling_threshold
+
+    def parse(self, html_content: Union[str, bytes]) -> Optional[HtmlDocument]:
+        """解析HTML，空文档或无法解析时返回None"""
+        if not html_content:
+            return None
+        if isinstance(html_content, str):
+            html_content = html_content.encode('utf-8', errors='replace')
+            parser = lxml.html.HTMLParser(encoding='utf-8')
+        else:
+            parser = lxml.html.HTMLParser()
+        try:
+            return lxml.html.document_fromstring(html_content, parser=parser)
+        except (etree.ParserError, ValueError):
+            return None
+
+    def extract(self, doc: Optional[HtmlDocument]) -> str:
+        """
+        抽取正文文本
+
+        Args:
+            doc: parse()返回的文档
+
+        Returns:
+            正文文本（块之间以换行分隔，未做空白规整）
+        """
+        if doc is None:
+            return ""
+
+        body = doc.find('body')
+        root = body if body is not None else doc
+
+        pruned: Set[HtmlDocument] = set()
+        text_length: Dict[HtmlDocument, int] = {}
+        link_length: Dict[HtmlDocument, int] = {}
+
+        # 自底向上统计文本长度和链接文本长度（子元素先于父元素处理）
+        elements = [el for el in root.iter() if isinstance(el.tag, str)]
+        for el in elements:
+            # 文档顺序遍历，父元素先于子元素，模板块的整个子树都被标记
+            parent = el.getparent()
+            if (parent is not None and parent in pruned) or self._is_boilerplate(el):
+                pruned.add(el)
+
+        for el in reversed(elements):
+            if el in pruned:
+                continue
+            own = _text_len(el.text)
+            children_text = 0
+            children_links = 0
+            for child in el:
+                own += _text_len(child.tail)
+                if isinstance(child.tag, str) and child not in pruned:
+                    children_text += text_length[child]
+                    children_links += link_length[child]
+            total = own + children_text
+            text_length[el] = total
+            link_length[el] = total if el.tag == 'a' else children_links
+
+        # 文本块为父/祖父元素打分
+        scores: Dict[HtmlDocument, float] = {}
+        for el in elements:
+            if el in pruned or el.tag not in _BLOCK_TAGS:
+                continue
+            length = self._direct_text_length(el, pruned)
+            if length < self.min_block_length or self._link_density(el, text_length, link_length) > self.max_link_density:
+                continue
+            block_score = 1.0 + len(_COMMA_PATTERN.findall(self._direct_text(el, pruned))) + min(length / 100.0, 3.0)
+            parent = el.getparent()
+            if parent is not None:
+                scores[parent] = scores.get(parent, 0.0) + block_score
+                grandparent = parent.getparent()
+                if grandparent is not None:
+                    scores[grandparent] = scores.get(grandparent, 0.0) + block_score / 2
+
+        if not scores:
+            return self._collect_blocks(root, pruned, text_length, link_length)
+
+        best = None
+        best_score = 0.0
+        for el, score in scores.items():
+            if el in pruned:
+                continue
+            hint = f"{el.get('class', '')} {el.get('id', '')}"
+            if el.tag in ('article', 'main') or _CONTENT_PATTERN.search(hint):
+                score *= 1.25
+            score *= 1.0 - self._link_density(el, text_length, link_length)
+            scores[el] = score
+            if score > best_score:
+                best, best_score = el, score
+
+        if best is None:
+            return self._collect_blocks(root, pruned, text_length, link_length)
+
+        # 合并得分接近的兄弟元素
+        parent = best.getparent()
+        candidates = [best]
+        if parent is not None:
+            candidates = [
+                sibling for sibling in parent
+                if sibling is best or (
+                    isinstance(sibling.tag, str) and sibling not in pruned
+                    and scores.get(sibling, 0.0) >= best_score * self.sibling_threshold
+                )
+            ]
+
+        parts: List[str] = []
+        for el in candidates:
+            self._collect_text(el, pruned, text_length, link_length, parts)
+        return ''.join(parts)
+
+    def extract_title(self, doc: Optional[HtmlDocument]) -> str:
+        """提取<title>，没有时使用第一个<h1>"""
+        if doc is None:
+            return ""
+        for path in ('.//title', './/h1'):
+            el = doc.find(path)
+            if el is not None:
+                text = el.text_content().strip()
+                if text:
+                    return text
+        return ""
+
+    def extract_links(self, doc: Optional[HtmlDocument]) -> List[str]:
+        """提取全部<a href>的原始链接（按出现顺序）"""
+        if doc is None:
+            return []
+        return [href.strip() for href in doc.xpath('//a/@href') if href.strip()]
+
+    def _is_boilerplate(self, el: HtmlDocument) -> bool:
+        """判断元素是否为模板块"""
+        if el.tag in _DROP_TAGS:
+            return True
+        if el.tag in ('html', 'body', 'article', 'main'):
+            return False
+        hint = f"{el.get('class', '')} {el.get('id', '')}"
+        if hint.strip() and _BOILERPLATE_PATTERN.search(hint) and not _CONTENT_PATTERN.search(hint):
+            return True
+        return el.get('role') in ('navigation', 'banner', 'contentinfo', 'complementary')
+
+    @staticmethod
+    def _link_density(el, text_length, link_length) -> float:
+        total = text_length.get(el, 0)
+        return link_length.get(el, 0) / total if total else 0.0
+
+    @staticmethod
+    def _direct_text(el: HtmlDocument, pruned: Set[HtmlDocument]) -> str:
+        """元素自身及内联子元素的文本（不含块级子元素）"""
+        parts = [el.text or '']
+        for child in el:
+            if isinstance(child.tag, str) and child not in pruned and child.tag not in _BLOCK_TAGS:
+                parts.append(child.text_content())
+            parts.append(child.tail or '')
+        return ''.join(parts)
+
+    def _direct_text_length(self, el: HtmlDocument, pruned: Set[HtmlDocument]) -> int:
+        return _text_len(self._direct_text(el, pruned))
+
+    def _collect_text(self, el, pruned, text_length, link_length, parts: List[str]):
+        """收集元素文本，跳过模板块和链接密度过高的子块"""
+        if el in pruned:
+            return
+        if el.tag in _BLOCK_TAGS and text_length.get(el, 0) and \
+                self._link_density(el, text_length, link_length) > self.max_link_density:
+            return
+        newline = el.tag in _NEWLINE_TAGS
+        if newline:
+            parts.append('\n')
+        if el.text:
+            parts.append(el.text)
+        for child in el:
+            if isinstance(child.tag, str):
+                self._collect_text(child, pruned, text_length, link_length, parts)
+            if child.tail:
+                parts.append(child.tail)
+        if newline:
+            parts.append('\n')
+
+    def _collect_blocks(self, root, pruned, text_length, link_length) -> str:
+        """退化策略：输出所有低链接密度的叶子文本块"""
+        parts: List[str] = []
+        for el in root.iter():
+            if not isinstance(el.tag, str) or el in pruned or el.tag not in _BLOCK_TAGS:
+                continue
+            if any(isinstance(child.tag, str) and child.tag in _BLOCK_TAGS for child in el):
+                continue
+            if text_length.get(el, 0) >= self.min_block_length and \
+                    self._link_density(el, text_length, link_length) <= self.max_link_density:
+                parts.append(el.text_content())
+        return '\n'.join(parts)
+
+
+def _text_len(text: Optional[str]) -> int:
+    """不计空白的文本长度"""
+    if not text:
+        return 0
+    return sum(len(part) for part in text.split())
@@ -0,0 +1,114 @@
+"""
+预编译的jieba词典
+
+jieba默认在第一次分词时才加载词典（marshal格式的缓存），而每个TextProcessor
+实例还要逐个add_word注册金融词汇。这里在首次使用时把默认词典和金融词汇合并，
+以pickle格式保存到缓存目录；之后每个进程只需一次pickle.load即可得到可用的分词器，
+缓存文件名包含jieba版本和词汇表的哈希，词汇表变化时自动重建
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Iterable, Optional
+
+import jieba
+
+from config.indexer_config import INDEXER_CONFIG, FINANCIAL_TERMS
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本，修改缓存内容时递增
+_CACHE_VERSION = 1
+
+_tokenizer: Optional[jieba.Tokenizer] = None
+_tokenizer_lock = threading.Lock()
+
+
+def _cache_path(cache_dir: str, terms: Iterable[str]) -> str:
+    """根据jieba版本和词汇表计算缓存文件路径"""
+    digest = hashlib.md5()
+    digest.update(f"{_CACHE_VERSION}|{jieba.__version__}|".encode('utf-8'))
+    for term in sorted(terms):
+        digest.update(term.encode('utf-8') + b'\n')
+    return os.path.join(cache_dir, f"jieba_{digest.hexdigest()[:12]}.pkl")
+
+
+def build_dictionary(cache_dir: str, terms: Iterable[str]) -> str:
+    """
+    从jieba默认词典构建合并了自定义词汇的前缀词典并写入缓存
+
+    Args:
+        cache_dir: 缓存目录
+        terms: 自定义词汇
+
+    Returns:
+        缓存文件路径
+    """
+    terms = list(terms)
+    path = _cache_path(cache_dir, terms)
+    start_time = time.time()
+
+    tokenizer = jieba.Tokenizer()
+    tokenizer.initialize()
+    for term in terms:
+        # 词典格式不支持含空格的词，这类词按空格切分后本身就是独立的词
+        if term.strip() and not any(ch.isspace() for ch in term):
+            tokenizer.add_word(term)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump((tokenizer.FREQ, tokenizer.total), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Built jieba dictionary cache {path} in {time.time() - start_time:.2f}s")
+    return path
+
+
+def load_tokenizer(cache_dir: Optional[str] = None, terms: Optional[Iterable[str]] = None) -> jieba.Tokenizer:
+    """
+    加载预编译词典，得到已初始化的分词器（缓存不存在时先构建）
+
+    Args:
+        cache_dir: 缓存目录，默认使用INDEXER_CONFIG['dict_cache_dir']
+        terms: 自定义词汇，默认使用FINANCIAL_TERMS
+    """
+    cache_dir = cache_dir or INDEXER_CONFIG.get('dict_cache_dir', 'data/jieba')
+    terms = list(FINANCIAL_TERMS if terms is None else terms)
+    path = _cache_path(cache_dir, terms)
+
+    start_time = time.time()
+    try:
+        with open(path, 'rb') as f:
+            freq, total = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        build_dictionary(cache_dir, terms)
+        with open(path, 'rb') as f:
+            freq, total = pickle.load(f)
+
+    tokenizer = jieba.Tokenizer()
+    tokenizer.FREQ, tokenizer.total = freq, total
+    tokenizer.initialized = True
+    logger.debug(f"Loaded jieba dictionary {path} in {time.time() - start_time:.2f}s")
+    return tokenizer
+
+
+def dictionary_version(terms: Optional[Iterable[str]] = None) -> str:
+    """词典版本标识（jieba版本和自定义词汇变化时改变），不需要加载词典"""
+    terms = FINANCIAL_TERMS if terms is None else terms
+    return os.path.splitext(os.path.basename(_cache_path('', terms)))[0]
+
+
+def get_tokenizer() -> jieba.Tokenizer:
+    """获取进程内共享的分词器（首次调用时加载词典）"""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = load_tokenizer()
+    return _tokenizer
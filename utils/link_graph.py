@@ -0,0 +1,212 @@
+"""
+链接图存储与PageRank计算
+
+爬虫运行时把每个页面的出链以整数URL ID的形式追加写入磁盘（urls.txt + edges.bin），
+离线时将边表转换为CSR（compressed sparse row）数组:
+- indptr.npy: int64，长度为节点数+1，节点u的出链为 indices[indptr[u]:indptr[u+1]]
+- indices.npy: uint32，所有出链目标的URL ID
+两个数组都以内存映射方式加载。
+"""
+
+import logging
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urldefrag
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+URLS_FILE = "urls.txt"
+EDGES_FILE = "edges.bin"
+INDPTR_FILE = "indptr.npy"
+INDICES_FILE = "indices.npy"
+
+
+def normalize_link(url: str) -> str:
+    """去掉fragment，作为链接图中的节点键"""
+    return urldefrag(url.strip())[0]
+
+
+class LinkGraphWriter:
+    """链接图采集器，以追加方式记录节点和边"""
+
+    def __init__(self, graph_dir: str = "data/crawler/graph", flush_edges: int = 100000):
+        """
+        初始化链接图采集器
+
+        Args:
+            graph_dir: 链接图存储目录
+            flush_edges: 内存中缓冲的边数达到该值时写入磁盘
+        """
+        self.graph_dir = graph_dir
+        self.flush_edges = flush_edges
+        self.urls_file = os.path.join(graph_dir, URLS_FILE)
+        self.edges_file = os.path.join(graph_dir, EDGES_FILE)
+
+        self.url_ids: Dict[str, int] = {}
+        self.pending_urls: List[str] = []
+        self.pending_edges = array('I')
+        self.lock = threading.Lock()
+
+        os.makedirs(graph_dir, exist_ok=True)
+        self._load_urls()
+
+    def _load_urls(self):
+        """加载已有的URL ID映射（行号即ID）"""
+        if not os.path.exists(self.urls_file):
+            return
+        with open(self.urls_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                self.url_ids[line.rstrip('\n')] = len(self.url_ids)
+        logger.info(f"Loaded {len(self.url_ids)} link graph nodes")
+
+    def _get_url_id(self, url: str) -> int:
+        """获取URL的整数ID，新URL分配下一个ID"""
+        url = normalize_link(url)
+        url_id = self.url_ids.get(url)
+        if url_id is None:
+            url_id = len(self.url_ids)
+            self.url_ids[url] = url_id
+            self.pending_urls.append(url)
+        return url_id
+
+    def add_page(self, url: str, outlinks: Iterable[str]) -> None:
+        """记录一个页面的全部出链"""
+        with self.lock:
+            src = self._get_url_id(url)
+            for link in outlinks:
+                dst = self._get_url_id(link)
+                if dst != src:
+                    self.pending_edges.append(src)
+                    self.pending_edges.append(dst)
+
+            if len(self.pending_edges) >= 2 * self.flush_edges:
+                self._flush()
+
+    def _flush(self):
+        """将缓冲的节点和边追加到磁盘"""
+        if self.pending_urls:
+            with open(self.urls_file, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(self.pending_urls) + '\n')
+            self.pending_urls.clear()
+        if self.pending_edges:
+            with open(self.edges_file, 'ab') as f:
+                self.pending_edges.tofile(f)
+            self.pending_edges = array('I')
+
+    def flush(self) -> None:
+        """将缓冲数据写入磁盘"""
+        with self.lock:
+            self._flush()
+
+    def close(self) -> None:
+        """关闭采集器"""
+        self.flush()
+
+
+def build_csr(graph_dir: str = "data/crawler/graph") -> int:
+    """
+    将追加写入的边表转换为CSR数组（重复边只保留一条）
+
+    Returns:
+        节点数量
+    """
+    urls_file = os.path.join(graph_dir, URLS_FILE)
+    edges_file = os.path.join(graph_dir, EDGES_FILE)
+
+    num_nodes = 0
+    if os.path.exists(urls_file):
+        with open(urls_file, 'r', encoding='utf-8') as f:
+            num_nodes = sum(1 for _ in f)
+
+    if os.path.exists(edges_file):
+        edges = np.fromfile(edges_file, dtype=np.uint32).reshape(-1, 2)
+    else:
+        edges = np.empty((0, 2), dtype=np.uint32)
+
+    # 按(src, dst)排序去重
+    keys = np.unique((edges[:, 0].astype(np.uint64) << np.uint64(32)) | edges[:, 1].astype(np.uint64))
+    src = (keys >> np.uint64(32)).astype(np.int64)
+    dst = (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+
+    np.save(os.path.join(graph_dir, INDPTR_FILE), indptr)
+    np.save(os.path.join(graph_dir, INDICES_FILE), dst)
+    logger.info(f"Built CSR link graph: {num_nodes} nodes, {len(dst)} edges")
+    return num_nodes
+
+
+class LinkGraph:
+    """只读CSR链接图，数组以内存映射方式加载"""
+
+    def __init__(self, graph_dir: str = "data/crawler/graph"):
+        self.graph_dir = graph_dir
+        self.indptr = np.load(os.path.join(graph_dir, INDPTR_FILE), mmap_mode='r')
+        self.indices = np.load(os.path.join(graph_dir, INDICES_FILE), mmap_mode='r')
+        self._url_ids: Optional[Dict[str, int]] = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @property
+    def url_ids(self) -> Dict[str, int]:
+        """URL到节点ID的映射，首次访问时加载"""
+        if self._url_ids is None:
+            self._url_ids = {}
+            with open(os.path.join(self.graph_dir, URLS_FILE), 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._url_ids[line.rstrip('\n')] = len(self._url_ids)
+        return self._url_ids
+
+    def out_degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """获取节点的出链目标"""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def pagerank(self, damping: float = 0.85, max_iter: int = 100, tol: float = 1e-8) -> np.ndarray:
+        """
+        幂迭代计算PageRank
+
+        Args:
+            damping: 阻尼系数
+            max_iter: 最大迭代次数
+            tol: L1收敛阈值
+
+        Returns:
+            每个节点的PageRank值（总和为1）
+        """
+        n = self.num_nodes
+        if n == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        out_deg = self.out_degrees()
+        dangling = out_deg == 0
+        inv_deg = np.zeros(n, dtype=np.float64)
+        inv_deg[~dangling] = 1.0 / out_deg[~dangling]
+        src = np.repeat(np.arange(n, dtype=np.int64), out_deg)
+        indices = np.asarray(self.indices, dtype=np.int64)
+
+        rank = np.full(n, 1.0 / n)
+        for iteration in range(max_iter):
+            contrib = (rank * inv_deg)[src]
+            new_rank = np.bincount(indices, weights=contrib, minlength=n)
+            new_rank = (1.0 - damping) / n + damping * (new_rank + rank[dangling].sum() / n)
+            delta = np.abs(new_rank - rank).sum()
+            rank = new_rank
+            if delta < tol:
+                logger.info(f"PageRank converged after {iteration + 1} iterations")
+                break
+
+        return rank
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+文本处理工具测试脚本
+"""
+
+import json
+import os
+import pickle
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jieba_dict import load_tokenizer
+from utils.text_processor import Analyzer, BigramAnalyzer, TextProcessor, get_analyzer, get_index_analyzer
+
+ARTICLE_HTML = """<html><head><title>美联储加息 - 新浪财经</title></head><body>
+<div id="top-nav"><ul><li><a href="/">首页</a></li><li><a href="/stock">股票频道</a></li></ul></div>
+<div class="wrap"><div class="main-content">
+<h1>美联储宣布加息25个基点</h1>
+<p>美联储周三宣布将联邦基金利率上调25个基点，这是今年以来的第三次加息，市场普遍预期这一结果。</p>
+<p>分析人士认为，通胀压力依然较大，美联储可能在年内继续收紧货币政策，股市应声下跌。</p>
+<div class="related"><a href="/1">相关新闻：央行开展逆回购操作</a><a href="/2">相关新闻：黄金价格创新高</a></div>
+</div>
+<div class="side"><ul>
+<li><a href="/a">热门文章：比特币价格大幅波动引发关注</a></li>
+<li><a href="/b">热门文章：新能源汽车销量持续增长</a></li>
+</ul></div></div>
+<div class="footer">版权所有 新浪公司 京ICP证000007</div>
+<script>var tracking = "股票";</script>
+</body></html>"""
+
+PORTAL_HTML = """<html><body>
+<div><a href="/1">要闻一要闻一要闻一要闻一要闻一要闻一</a><a href="/2">要闻二要闻二要闻二要闻二要闻二要闻二</a></div>
+<div><p>今日A股三大指数集体高开，沪指涨0.5%，深成指涨0.8%，创业板指涨1.2%，两市成交额突破万亿元。</p></div>
+<div id="footer">关于我们 联系我们 广告服务 版权所有</div>
+</body></html>"""
+
+
+def test_extract_content_drops_boilerplate():
+    """测试正文抽取去掉导航、相关链接、侧栏和页脚"""
+    print("🔍 测试正文抽取...")
+    processor = TextProcessor()
+    doc = processor.parse_html(ARTICLE_HTML)
+
+    content = processor.extract_content(doc)
+    print(f"   正文: {content}")
+    assert "联邦基金利率" in content and "收紧货币政策" in content
+    for junk in ("首页", "相关新闻", "热门文章", "版权所有", "tracking"):
+        assert junk not in content
+
+    # 同一棵文档树还可以继续提取标题和链接
+    assert processor.extract_title(doc) == "美联储加息 - 新浪财经"
+    assert processor.content_extractor.extract_links(doc) == ["/", "/stock", "/1", "/2", "/a", "/b"]
+
+    # 直接传入HTML字符串的结果一致
+    assert processor.extract_content(ARTICLE_HTML) == content
+
+
+def test_extract_content_portal_page():
+    """测试门户页面只保留低链接密度的文本块"""
+    print("\n🔍 测试门户页面抽取...")
+    processor = TextProcessor()
+    content = processor.extract_content(PORTAL_HTML)
+    print(f"   正文: {content}")
+    assert "两市成交额突破万亿元" in content
+    assert "要闻一" not in content and "广告服务" not in content
+    assert processor.extract_content("") == ""
+
+
+def test_clean_text():
+    """测试文本清理与截断"""
+    print("\n🔍 测试文本清理...")
+    processor = TextProcessor()
+    text = " <p class=\"x\">美联储加息25个基点，</p>\n\n<b>股市</b> ★ 下跌 a < b\t(IPO)  "
+    assert processor.clean_text(text) == "美联储加息25个基点 股市 下跌 a b (IPO)"
+    assert processor.clean_text("") == "" and processor.clean_text("<br/>★") == ""
+
+    # 截断结果与完整清理结果的前缀一致，长页面只处理需要的前缀
+    page = "<div>" + "<span>市场</span> 新闻，" * 5000 + "</div>"
+    full = processor.clean_text(page)
+    for max_length in (1, 5, 100, 3000, len(full) + 10):
+        assert processor.clean_text(page, max_length=max_length) == full[:max_length].rstrip()
+
+
+def test_analyzer_pipeline():
+    """测试分析器的规范化、停用词和长度过滤"""
+    print("\n🔍 测试分析器...")
+    processor = TextProcessor()
+    assert processor.analyzer is get_analyzer() and TextProcessor().analyzer is processor.analyzer
+
+    tokens = processor.tokenize("我们认为ＩＰＯ和Bitcoin的价格风险都很高")
+    print(f"   分词结果: {tokens}")
+    assert "ipo" in tokens and "bitcoin" in tokens
+    # 配置中的停用词（含"价格"、"风险"）和单字都被过滤
+    for word in ("我们", "认为", "价格", "风险", "和", "的"):
+        assert word not in tokens
+    # 金融专业词即使出现在停用词表中也保留
+    assert not processor._is_stopword("credit") and processor._is_stopword("the")
+
+    analyzer = Analyzer(tokenizer=str.split, stopwords={"The"}, min_length=3, max_length=6)
+    assert analyzer.analyze("The Fed raised RATES by 25 bp yesterday") == ["fed", "raised", "rates"]
+    assert analyzer.analyze("") == []
+
+
+def test_tokenize_with_offsets():
+    """测试带偏移的分词与普通分词一致，且偏移指向原文"""
+    print("\n🔍 测试带偏移分词...")
+    processor = TextProcessor()
+    text = "  我们认为ＩＰＯ和 Bitcoin的价格风险都很高，美联储加息"
+    stream = processor.tokenize_with_offsets(text)
+    print(f"   词项流: {list(stream)}")
+    assert stream.terms == processor.tokenize(text)
+    assert list(stream.positions) == list(range(len(stream)))
+    assert [text[start:end] for _, _, start, end in stream] == ["ＩＰＯ", "Bitcoin", "美联储", "加息"]
+    assert stream.starts.typecode == 'I' and len(processor.tokenize_with_offsets("")) == 0
+
+    analyzer = Analyzer(tokenizer=str.split, min_length=3)
+    assert list(analyzer.analyze_with_offsets("the Fed  raised rates")) == [
+        ("the", 0, 0, 3), ("fed", 1, 4, 7), ("raised", 2, 9, 15), ("rates", 3, 16, 21)
+    ]
+
+
+def test_tokenize_many():
+    """测试批量分词与逐个分词结果一致且顺序不变"""
+    print("\n🔍 测试批量分词...")
+    processor = TextProcessor()
+    texts = [f"第{i}条新闻：美联储加息{i}个基点，股票市场下跌" for i in range(100)]
+    expected = [processor.tokenize(text) for text in texts]
+
+    # 文本较少时直接在当前进程分词
+    assert list(processor.tokenize_many(texts[:10], workers=4)) == expected[:10]
+    # 生成器输入，进程池并行分词
+    results = processor.tokenize_many((text for text in texts), workers=2, chunk_size=7)
+    assert list(results) == expected
+    streams = processor.tokenize_many(texts, workers=2, with_offsets=True)
+    assert [stream.terms for stream in streams] == expected
+    processor.close()
+
+
+def test_bigram_analyzer():
+    """测试汉字二元组分析器"""
+    print("\n🔍 测试二元组分析器...")
+    analyzer = get_analyzer("cjk_bigram")
+    assert isinstance(analyzer, BigramAnalyzer) and get_analyzer("cjk_bigram") is analyzer
+
+    text = "宁德时代发布ＣＡＴＬ-2024年报，金"
+    stream = analyzer.analyze_with_offsets(text)
+    print(f"   词项流: {list(stream)}")
+    assert stream.terms == analyzer.analyze(text) == [
+        "宁德", "德时", "时代", "代发", "发布", "catl", "2024", "年报", "金"
+    ]
+    assert [text[start:end] for _, _, start, end in stream][5] == "ＣＡＴＬ"
+    # 停用词中的二元组被过滤
+    assert "我们" not in analyzer.analyze("我们认为")
+
+    # 可以序列化传给分词子进程
+    clone = pickle.loads(pickle.dumps(analyzer))
+    assert clone.analyze(text) == stream.terms
+    texts = [f"{i}号新势力车企蔚小理发布财报" for i in range(80)]
+    processor = TextProcessor(analyzer)
+    assert list(processor.tokenize_many(texts, workers=2)) == [analyzer.analyze(t) for t in texts]
+    processor.close()
+
+    # 查询端按索引统计信息选用分析器
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stats_file = os.path.join(tmp_dir, "index_stats.json")
+        assert get_index_analyzer(stats_file).name == "jieba"
+        with open(stats_file, "w", encoding="utf-8") as f:
+            json.dump({"analyzer": "cjk_bigram"}, f)
+        assert get_index_analyzer(stats_file) is analyzer
+
+
+def test_extract_keywords():
+    """测试按词频和按TF-IDF提取关键词，以及批量提取"""
+    print("\n🔍 测试关键词提取...")
+    processor = TextProcessor()
+    text = "美联储加息，美联储加息，市场下跌，市场下跌，市场震荡，黄金上涨"
+    assert processor.extract_keywords(text, top_k=2) == ["市场", "美联储"]
+
+    # 常见词的IDF低，出现次数较少的稀有词排在前面
+    idf = {"市场": 0.1, "美联储": 2.0, "加息": 2.5, "黄金": 3.0}
+    keywords = processor.extract_keywords(text, top_k=3, idf=idf)
+    print(f"   TF-IDF关键词: {keywords}")
+    assert keywords == ["加息", "美联储", "黄金"]
+
+    texts = [text, "股票市场下跌", ""]
+    assert list(processor.extract_keywords_many(texts, top_k=3, idf=idf)) == [
+        processor.extract_keywords(t, top_k=3, idf=idf) for t in texts
+    ]
+
+
+def test_precompiled_dictionary():
+    """测试预编译词典合并自定义词汇并复用缓存"""
+    print("\n🔍 测试预编译词典...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        tokenizer = load_tokenizer(cache_dir, terms=["沪深三百增强", "Hedge Fund"])
+        cache_files = os.listdir(cache_dir)
+        assert len(cache_files) == 1
+        assert "沪深三百增强" in tokenizer.lcut("买入沪深三百增强基金")
+
+        # 第二次加载直接读取缓存
+        mtime = os.path.getmtime(os.path.join(cache_dir, cache_files[0]))
+        assert load_tokenizer(cache_dir, terms=["Hedge Fund", "沪深三百增强"]).FREQ["沪深三百增强"] > 0
+        assert os.path.getmtime(os.path.join(cache_dir, cache_files[0])) == mtime
+
+        # 词汇表变化时生成新的缓存
+        load_tokenizer(cache_dir, terms=["沪深三百增强", "中证一千增强"])
+        assert len(os.listdir(cache_dir)) == 2
+
+
+if __name__ == "__main__":
+    test_extract_content_drops_boilerplate()
+    test_extract_content_portal_page()
+    test_clean_text()
+    test_analyzer_pipeline()
+    test_tokenize_with_offsets()
+    test_tokenize_many()
+    test_bigram_analyzer()
+    test_extract_keywords()
+    test_precompiled_dictionary()
+    print("\n🎉 所有测试通过！")
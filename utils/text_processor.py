@@ -1,59 +1,416 @@
+import hashlib
+import heapq
+import json
+import os
 import re
-import jieba
-from typing import List, Set
+import threading
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
 
-class TextProcessor:
-    """文本处理工具类"""
+from config.indexer_config import INDEXER_CONFIG, STOPWORDS, FINANCIAL_TERMS
+from .content_extractor import ContentExtractor, HtmlDocument
+from .jieba_dict import dictionary_version, get_tokenizer
+
+# 全角字符转半角（长度不变，不影响字符偏移）
+_WIDTH_TABLE = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_WIDTH_TABLE[0x3000] = 0x20
+
+# 少于该数量的文本直接在当前进程分词，避免进程池的调度开销
+_MIN_PARALLEL_TEXTS = 64
+
+
+# 一次扫描：HTML标签整体跳过，白名单字符（中文、英文、数字、基本标点、空白）成段取出，
+# 其余字符落在匹配之间被丢弃；成段匹配让正则引擎在紧凑的字符集循环里扫描，避免逐字符替换
+_CLEAN_PATTERN = re.compile(r'<[^>]+>|([\u4e00-\u9fa5a-zA-Z0-9\s.,!?;:()\[\]{}"\'-]+)')
+# 指定最大长度时每次清理的最小前缀长度
+_CLEAN_CHUNK = 4096
+
+
+def _clean(text: str) -> str:
+    """拼接保留的字符段，再用str.split折叠空白（同时去掉首尾空白）"""
+    return ' '.join(''.join(_CLEAN_PATTERN.findall(text)).split())
+
+
+def _jieba_cut(text: str) -> List[str]:
+    """默认分词函数：使用合并了金融词汇的预编译词典（模块级函数，分析器可以序列化传给子进程）"""
+    return get_tokenizer().lcut(text)
+
+
+@dataclass
+class TokenStream:
+    """
+    带偏移的分词结果，每个词项对应一组(term, position, start_char, end_char)
     
-    def __init__(self):
-        # 加载金融相关词汇
-        self._load_financial_terms()
-    
-    def _load_financial_terms(self):
-        """加载金融专业词汇"""
-        financial_terms = [
-            # 中文金融术语
-            '股票', '债券', '基金', '期货', '期权', '外汇', '黄金', '原油',
-            '投资', '理财', '保险', '银行', '证券', '信托', '私募', '公募',
-            'IPO', '并购', '重组', '上市', '退市', '分红', '配股', '增发',
-            '牛市', '熊市', '震荡', '上涨', '下跌', '涨停', '跌停', '停牌',
-            '市盈率', '市净率', 'ROE', 'ROA', 'EPS', 'PEG', '股息率',
-            '美联储', '央行', '利率', '通胀', 'GDP', 'CPI', 'PPI', 'PMI',
-            '纳斯达克', '道琼斯', '标普500', '恒生指数', '上证指数', '深证成指',
-            
-            # 英文金融术语（用于混合语言内容）
-            'Bitcoin', 'Ethereum', 'Cryptocurrency', 'Blockchain', 'DeFi', 'NFT',
-            'Fintech', 'ESG', 'Hedge Fund', 'Private Equity', 'Venture Capital',
-            'Derivatives', 'Commodities', 'Real Estate', 'Mortgage', 'Credit',
-            'Equity', 'Dividend', 'Earnings', 'Revenue', 'Profit', 'Loss',
-            'Portfolio', 'Asset Allocation', 'Risk Management', 'Compliance',
-            'Monetary Policy', 'Fiscal Policy', 'Central Bank', 'Federal Reserve',
-            'Recession', 'Depression', 'Recovery', 'Growth', 'Unemployment',
-            'Banking', 'Insurance', 'Asset Management', 'Investment Banking',
-            'Wealth Management', 'Pension', 'Annuity', 'Mutual Fund', 'ETF'
-        ]
+    position是词项在过滤后词序列中的序号（与analyze()结果的下标一致），
+    [start_char, end_char)是词在原文中的字符区间；数值列使用紧凑的array存储
+    """
+    terms: List[str] = field(default_factory=list)
+    positions: array = field(default_factory=lambda: array('I'))
+    starts: array = field(default_factory=lambda: array('I'))
+    ends: array = field(default_factory=lambda: array('I'))
+    
+    def __len__(self) -> int:
+        return len(self.terms)
+    
+    def __iter__(self):
+        return zip(self.terms, self.positions, self.starts, self.ends)
+
+
+class Analyzer:
+    """
+    分析器：分词 -> 规范化（全角转半角、小写） -> 停用词过滤 -> 长度过滤
+    
+    所有配置在构造时编译为局部常量（冻结的停用词集合、长度上下限），
+    analyze()中每个词只做一次小写、一次长度比较和一次集合查找
+    """
+    
+    # 分析器名称，记录在索引统计信息中，查询时据此选用相同的分析器
+    name = 'jieba'
+    # 分词逻辑修改时递增，使按分析器版本缓存的分词结果失效
+    revision = 1
+    
+    def __init__(self, tokenizer: Optional[Callable[[str], List[str]]] = None,
+                 stopwords: Optional[Iterable[str]] = None, min_length: int = 2,
+                 max_length: int = 20, lowercase: bool = True,
+                 protected_terms: Iterable[str] = ()):
+        """
+        初始化分析器
         
-        for term in financial_terms:
-            jieba.add_word(term)
+        Args:
+            tokenizer: 分词函数，默认为jieba分词；并行分词时需要是可序列化的模块级函数
+            stopwords: 停用词，None表示不过滤停用词
+            min_length: 最小词长度
+            max_length: 最大词长度
+            lowercase: 是否转小写
+            protected_terms: 不作为停用词过滤的专业词汇
+        """
+        self.tokenizer = tokenizer or _jieba_cut
+        self.lowercase = lowercase
+        self.min_length = min_length
+        self.max_length = max_length
+        
+        protected = {self._normalize_term(term) for term in protected_terms}
+        self.stopwords = frozenset(
+            self._normalize_term(word) for word in (stopwords or ())
+        ) - protected
+        self._version: Optional[str] = None
+    
+    @classmethod
+    def from_config(cls, config: dict = None) -> 'Analyzer':
+        """按config/indexer_config.py创建分析器"""
+        config = config or INDEXER_CONFIG
+        return cls(
+            stopwords=STOPWORDS if config.get('enable_stopwords', True) else None,
+            min_length=config.get('min_term_length', 2),
+            max_length=config.get('max_term_length', 20),
+            protected_terms=FINANCIAL_TERMS,
+        )
+    
+    @property
+    def version(self) -> str:
+        """
+        分析器版本：名称、分词函数、全部配置和词典版本的哈希
+        
+        任何会改变分词结果的修改都会得到不同的版本，用于判断缓存的分词结果是否可用
+        """
+        if self._version is None:
+            tokenizer = getattr(self.tokenizer, '__qualname__', type(self.tokenizer).__name__)
+            digest = hashlib.md5(
+                f"{self.name}|{self.revision}|{tokenizer}|{self.min_length}|"
+                f"{self.max_length}|{self.lowercase}|".encode('utf-8')
+            )
+            if self.tokenizer is _jieba_cut:
+                digest.update(dictionary_version().encode('utf-8'))
+            for word in sorted(self.stopwords):
+                digest.update(b'\n' + word.encode('utf-8'))
+            self._version = f"{self.name}-{digest.hexdigest()[:12]}"
+        return self._version
+    
+    def _normalize_term(self, term: str) -> str:
+        term = term.strip().translate(_WIDTH_TABLE)
+        return term.lower() if self.lowercase else term
     
-    def clean_text(self, text: str) -> str:
-        """清理文本"""
+    def analyze(self, text: str) -> List[str]:
+        """将文本转换为词项列表"""
         if not text:
-            return ""
+            return []
+        return self.filter(self.tokenizer(text.translate(_WIDTH_TABLE)))
+    
+    def filter(self, tokens: Iterable[str]) -> List[str]:
+        """对分词结果做规范化、停用词过滤和长度过滤"""
+        stopwords = self.stopwords
+        min_length = self.min_length
+        max_length = self.max_length
         
-        # 移除HTML标签
-        text = re.sub(r'<[^>]+>', '', text)
+        if self.lowercase:
+            tokens = [token.strip().lower() for token in tokens]
+        else:
+            tokens = [token.strip() for token in tokens]
+        
+        return [
+            token for token in tokens
+            if min_length <= len(token) <= max_length and token not in stopwords
+        ]
+    
+    def analyze_with_offsets(self, text: str) -> TokenStream:
+        """
+        将文本转换为带位置和字符偏移的词项流，词项与analyze()的结果一致
+        
+        全角转半角和小写都不改变字符数，偏移直接对应原文
+        """
+        stream = TokenStream()
+        if not text:
+            return stream
+        
+        stopwords = self.stopwords
+        min_length = self.min_length
+        max_length = self.max_length
+        lowercase = self.lowercase
+        terms = stream.terms
+        add_position = stream.positions.append
+        add_start = stream.starts.append
+        add_end = stream.ends.append
+        
+        folded = text.translate(_WIDTH_TABLE)
+        cursor = 0
+        for raw in self.tokenizer(folded):
+            # jieba的切分结果首尾相接，通常无需查找
+            if folded.startswith(raw, cursor):
+                start = cursor
+            else:
+                start = folded.find(raw, cursor)
+                if start < 0:
+                    continue
+            cursor = start + len(raw)
+            
+            token = raw.strip()
+            term = token.lower() if lowercase else token
+            if min_length <= len(term) <= max_length and term not in stopwords:
+                start += len(raw) - len(raw.lstrip())
+                add_position(len(terms))
+                terms.append(term)
+                add_start(start)
+                add_end(start + len(token))
+        
+        return stream
+    
+    __call__ = analyze
+    
+    def warmup(self):
+        """提前加载分词词典，避免第一次查询承担加载开销"""
+        self.analyze("美联储宣布加息，股票市场下跌")
+
+
+class BigramAnalyzer(Analyzer):
+    """
+    CJK二元组分析器：连续的汉字输出重叠的二元组（单个汉字输出自身），
+    字母数字串输出小写的整词
+    
+    不依赖词典，速度远快于jieba，对新股票简称、公司名、网络用语等未登录词的召回更好；
+    字符类别的扫描由一个编译好的正则完成，Python层只处理每个字符串片段
+    """
+    
+    name = 'cjk_bigram'
+    
+    _SCAN_PATTERN = re.compile(r'([\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)|([0-9A-Za-z]+)')
+    
+    def __init__(self, stopwords: Optional[Iterable[str]] = None, min_length: int = 2,
+                 max_length: int = 20, lowercase: bool = True,
+                 protected_terms: Iterable[str] = ()):
+        """
+        初始化二元组分析器
         
-        # 移除多余的空白字符
-        text = re.sub(r'\s+', ' ', text)
+        Args:
+            stopwords: 停用词（与二元组或字母数字词完全相同时过滤）
+            min_length: 字母数字词的最小长度
+            max_length: 字母数字词的最大长度
+            lowercase: 是否转小写
+            protected_terms: 不作为停用词过滤的专业词汇
+        """
+        super().__init__(tokenizer=self._scan_tokens, stopwords=stopwords, min_length=min_length,
+                         max_length=max_length, lowercase=lowercase, protected_terms=protected_terms)
+    
+    def _scan_tokens(self, text: str) -> List[str]:
+        return [term for term, _ in self._scan(text)]
+    
+    def _scan(self, folded: str) -> Iterator[Tuple[str, int]]:
+        """扫描全角转半角后的文本，依次产出(词项, 起始偏移)"""
+        stopwords = self.stopwords
+        min_length = self.min_length
+        max_length = self.max_length
+        lowercase = self.lowercase
         
-        # 移除特殊字符，保留中文、英文、数字和基本标点
-        text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9\s.,!?;:()\[\]{}"\'-]', '', text)
+        for match in self._SCAN_PATTERN.finditer(folded):
+            run = match.group()
+            start = match.start()
+            if match.lastindex == 1:
+                if len(run) == 1:
+                    if run not in stopwords:
+                        yield run, start
+                    continue
+                for i in range(len(run) - 1):
+                    bigram = run[i:i + 2]
+                    if bigram not in stopwords:
+                        yield bigram, start + i
+            else:
+                term = run.lower() if lowercase else run
+                if min_length <= len(term) <= max_length and term not in stopwords:
+                    yield term, start
+    
+    def analyze(self, text: str) -> List[str]:
+        """将文本转换为词项列表"""
+        if not text:
+            return []
+        return [term for term, _ in self._scan(text.translate(_WIDTH_TABLE))]
+    
+    def analyze_with_offsets(self, text: str) -> TokenStream:
+        """将文本转换为带位置和字符偏移的词项流"""
+        stream = TokenStream()
+        if not text:
+            return stream
         
-        return text.strip()
+        terms = stream.terms
+        add_position = stream.positions.append
+        add_start = stream.starts.append
+        add_end = stream.ends.append
+        for term, start in self._scan(text.translate(_WIDTH_TABLE)):
+            add_position(len(terms))
+            terms.append(term)
+            add_start(start)
+            add_end(start + len(term))
+        return stream
     
-    def extract_title(self, html_content: str) -> str:
-        """从HTML中提取标题"""
+    def __reduce__(self):
+        # 分词函数是绑定方法，按构造参数重建，便于传给分词子进程
+        return (_rebuild_bigram_analyzer, (self.stopwords, self.min_length, self.max_length, self.lowercase))
+
+
+def _rebuild_bigram_analyzer(stopwords, min_length, max_length, lowercase) -> BigramAnalyzer:
+    return BigramAnalyzer(stopwords=stopwords, min_length=min_length,
+                          max_length=max_length, lowercase=lowercase)
+
+
+# 可在构建索引时选择的分析器
+ANALYZERS = {
+    Analyzer.name: Analyzer,
+    BigramAnalyzer.name: BigramAnalyzer,
+}
+
+_analyzers: Dict[str, Analyzer] = {}
+_analyzers_lock = threading.Lock()
+
+
+def get_analyzer(name: Optional[str] = None) -> Analyzer:
+    """
+    获取进程内共享的分析器（首次调用时按配置创建）
+    
+    Args:
+        name: 分析器名称（见ANALYZERS），默认使用INDEXER_CONFIG['analyzer']
+    """
+    name = name or INDEXER_CONFIG.get('analyzer', Analyzer.name)
+    analyzer = _analyzers.get(name)
+    if analyzer is None:
+        if name not in ANALYZERS:
+            raise ValueError(f"Unknown analyzer: {name}")
+        with _analyzers_lock:
+            analyzer = _analyzers.get(name)
+            if analyzer is None:
+                analyzer = _analyzers[name] = ANALYZERS[name].from_config()
+    return analyzer
+
+
+def get_index_analyzer(stats_file: str) -> Analyzer:
+    """按索引统计信息中记录的分析器名称获取分析器，旧索引没有记录时使用jieba分析器"""
+    name = Analyzer.name
+    try:
+        with open(stats_file, 'r', encoding='utf-8') as f:
+            name = json.load(f).get('analyzer', Analyzer.name)
+    except (OSError, ValueError):
+        pass
+    return get_analyzer(name)
+
+
+def warmup():
+    """预热进程内共享的分析器（服务启动时调用）"""
+    get_analyzer().warmup()
+
+
+# 分词子进程中的文本处理器，由进程池initializer创建
+_worker_processor: Optional['TextProcessor'] = None
+
+
+def _init_tokenize_worker(analyzer: Analyzer):
+    """子进程初始化：加载预编译词典，每个子进程只做一次"""
+    global _worker_processor
+    _worker_processor = TextProcessor(analyzer)
+    analyzer.warmup()
+
+
+def _tokenize_chunk(texts: List[str], with_offsets: bool = False) -> List[Union[List[str], TokenStream]]:
+    """在子进程中对一组文本分词"""
+    if with_offsets:
+        return [_worker_processor.tokenize_with_offsets(text) for text in texts]
+    return [_worker_processor.tokenize(text) for text in texts]
+
+
+class TextProcessor:
+    """文本处理工具类"""
+    
+    def __init__(self, analyzer: Optional[Analyzer] = None):
+        # 正文抽取器
+        self.content_extractor = ContentExtractor()
+        # 分词分析器，默认与索引器、搜索引擎、爬虫共享同一个实例
+        # （金融词汇已合并在预编译词典中，不再逐个实例注册）
+        self.analyzer = analyzer or get_analyzer()
+        # 批量分词的进程池，首次并行分词时创建，多次调用之间复用
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+    
+    def warmup(self):
+        """提前加载分词词典"""
+        self.analyzer.warmup()
+    
+    def clean_text(self, text: str, max_length: Optional[int] = None) -> str:
+        """
+        清理文本：去掉HTML标签和中文、英文、数字、基本标点以外的字符，空白折叠为单个空格
+        
+        Args:
+            text: 原始文本
+            max_length: 结果的最大长度；指定时只清理得到这么多字符所需的前缀，
+                        不必处理整个长页面
+        """
+        if not text:
+            return ""
+        if max_length is None:
+            return _clean(text)
+        
+        size = max(max_length * 2, _CLEAN_CHUNK)
+        while size < len(text):
+            # 在未闭合的'<'之前截断，保证前缀的清理结果是整篇结果的前缀
+            cut = size
+            last_close = text.rfind('>', 0, cut)
+            open_tag = text.find('<', last_close + 1, cut)
+            if open_tag >= 0:
+                cut = open_tag
+            cleaned = _clean(text[:cut])
+            if len(cleaned) > max_length:
+                return cleaned[:max_length].rstrip()
+            size *= 2
+        return _clean(text)[:max_length].rstrip()
+    
+    def parse_html(self, html_content: str) -> Optional[HtmlDocument]:
+        """用lxml解析HTML，结果可重复用于提取标题、正文和链接"""
+        return self.content_extractor.parse(html_content)
+    
+    def extract_title(self, html_content: Union[str, HtmlDocument]) -> str:
+        """从HTML（或parse_html的解析结果）中提取标题"""
+        if isinstance(html_content, HtmlDocument):
+            return self.clean_text(self.content_extractor.extract_title(html_content))
+        
         title_pattern = r'<title[^>]*>(.*?)</title>'
         title_match = re.search(title_pattern, html_content, re.IGNORECASE | re.DOTALL)
         
@@ -69,74 +426,135 @@ class TextProcessor:
         
         return ""
     
-    def extract_content(self, html_content: str) -> str:
-        """从HTML中提取主要内容"""
-        from bs4 import BeautifulSoup
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def extract_content(self, html_content: Union[str, HtmlDocument]) -> str:
+        """
+        从HTML（或parse_html的解析结果）中提取主要内容
         
-        # 移除script和style标签
-        for script in soup(["script", "style"]):
-            script.decompose()
+        按文本密度和链接密度选出正文区域，去掉导航、页脚、相关链接等模板块
+        """
+        if isinstance(html_content, HtmlDocument):
+            doc = html_content
+        else:
+            doc = self.parse_html(html_content)
         
-        # 尝试找到主要内容区域
-        content_selectors = [
-            'article', 'main', '.content', '.article-content', 
-            '.post-content', '.entry-content', '.story-body'
-        ]
-        
-        content = ""
-        for selector in content_selectors:
-            elements = soup.select(selector)
-            if elements:
-                content = elements[0].get_text()
-                break
-        
-        # 如果没有找到特定内容区域，使用body
-        if not content:
-            content = soup.get_text()
-        
-        return self.clean_text(content)
+        return self.clean_text(self.content_extractor.extract(doc))
     
     def tokenize(self, text: str) -> List[str]:
-        """分词"""
-        if not text:
-            return []
+        """分词（过滤停用词和长度不符合要求的词）"""
+        return self.analyzer.analyze(text)
+    
+    def tokenize_with_offsets(self, text: str) -> TokenStream:
+        """分词并保留每个词的位置和原文字符偏移"""
+        return self.analyzer.analyze_with_offsets(text)
+    
+    def tokenize_many(self, texts: Iterable[str], workers: Optional[int] = 1,
+                      chunk_size: int = 16,
+                      with_offsets: bool = False) -> Iterator[Union[List[str], TokenStream]]:
+        """
+        批量分词，按输入顺序逐个返回每个文本的分词结果
+        
+        文本按chunk_size分组发送到进程池，同时在途的分组不超过workers*2个，
+        内存占用与输入总量无关；workers<=1或文本数较少时直接在当前进程分词
+        
+        Args:
+            texts: 文本（可以是生成器）
+            workers: 子进程数，None表示使用全部CPU
+            chunk_size: 每个任务包含的文本数
+            with_offsets: 为True时返回TokenStream（见tokenize_with_offsets）
+        """
+        workers = workers or os.cpu_count() or 1
+        tokenize = self.tokenize_with_offsets if with_offsets else self.tokenize
+        texts = iter(texts)
         
-        # 使用jieba分词
-        tokens = jieba.lcut(text)
+        if workers <= 1:
+            for text in texts:
+                yield tokenize(text)
+            return
         
-        # 过滤停用词和短词
-        filtered_tokens = []
-        for token in tokens:
-            token = token.strip()
-            if len(token) > 1 and not self._is_stopword(token):
-                filtered_tokens.append(token)
+        # 先取一小段，文本较少时不启动进程池
+        head = list(islice(texts, _MIN_PARALLEL_TEXTS))
+        if len(head) < _MIN_PARALLEL_TEXTS:
+            for text in head:
+                yield tokenize(text)
+            return
         
-        return filtered_tokens
+        pool = self._get_pool(workers)
+        pending = deque()
+        for chunk in _iter_chunks(head, texts, chunk_size):
+            pending.append(pool.submit(_tokenize_chunk, chunk, with_offsets))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        """获取（必要时创建）分词进程池"""
+        if self._pool is None or self._pool_workers != workers:
+            self.close()
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_tokenize_worker,
+                initargs=(self.analyzer,)
+            )
+            self._pool_workers = workers
+        return self._pool
+    
+    def close(self):
+        """关闭批量分词的进程池"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_workers = 0
     
     def _is_stopword(self, word: str) -> bool:
         """判断是否为停用词"""
-        stopwords = {
-            '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个',
-            '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好',
-            '自己', '这', '那', '他', '她', '它', '们', '我们', '你们', '他们', '她们', '它们',
-            '这个', '那个', '这些', '那些', '什么', '怎么', '为什么', '哪里', '何时', '如何',
-            '可以', '应该', '必须', '需要', '想要', '希望', '觉得', '认为', '知道', '看到',
-            '听到', '感到', '觉得', '认为', '知道', '看到', '听到', '感到'
-        }
-        return word in stopwords
-    
-    def extract_keywords(self, text: str, top_k: int = 10) -> List[str]:
-        """提取关键词"""
-        tokens = self.tokenize(text)
-        
-        # 简单的词频统计
-        word_freq = {}
-        for token in tokens:
-            word_freq[token] = word_freq.get(token, 0) + 1
-        
-        # 按频率排序
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        
-        return [word for word, freq in sorted_words[:top_k]] 
\ No newline at end of file
+        return word in self.analyzer.stopwords
+    
+    def extract_keywords(self, text: str, top_k: int = 10, idf: Optional[Mapping[str, float]] = None) -> List[str]:
+        """
+        提取关键词
+        
+        Args:
+            text: 文本
+            top_k: 关键词个数
+            idf: 词项 -> IDF的映射（支持get，如indexer.idf.IdfTable），
+                 提供时按TF-IDF排序，否则按词频排序
+        """
+        return self._top_keywords(self.tokenize(text), top_k, idf)
+    
+    def extract_keywords_many(self, texts: Iterable[str], top_k: int = 10,
+                              idf: Optional[Mapping[str, float]] = None,
+                              workers: int = 1) -> Iterator[List[str]]:
+        """
+        批量提取关键词，按输入顺序流式返回
+        
+        Args:
+            texts: 文本序列
+            top_k: 每个文本的关键词个数
+            idf: 词项 -> IDF的映射，见extract_keywords
+            workers: 分词进程数，见tokenize_many
+        """
+        for tokens in self.tokenize_many(texts, workers=workers):
+            yield self._top_keywords(tokens, top_k, idf)
+    
+    @staticmethod
+    def _top_keywords(tokens: List[str], top_k: int, idf: Optional[Mapping[str, float]]) -> List[str]:
+        """词频计数后用堆取前top_k个词，同分时保持词在文中首次出现的顺序"""
+        counts = Counter(tokens)
+        if idf is None:
+            return [term for term, _ in counts.most_common(top_k)]
+        # 不在IDF表中的词按表中最稀有的词对待（IdfTable.default），普通dict按0处理
+        get_idf = idf.get
+        default = getattr(idf, 'default', 0.0)
+        return heapq.nlargest(top_k, counts, key=lambda term: counts[term] * get_idf(term, default))
+
+
+def _iter_chunks(head: List[str], rest: Iterator[str], chunk_size: int) -> Iterator[List[str]]:
+    """将已读取的head和剩余的迭代器按chunk_size分组"""
+    for start in range(0, len(head), chunk_size):
+        yield head[start:start + chunk_size]
+    while True:
+        chunk = list(islice(rest, chunk_size))
+        if not chunk:
+            return
+        yield chunk